@@ -27,13 +27,25 @@ async def health_check():
 
 @app.get("/api/cron/process-news")
 async def trigger_news_cycle():
-    """Trigger the news processing cycle via Vercel Cron"""
-    logger.info("Cron job triggered news cycle...")
-    from src.scheduler.task_scheduler import run_news_cycle
-    # We run it in a thread or just await if it was async, 
-    # but run_news_cycle is synchronous logic currently.
-    run_news_cycle()
-    return JSONResponse(content={"status": "success", "message": "News cycle completed"}, status_code=200)
+    """Queue a news cycle for the worker (Vercel Cron). Returns at once with the job id."""
+    from fastapi.concurrency import run_in_threadpool
+    from src.database.models import SessionLocal
+    from src.scheduler.job_queue import enqueue
+
+    def _enqueue():
+        db = SessionLocal()
+        try:
+            job = enqueue(db, "news_cycle", {"trigger": "cron"})
+            return job.id, job.status
+        finally:
+            db.close()
+
+    job_id, status = await run_in_threadpool(_enqueue)
+    logger.info(f"Cron job queued news cycle as job {job_id}.")
+    return JSONResponse(
+        content={"status": status, "job_id": job_id, "status_url": f"/api/jobs/{job_id}"},
+        status_code=202
+    )
 
 @app.get("/")
 async def root():
@@ -1,43 +1,34 @@
 """
 Database cleanup script
-Removes old news articles to ensure fresh content
+Moves articles and digests past the retention window into the compressed
+archive (see src/database/retention.py) and deletes them from the database.
+
+Usage: python cleanup_db.py [--days N] [--digest-days N] [--dry-run]
 """
-from src.database.models import SessionLocal, RawNews, VerifiedNews, DailyDigest
-from datetime import datetime, time
+import argparse
+
+from src.config.settings import RETENTION_DAYS, DIGEST_RETENTION_DAYS, ARCHIVE_DIR
+from src.database.models import SessionLocal
+from src.database.retention import apply_retention
 
-def cleanup_old_data():
+def cleanup_old_data(days: int = RETENTION_DAYS, digest_days: int = DIGEST_RETENTION_DAYS, dry_run: bool = False):
     db = SessionLocal()
     
     try:
-        # Target: 2026-01-28
-        start_of_today = datetime(2026, 1, 28, 0, 0, 0)
-        end_of_today = datetime(2026, 1, 28, 23, 59, 59)
-        
         print("=" * 60)
-        print(f"DATABASE CLEANUP: KEEPING ONLY 2026-01-28")
+        print(f"DATABASE CLEANUP: ARTICLES > {days} DAYS, DIGESTS > {digest_days} DAYS"
+              f"{' (DRY RUN)' if dry_run else ''}")
         print("=" * 60)
 
-        # 1. Delete Daily Digests not from today
-        digest_count = db.query(DailyDigest).filter(
-            (DailyDigest.date < start_of_today) | (DailyDigest.date > end_of_today)
-        ).delete(synchronize_session=False)
-        
-        # 2. Delete Verified News not from today
-        verified_count = db.query(VerifiedNews).filter(
-            (VerifiedNews.published_at < start_of_today) | (VerifiedNews.published_at > end_of_today)
-        ).delete(synchronize_session=False)
-            
-        # 3. Delete Raw News not from today
-        raw_count = db.query(RawNews).filter(
-            (RawNews.published_at < start_of_today) | (RawNews.published_at > end_of_today)
-        ).delete(synchronize_session=False)
+        counts = apply_retention(db, days=days, digest_days=digest_days, dry_run=dry_run)
 
-        db.commit()
-        
-        print(f"\n✅ Deleted {digest_count} old digests")
-        print(f"✅ Deleted {verified_count} old verified articles")
-        print(f"✅ Deleted {raw_count} old raw articles")
-        print("\nDatabase cleaned successfully! Only today's data remains.")
+        verb = "Would archive" if dry_run else "Archived"
+        print(f"\n✅ {verb} {counts['daily_digests']} old digests")
+        print(f"✅ {verb} {counts['verified_news']} old verified articles")
+        print(f"✅ {verb} {counts['raw_news']} old raw articles")
+        print(f"✅ {'Would delete' if dry_run else 'Deleted'} {counts['article_contents']} unreferenced article bodies")
+        print(f"✅ {'Would delete' if dry_run else 'Deleted'} {counts['jobs']} finished jobs")
+        print(f"\nArchive: {ARCHIVE_DIR}")
         print("=" * 60)
         
     except Exception as e:
@@ -47,4 +38,9 @@ def cleanup_old_data():
         db.close()
 
 if __name__ == "__main__":
-    cleanup_old_data()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--digest-days", type=int, default=DIGEST_RETENTION_DAYS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    cleanup_old_data(args.days, args.digest_days, args.dry_run)
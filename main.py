@@ -14,7 +14,7 @@ from fastapi.responses import FileResponse
 from loguru import logger
 
 from src.config import settings
-from src.scheduler.task_scheduler import start_scheduler
+from src.scheduler.task_scheduler import start_scheduler, start_job_worker
 # from src.delivery.web_dashboard import app as dashboard_app # Circular import if we are not careful
 
 from src.delivery.web_dashboard import router as dashboard_router
@@ -38,16 +38,32 @@ async def lifespan(app: FastAPI):
     from src.config.firebase_config import initialize_firebase
     initialize_firebase()
     
-    # Start Scheduler
-    scheduler = start_scheduler()
-    logger.info("Scheduler started.")
+    # Start Scheduler, unless a separate `python main.py worker` process runs it
+    scheduler = None
+    job_worker = None
+    if settings.SCHEDULER_MODE == "embedded":
+        scheduler = start_scheduler()
+        job_worker = start_job_worker()
+        logger.info("Scheduler started.")
+    else:
+        logger.info("Scheduler runs in the worker process; serving only.")
+
+    # Embed recent articles for chat retrieval off the request path
+    from src.analysis.retrieval import warm_index
+    asyncio.get_running_loop().run_in_executor(None, warm_index)
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
     if scheduler:
-        scheduler.shutdown()
+        from src.scheduler.task_scheduler import stop_scheduler
+        stop_scheduler(scheduler)
+    if job_worker:
+        job_worker.stop()
+
+    from src.database.async_session import dispose_async_engine
+    await dispose_async_engine()
 
 app = FastAPI(title="AI News Intelligence Agent", lifespan=lifespan)
 
@@ -78,6 +94,46 @@ async def debug_api_requests(path_name: str, request: Request):
 async def health_check():
     return {"status": "healthy"}
 
+def run_worker():
+    """Run the scheduler, queued jobs and news pipeline in this process until SIGTERM/SIGINT."""
+    import signal
+    import threading
+    from src.config.firebase_config import initialize_firebase
+    from src.scheduler.task_scheduler import stop_scheduler
+
+    init_db()
+    initialize_firebase()
+    scheduler = start_scheduler()
+    job_worker = start_job_worker()
+    logger.info("Worker started; scheduler and job queue running.")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    stopping.wait()
+
+    logger.info("Worker shutting down...")
+    stop_scheduler(scheduler)
+    job_worker.stop()
+
+def run_collector():
+    """Poll this node's share of the feeds until SIGTERM/SIGINT (COLLECTOR_SHARDING)."""
+    import signal
+    import threading
+    from src.collectors.sharding import ShardedCollector
+
+    init_db()
+    collector = ShardedCollector().start()
+    logger.info(f"Collector {collector.node_id} started.")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    stopping.wait()
+
+    logger.info("Collector shutting down...")
+    collector.stop()
+
 def main():
     if len(sys.argv) > 1:
         command = sys.argv[1]
@@ -85,14 +141,31 @@ def main():
             logger.info("Running manual news cycle...")
             from src.scheduler.task_scheduler import run_news_cycle
             run_news_cycle()
+        elif command == "reanalyze":
+            from src.database.models import SessionLocal
+            from src.scheduler.task_scheduler import requeue_fallback_analyses
+            db = SessionLocal()
+            try:
+                count = requeue_fallback_analyses(db)
+                logger.info(f"Re-queued {count} fallback-analyzed articles; they will be analyzed next cycle.")
+            finally:
+                db.close()
+        elif command == "worker":
+            run_worker()
+        elif command == "collector":
+            run_collector()
+        elif command == "dev":
+            # Single process with auto-reload, for local development only
+            uvicorn.run("main:app", host="0.0.0.0", port=settings.PORT, reload=True)
         elif command == "init-db":
              from src.utils.init_db import init_db
              init_db()
         else:
             logger.error(f"Unknown command: {command}")
     else:
-        # Run Web Server
-        uvicorn.run("main:app", host="0.0.0.0", port=settings.PORT, reload=True)
+        # Run Web Server: several worker processes, no reloader
+        uvicorn.run("main:app", host="0.0.0.0", port=settings.PORT, workers=settings.WEB_WORKERS,
+                    proxy_headers=True, log_level="info")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,95 @@
+"""
+Semantic answer cache for the chat engine.
+
+Answers are looked up by cosine similarity of the query embedding, so
+"what happened with the RBI?" and "what did the RBI do?" share one LLM call.
+Entries are scoped to the current digest: when a new digest lands the scope
+changes and every cached answer is dropped. Size is bounded with LRU eviction.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.config.settings import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_SIMILARITY
+
+def _normalize(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, threshold: float = ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.scope = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def lookup(self, scope: Any, query: str, query_vector=None) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a near-identical question in this scope, if any."""
+        with self._lock:
+            self._enter_scope(scope)
+            key = self._best_match(query, query_vector)
+            if key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def store(self, scope: Any, query: str, query_vector, answer: str, sources: List[Dict[str, Any]]):
+        with self._lock:
+            self._enter_scope(scope)
+            key = _normalize(query)
+            self._entries[key] = {"query": query, "vector": query_vector, "answer": answer, "sources": sources}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "scope": self.scope,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _enter_scope(self, scope: Any):
+        if scope != self.scope:
+            # New digest: every cached answer may be stale
+            self._entries.clear()
+            self._matrix = None
+            self.scope = scope
+
+    def _best_match(self, query: str, query_vector) -> Optional[str]:
+        key = _normalize(query)
+        if key in self._entries:
+            return key
+        if query_vector is None:
+            return None
+
+        if self._matrix is None:
+            import numpy as np
+            self._keys = [k for k, e in self._entries.items() if e["vector"] is not None]
+            if not self._keys:
+                return None
+            self._matrix = np.vstack([self._entries[k]["vector"] for k in self._keys])
+
+        # Vectors are unit length, so the dot product is the cosine similarity
+        scores = self._matrix @ query_vector
+        best = int(scores.argmax())
+        return self._keys[best] if scores[best] >= self.threshold else None
+
+answer_cache = SemanticAnswerCache()
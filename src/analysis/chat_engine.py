@@ -1,20 +1,66 @@
+import json
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, AsyncIterator
 from sqlalchemy.orm import Session
-from src.database.models import VerifiedNews
+from src.database.models import VerifiedNews, DailyDigest
+from src.analysis.retrieval import get_retriever
+from src.analysis.answer_cache import answer_cache
 from src.analysis.llm_analyzer import LLMAnalyzer
+from src.analysis.prompt_builder import ContextBuilder
+from src.analysis.circuit_breaker import llm_breaker
 import openai
-from src.config.settings import OPENAI_API_KEY
+from src.config.settings import OPENAI_API_KEY, CHAT_CONTEXT_TOKEN_BUDGET
 
 logger = logging.getLogger(__name__)
 
+CHAT_MODEL = "gpt-3.5-turbo"
+
+SYSTEM_PROMPT = """
+        You are a Conversational News Intelligence Assistant.
+        Answer user questions ONLY based on the provided news context.
+        Always cite the source/title.
+
+        CRITICAL SAFETY RULES:
+        1. NEVER claim absolute accuracy.
+        2. NO hallucinated facts. If information is missing, say so politely.
+        3. Maintain a neutral, factual tone.
+        4. If the information is not in the context, state "Based on current data, I do not have information on this."
+        """
+
+# OpenAI clients hold a connection pool, so they are shared by every engine
+# instance instead of being rebuilt per request.
+_client_lock = threading.Lock()
+_sync_client = None
+_async_client = None
+
+def _get_sync_client():
+    global _sync_client
+    if _sync_client is None and OPENAI_API_KEY:
+        with _client_lock:
+            if _sync_client is None:
+                _sync_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    return _sync_client
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None and OPENAI_API_KEY:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _async_client
+
 class NewsChatEngine:
     def __init__(self):
         self.api_key = OPENAI_API_KEY
+        self.retriever = get_retriever()
+        self.context_builder = ContextBuilder(CHAT_CONTEXT_TOKEN_BUDGET)
         if self.api_key:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = _get_sync_client()
+            self.async_client = _get_async_client()
         else:
             self.client = None
+            self.async_client = None
 
     def get_response(self, session: Session, query: str) -> str:
         """
@@ -23,57 +69,158 @@ class NewsChatEngine:
         if not self.client:
             return "I'm sorry, I cannot answer questions right now as no AI API key is configured."
 
-        # 1. Search DB for relevant keywords (Naive search for now)
-        # In a real app, use Vector Search (FAISS) which is in requirements
-        keywords = query.split()
-        if not keywords:
-            results = session.query(VerifiedNews).order_by(VerifiedNews.published_at.desc()).limit(3).all()
-        else:
-            # Simple keyword search with multiple words
-            filters = [VerifiedNews.title.contains(k) | VerifiedNews.content.contains(k) for k in keywords[:3]]
-            from sqlalchemy import or_
-            results = session.query(VerifiedNews).filter(or_(*filters)).limit(5).all()
+        turn = self.prepare(session, query)
+        if turn["cached"]:
+            return turn["cached"]["answer"]
+        results = turn["results"]
+
+        try:
+            # Check if API key is a placeholder
+            if not self.api_key or self.api_key.startswith("your_"):
+                return self._mock_response(query, results)
+
+            messages, _ = self._build_messages(query, results)
+            if not llm_breaker.allow_request():
+                return self._mock_response(query, results)
+
+            response = self.client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=0.4
+            )
+            llm_breaker.record_success()
+            answer = response.choices[0].message.content
+            self._remember(turn, answer)
+            return answer
+        except Exception as e:
+            llm_breaker.record_failure(e)
+            logger.error(f"Chat failed: {e}")
+            return self._mock_response(query, results)
+
+    def prepare(self, session: Session, query: str) -> Dict[str, Any]:
+        """
+        Do all database and embedding work for a question: resolve the cache
+        scope, encode the query once, then either find a cached answer or
+        retrieve the context rows.
+        """
+        scope = self._cache_scope(session)
+        query_vector = self.retriever.encode_query(query)
+        cached = answer_cache.lookup(scope, query, query_vector)
+        if cached:
+            logger.info(f"Answer cache hit for: {query[:60]}")
+        results = [] if cached else self.retrieve(session, query, query_vector)
+        return {"query": query, "scope": scope, "vector": query_vector, "cached": cached, "results": results}
+
+    def retrieve(self, session: Session, query: str, query_vector=None) -> List[VerifiedNews]:
+        """Find the news rows used as context for a question."""
+        # Full-text and embedding search fused into one ranking
+        results = [n for n, _ in self.retriever.search(session, query, query_embedding=query_vector)]
 
         if not results:
             # Fallback to general latest news
             results = session.query(VerifiedNews).order_by(VerifiedNews.published_at.desc()).limit(3).all()
 
-        context = "\n---\n".join([
-            f"Title: {n.title}\nSummary: {n.summary_bullets}\nWhy it matters: {n.why_it_matters}\nWho is affected: {n.who_is_affected}"
-            for n in results
-        ])
+        return results
 
-        system_prompt = """
-        You are a Conversational News Intelligence Assistant.
-        Answer user questions ONLY based on the provided news context.
-        Always cite the source/title.
+    async def stream_response(self, turn: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream an answer as server-sent events.
 
-        CRITICAL SAFETY RULES:
-        1. NEVER claim absolute accuracy.
-        2. NO hallucinated facts. If information is missing, say so politely.
-        3. Maintain a neutral, factual tone.
-        4. If the information is not in the context, state "Based on current data, I do not have information on this."
+        Emits a `sources` event with the retrieved titles, then one `token`
+        event per completion delta, then `done`. `turn` comes from `prepare`
+        and is fully loaded: the request session may be closed while the
+        stream is sent.
         """
+        query, results, cached = turn["query"], turn["results"], turn["cached"]
+        if cached:
+            yield self._sse("sources", cached["sources"])
+            yield self._sse("token", {"text": cached["answer"]})
+            yield self._sse("done", {"cached": True})
+            return
 
-        user_prompt = f"User Question: {query}\n\nContext:\n{context}"
+        yield self._sse("sources", self._sources(results))
 
-        try:
-            # Check if API key is a placeholder
-            if not self.api_key or self.api_key.startswith("your_"):
-                return self._mock_response(query, results)
+        if not self.async_client:
+            yield self._sse("token", {"text": "I'm sorry, I cannot answer questions right now as no AI API key is configured."})
+            yield self._sse("done", {})
+            return
 
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.4
+        messages, report = self._build_messages(query, results)
+        if self.api_key.startswith("your_") or not llm_breaker.allow_request():
+            yield self._sse("token", {"text": self._mock_response(query, results)})
+            yield self._sse("done", {})
+            return
+
+        parts = []
+        completed = False
+        settled = False
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=0.4,
+                stream=True
             )
-            return response.choices[0].message.content
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield self._sse("token", {"text": delta})
+            completed = settled = True
+            llm_breaker.record_success()
         except Exception as e:
-            logger.error(f"Chat failed: {e}")
-            return self._mock_response(query, results)
+            settled = True
+            llm_breaker.record_failure(e)
+            logger.error(f"Chat stream failed: {e}")
+            if not parts:
+                yield self._sse("token", {"text": self._mock_response(query, results)})
+            else:
+                yield self._sse("error", {"message": "The answer was interrupted."})
+        finally:
+            # The client went away mid-stream (GeneratorExit/CancelledError): no result to record
+            if not settled:
+                llm_breaker.release_probe()
+
+        if completed and parts:
+            self._remember(turn, "".join(parts))
+        yield self._sse("done", {"context_tokens": report["tokens_used"]})
+
+    def _cache_scope(self, session: Session):
+        # Cached answers are only valid for the digest version they were computed against
+        latest = session.query(DailyDigest.id, DailyDigest.version).order_by(DailyDigest.date.desc()).first()
+        return (latest[0], latest[1]) if latest else None
+
+    def _remember(self, turn: Dict[str, Any], answer: str):
+        answer_cache.store(turn["scope"], turn["query"], turn["vector"], answer, self._sources(turn["results"]))
+
+    def _build_messages(self, query: str, results: List[VerifiedNews]):
+        """Chat messages with the context packed to the token budget, plus the packing report."""
+        sources = [
+            f"Title: {n.title}\nSummary: {' '.join(n.summary_bullets or [])}\nWhy it matters: {n.why_it_matters}\nWho is affected: {n.who_is_affected}"
+            for n in results
+        ]
+        context, report = self.context_builder.build(sources)
+        logger.info(
+            f"Chat context: {report['tokens_used']}/{report['token_budget']} tokens, "
+            f"{report['sources_used']} sources used, {report['sources_dropped']} dropped, "
+            f"{report['sentences_deduped']} duplicate sentences removed"
+        )
+
+        user_prompt = f"User Question: {query}\n\nContext:\n{context}"
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+        return messages, report
+
+    def _sources(self, results: List[VerifiedNews]) -> List[Dict[str, Any]]:
+        return [{"id": n.id, "title": n.title, "category": n.category} for n in results]
+
+    @staticmethod
+    def _sse(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
     def _mock_response(self, query: str, results: List[VerifiedNews]) -> str:
         """
@@ -90,3 +237,15 @@ class NewsChatEngine:
         
         response += "Note: Real-time conversational analysis is currently in mock mode due to API configuration."
         return response
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_chat_engine() -> NewsChatEngine:
+    """Shared engine for request handlers; it holds no per-request state."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = NewsChatEngine()
+    return _engine
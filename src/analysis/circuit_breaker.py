@@ -0,0 +1,156 @@
+"""
+Process-wide circuit breaker for OpenAI calls.
+
+Errors are classified as quota, rate-limit or transient. Quota and rate-limit
+errors trip the breaker immediately; transient errors trip it after several
+consecutive failures. While open, callers skip the network call and use
+their local fallback. After the cooldown one probe request is let through
+(half-open): success closes the breaker, failure re-opens it with a longer
+cooldown. A caller that took the probe and gives up without a result (an
+error before the call, a client disconnect) must `release_probe()`; a probe
+held longer than PROBE_TIMEOUT stops blocking others in any case.
+"""
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+QUOTA = "quota"
+RATE_LIMIT = "rate_limit"
+TRANSIENT = "transient"
+OTHER = "other"
+
+# Seconds to stay open per error class. Quota and auth failures need a human.
+COOLDOWNS = {QUOTA: 900.0, RATE_LIMIT: 30.0, TRANSIENT: 60.0}
+MAX_COOLDOWN = 3600.0
+TRANSIENT_FAILURE_THRESHOLD = 3
+# A probe not settled within this many seconds is presumed abandoned; the next caller probes instead
+PROBE_TIMEOUT = 120.0
+
+def classify_error(error: Exception) -> str:
+    """Map an OpenAI client exception to quota, rate_limit, transient or other."""
+    code = getattr(error, "code", None)
+    status = getattr(error, "status_code", None)
+    message = str(error).lower()
+
+    if code == "insufficient_quota" or "insufficient_quota" in message:
+        return QUOTA
+    if status in (401, 403) or "invalid_api_key" in message:
+        # A bad key fails every call, exactly like an exhausted quota
+        return QUOTA
+    if status == 429 or "rate limit" in message:
+        return RATE_LIMIT
+    if status is not None and status >= 500:
+        return TRANSIENT
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout", "ConnectionError"):
+        return TRANSIENT
+    return OTHER
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.last_error_kind = None
+        self.opened_at = None
+        self.open_until = 0.0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """False while open; lets exactly one probe through once the cooldown has passed."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, probing.")
+            if self.state == HALF_OPEN and self._probe_in_flight \
+                    and time.monotonic() - self._probe_started > PROBE_TIMEOUT:
+                logger.warning(f"Circuit '{self.name}' probe abandoned; letting another through.")
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+                return True
+            self.short_circuited += 1
+            return False
+
+    def release_probe(self):
+        """Give back a probe that ended without a result, so the next caller can probe."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed after successful probe.")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Exception) -> str:
+        """Register a failed call and return its error class."""
+        kind = classify_error(error)
+        with self._lock:
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if kind == OTHER:
+                # Request-specific errors (bad JSON, bad request) mean the service answered
+                if was_probe:
+                    self.state = CLOSED
+                    self.consecutive_failures = 0
+                return kind
+
+            self.consecutive_failures += 1
+            self.last_error_kind = kind
+            if was_probe or kind in (QUOTA, RATE_LIMIT) or self.consecutive_failures >= TRANSIENT_FAILURE_THRESHOLD:
+                self._trip(kind, _retry_after(error), was_probe)
+        return kind
+
+    def _trip(self, kind: str, retry_after: Optional[float], was_probe: bool):
+        cooldown = retry_after or COOLDOWNS.get(kind, COOLDOWNS[TRANSIENT])
+        if was_probe and self.opened_at is not None:
+            # Failed probe: back off exponentially from the previous cooldown
+            cooldown = max(cooldown, min(MAX_COOLDOWN, 2 * (self.open_until - self.opened_at)))
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_until = self.opened_at + cooldown
+        self.trips += 1
+        logger.error(f"Circuit '{self.name}' OPEN for {cooldown:.0f}s after {kind} error; using local fallback.")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            remaining = max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0
+            return {
+                "name": self.name,
+                "state": self.state,
+                "last_error": self.last_error_kind,
+                "retry_in_seconds": round(remaining, 1),
+                "consecutive_failures": self.consecutive_failures,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited
+            }
+
+# Shared by LLMAnalyzer and NewsChatEngine: both call the same account
+llm_breaker = CircuitBreaker("openai")
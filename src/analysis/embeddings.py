@@ -0,0 +1,55 @@
+"""
+Shared sentence-embedding model.
+
+Loading SentenceTransformer takes seconds and a few hundred MB, so every
+component (verification, retrieval, caches) goes through one lazily loaded
+instance per process.
+"""
+import logging
+import threading
+from typing import List, Optional
+
+from src.verification.verifier import _check_sbert
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_model = None
+_model_failed = False
+_model_lock = threading.Lock()
+
+def get_embedding_model():
+    """Return the shared SentenceTransformer, or None if it is unavailable."""
+    global _model, _model_failed
+    if _model is not None or _model_failed:
+        return _model
+
+    with _model_lock:
+        if _model is None and not _model_failed:
+            if not _check_sbert():
+                _model_failed = True
+                return None
+            try:
+                from sentence_transformers import SentenceTransformer
+                logger.info("Initializing Intelligence Engine (SentenceTransformer)... this may take a moment.")
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                logger.info("Intelligence Engine active.")
+            except Exception as e:
+                logger.error(f"Failed to load Intelligence Engine: {e}")
+                _model_failed = True
+    return _model
+
+def encode_texts(texts: List[str]):
+    """Encode texts to an (n, dim) float32 matrix of unit vectors, or None."""
+    model = get_embedding_model()
+    if model is None:
+        return None
+    import numpy as np
+    vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+def encode_text(text: str):
+    """Encode a single text to a unit vector, or None."""
+    vectors = encode_texts([text])
+    return None if vectors is None else vectors[0]
@@ -0,0 +1,125 @@
+"""
+Extractive pre-summarization for long articles.
+
+Before an article is sent to the LLM, sentences are scored locally and only
+the most salient ones are kept up to a token budget. Scoring combines
+TextRank over a sentence similarity graph, similarity to the document
+centroid and to the title, and a small lead-position prior. Sentence vectors
+are hashed TF-IDF computed with NumPy, so no model is needed.
+"""
+import re
+import zlib
+import logging
+from typing import List, Optional
+
+from src.analysis.prompt_builder import count_tokens, split_sentences
+from src.utils.text import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+HASH_DIM = 2 ** 12
+# Articles longer than this are scored on their first MAX_SENTENCES sentences
+MAX_SENTENCES = 300
+# Sentences this similar to one already chosen add nothing new
+REDUNDANCY_THRESHOLD = 0.8
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+
+# Relative weight of each signal in the final sentence score
+TEXTRANK_WEIGHT = 0.4
+CENTROID_WEIGHT = 0.3
+TITLE_WEIGHT = 0.2
+POSITION_WEIGHT = 0.1
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+def _terms(sentence: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(sentence.lower()) if len(w) > 2 and w not in STOPWORDS]
+
+def _vectorize(sentences: List[str]):
+    """Hashed, IDF-weighted, L2-normalized term vectors, one row per sentence."""
+    import numpy as np
+
+    tf = np.zeros((len(sentences), HASH_DIM), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            tf[row, zlib.crc32(term.encode("utf-8")) % HASH_DIM] += 1.0
+
+    document_frequency = (tf > 0).sum(axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    vectors = np.log1p(tf) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms, idf
+
+def _textrank(similarity):
+    import numpy as np
+
+    n = similarity.shape[0]
+    graph = similarity.copy()
+    np.fill_diagonal(graph, 0.0)
+    out_weight = graph.sum(axis=1, keepdims=True)
+    out_weight[out_weight == 0] = 1.0
+    transition = graph / out_weight
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(TEXTRANK_ITERATIONS):
+        scores = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * transition.T @ scores
+    return scores
+
+def _normalize(scores):
+    spread = scores.max() - scores.min()
+    return (scores - scores.min()) / spread if spread > 0 else scores * 0
+
+def summarize_extractive(text: str, token_budget: int, title: Optional[str] = None) -> str:
+    """
+    Keep the most salient sentences of `text` within `token_budget`, in their
+    original order. Text already within budget is returned unchanged.
+    """
+    if not text or count_tokens(text) <= token_budget:
+        return text
+
+    sentences = [s for line in text.splitlines() for s in split_sentences(line)][:MAX_SENTENCES]
+    if len(sentences) < 2:
+        return text
+
+    import numpy as np
+
+    vectors, idf = _vectorize(sentences)
+    similarity = vectors @ vectors.T
+
+    centroid = vectors.mean(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    centroid_score = vectors @ (centroid / centroid_norm) if centroid_norm else np.zeros(len(sentences))
+
+    title_score = np.zeros(len(sentences), dtype=np.float32)
+    if title:
+        title_vector = np.zeros(HASH_DIM, dtype=np.float32)
+        for term in _terms(title):
+            title_vector[zlib.crc32(term.encode("utf-8")) % HASH_DIM] = 1.0
+        title_vector *= idf
+        title_norm = np.linalg.norm(title_vector)
+        if title_norm:
+            title_score = vectors @ (title_vector / title_norm)
+
+    # News puts the key facts first
+    position_score = 1.0 / (1.0 + np.arange(len(sentences)))
+
+    scores = (TEXTRANK_WEIGHT * _normalize(_textrank(similarity))
+              + CENTROID_WEIGHT * _normalize(centroid_score)
+              + TITLE_WEIGHT * _normalize(title_score)
+              + POSITION_WEIGHT * position_score)
+
+    chosen, used = [], 0
+    for index in np.argsort(-scores):
+        cost = count_tokens(sentences[index] + " ")
+        if used + cost > token_budget:
+            continue
+        if chosen and similarity[index, chosen].max() > REDUNDANCY_THRESHOLD:
+            continue
+        chosen.append(int(index))
+        used += cost
+
+    if not chosen:
+        return text
+    return " ".join(sentences[i] for i in sorted(chosen))
@@ -3,7 +3,10 @@ import json
 import logging
 from typing import Dict, Any
 import openai
-from src.config.settings import OPENAI_API_KEY
+from src.config.settings import OPENAI_API_KEY, ANALYSIS_CONTENT_TOKEN_BUDGET
+from src.analysis.prompt_builder import ContextBuilder, count_tokens, strip_html
+from src.analysis.extractive import summarize_extractive
+from src.analysis.circuit_breaker import llm_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -15,35 +18,25 @@ class LLMAnalyzer:
             self.client = None
         else:
             self.client = openai.OpenAI(api_key=self.api_key)
+        self.content_builder = ContextBuilder(ANALYSIS_CONTENT_TOKEN_BUDGET)
 
     def analyze_article(self, title: str, content: str) -> Dict[str, Any]:
         """
         Analyze an article to extract structured intelligence.
         """
         if not self.client:
-            return self._mock_analysis(title)
+            return self._fallback_analysis(title, "no_api_key")
 
-        prompt = f"""
-        Analyze the following news article:
-        Title: {title}
-        Content: {content[:2000]} # Truncate to avoid huge context
-
-        Provide the output in valid JSON format with the following keys:
-        - "summary_bullets": [array of 3-5 strings, bullet points, 15-25 words each]
-        - "category": "one of the 14 mandatory categories"
-        - "impact_score": integer 1-10
-        - "why_it_matters": "string explaining impact"
-        - "who_is_affected": "stakeholders affected"
-        - "short_term_impact": "immediate consequences"
-        - "long_term_impact": "broader effects"
-        - "sentiment": "Positive/Negative/Neutral"
-        - "certainty_flag": "High/Medium/Low based on source clarity"
+        if not llm_breaker.allow_request():
+            # Provider is known to be failing: skip the round trip entirely
+            return self._fallback_analysis(title, f"circuit {llm_breaker.state}")
 
-        CRITICAL SAFETY RULES:
-        1. NEVER claim absolute accuracy.
-        2. NO hallucinated facts. If information is missing, state "Data not provided".
-        3. If information is uncertain or evolving, use "Evolving" or "Uncertain" in impacts.
-        """
+        try:
+            prompt = self._build_prompt(title, content)
+        except BaseException:
+            # Nothing was sent, so a probe taken above has no result to record
+            llm_breaker.release_probe()
+            raise
 
         try:
             response = self.client.chat.completions.create(
@@ -54,7 +47,16 @@ class LLMAnalyzer:
                 ],
                 temperature=0.3
             )
-            
+        except Exception as e:
+            kind = llm_breaker.record_failure(e)
+            if kind == "quota":
+                logger.error("OpenAI Quota Exceeded! Switching to mock analysis until the circuit probes again. Please check your billing/plan.")
+            else:
+                logger.error(f"LLM Analysis failed ({kind}): {e}")
+            return self._fallback_analysis(title, kind)
+
+        llm_breaker.record_success()
+        try:
             raw_content = response.choices[0].message.content
             # Clean up potential markdown code blocks
             if "```json" in raw_content:
@@ -62,14 +64,52 @@ class LLMAnalyzer:
             elif "```" in raw_content:
                 raw_content = raw_content.split("```")[1].strip()
                 
-            return json.loads(raw_content)
+            result = json.loads(raw_content)
+            result["analysis_mode"] = "llm"
+            return result
 
         except Exception as e:
-            if "insufficient_quota" in str(e) or (hasattr(e, 'code') and e.code == 'insufficient_quota'):
-                logger.error("OpenAI Quota Exceeded! Switching to mock analysis for this cycle. Please check your billing/plan.")
-            else:
-                logger.error(f"LLM Analysis failed: {e}")
-            return self._mock_analysis(title)
+            logger.error(f"LLM Analysis failed: {e}")
+            return self._fallback_analysis(title, "invalid_response")
+
+    def _build_prompt(self, title: str, content: str) -> str:
+        # Long articles keep their most salient sentences rather than the first N characters
+        text = strip_html(content or "")
+        original_tokens = count_tokens(text)
+        text = summarize_extractive(text, ANALYSIS_CONTENT_TOKEN_BUDGET, title=title)
+
+        # Cut on sentence/word boundaries to a token budget, not mid-word or mid-tag
+        article_text, report = self.content_builder.fit(text)
+        logger.info(f"Analysis content for '{title[:50]}': {report['tokens_used']} tokens (from {original_tokens})")
+
+        return f"""
+        Analyze the following news article:
+        Title: {title}
+        Content: {article_text}
+
+        Provide the output in valid JSON format with the following keys:
+        - "summary_bullets": [array of 3-5 strings, bullet points, 15-25 words each]
+        - "category": "one of the 14 mandatory categories"
+        - "impact_score": integer 1-10
+        - "why_it_matters": "string explaining impact"
+        - "who_is_affected": "stakeholders affected"
+        - "short_term_impact": "immediate consequences"
+        - "long_term_impact": "broader effects"
+        - "sentiment": "Positive/Negative/Neutral"
+        - "certainty_flag": "High/Medium/Low based on source clarity"
+
+        CRITICAL SAFETY RULES:
+        1. NEVER claim absolute accuracy.
+        2. NO hallucinated facts. If information is missing, state "Data not provided".
+        3. If information is uncertain or evolving, use "Evolving" or "Uncertain" in impacts.
+        """
+
+    def _fallback_analysis(self, title: str, reason: str) -> Dict[str, Any]:
+        """Mock analysis marked so the article can be re-analyzed once the LLM is back."""
+        result = self._mock_analysis(title)
+        result["analysis_mode"] = "fallback"
+        result["fallback_reason"] = reason
+        return result
 
     def _mock_analysis(self, title: str) -> Dict[str, Any]:
         """Fallback if no API key or error: Keyword-based classification"""
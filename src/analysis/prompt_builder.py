@@ -0,0 +1,169 @@
+"""
+Token-aware prompt assembly.
+
+Counts tokens with tiktoken when it is installed (a conservative word/punctuation
+estimate otherwise), packs context sources in rank order up to a token
+budget, drops sentences already seen in an earlier source and cuts text on
+sentence or word boundaries instead of raw character offsets.
+"""
+import re
+import html
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = "cl100k_base"
+# A partially fitting source is only worth including if this much of it fits
+MIN_PARTIAL_TOKENS = 40
+# Sentences shorter than this are too generic to deduplicate safely
+MIN_DEDUPE_WORDS = 4
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+_ESTIMATE_RE = re.compile(r"\w+|[^\w\s]")
+
+_TIKTOKEN_INITIALIZED = False
+_ENCODING = None
+
+def _get_encoding():
+    global _TIKTOKEN_INITIALIZED, _ENCODING
+    if _TIKTOKEN_INITIALIZED:
+        return _ENCODING
+
+    try:
+        import tiktoken
+        _ENCODING = tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        logger.warning("tiktoken unavailable, token counts are estimated.")
+        _ENCODING = None
+
+    _TIKTOKEN_INITIALIZED = True
+    return _ENCODING
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Long words split into several BPE tokens; overestimating is the safe side
+    return sum(1 + len(piece) // 8 for piece in _ESTIMATE_RE.findall(text))
+
+def strip_html(text: str) -> str:
+    """Remove tags and entities and collapse whitespace."""
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", html.unescape(_TAG_RE.sub(" ", text))).strip()
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_RE.split(text.strip()) if s] if text else []
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix within max_tokens. Whole lines are kept while they fit; the
+    line that overflows is cut at a sentence boundary, or a word boundary if
+    its first sentence is already too long.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = count_tokens(line + "\n")
+        if used + cost <= max_tokens:
+            kept.append(line)
+            used += cost
+            continue
+        partial = _truncate_line(line, max_tokens - used)
+        if partial:
+            kept.append(partial)
+        break
+    return "\n".join(kept)
+
+def _truncate_line(line: str, max_tokens: int) -> str:
+    for pieces in (split_sentences(line), line.split()):
+        kept, used = [], 0
+        for piece in pieces:
+            cost = count_tokens(piece + " ")
+            if used + cost > max_tokens:
+                break
+            kept.append(piece)
+            used += cost
+        if kept:
+            return " ".join(kept)
+    return ""
+
+def _dedupe_key(sentence: str) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", sentence.lower()).strip()
+
+class ContextBuilder:
+    def __init__(self, token_budget: int, separator: str = "\n---\n"):
+        self.token_budget = token_budget
+        self.separator = separator
+
+    def build(self, sources: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pack sources (best first) into one context string within the budget.
+        Returns the context and a report of what was used.
+        """
+        seen = set()
+        blocks = []
+        used = 0
+        report = {"token_budget": self.token_budget, "sources_used": 0, "sources_truncated": 0,
+                  "sources_dropped": 0, "sentences_deduped": 0}
+        separator_cost = count_tokens(self.separator)
+
+        for index, source in enumerate(sources):
+            block, deduped = self._dedupe(source, seen)
+            report["sentences_deduped"] += deduped
+            if not block:
+                report["sources_dropped"] += 1
+                continue
+
+            remaining = self.token_budget - used - (separator_cost if blocks else 0)
+            cost = count_tokens(block)
+            truncated = False
+            if cost > remaining:
+                # The first source is always cut to fit rather than dropped
+                worth_cutting = remaining >= MIN_PARTIAL_TOKENS or not blocks
+                block = truncate_to_tokens(block, remaining) if worth_cutting else ""
+                if not block:
+                    report["sources_dropped"] += len(sources) - index
+                    break
+                cost = count_tokens(block)
+                truncated = True
+
+            used += cost + (separator_cost if blocks else 0)
+            blocks.append(block)
+            report["sources_used"] += 1
+            if truncated:
+                # Budget is exhausted; everything ranked lower is dropped
+                report["sources_truncated"] += 1
+                report["sources_dropped"] += len(sources) - index - 1
+                break
+
+        report["tokens_used"] = used
+        return self.separator.join(blocks), report
+
+    def fit(self, text: str) -> Tuple[str, Dict[str, Any]]:
+        """Clean a single document and cut it to the budget."""
+        return self.build([strip_html(text)])
+
+    @staticmethod
+    def _dedupe(source: str, seen: set) -> Tuple[str, int]:
+        lines = []
+        deduped = 0
+        for line in source.splitlines():
+            kept = []
+            for sentence in split_sentences(line):
+                key = _dedupe_key(sentence)
+                if len(key.split()) >= MIN_DEDUPE_WORDS:
+                    if key in seen:
+                        deduped += 1
+                        continue
+                    seen.add(key)
+                kept.append(sentence)
+            if kept:
+                lines.append(" ".join(kept))
+        return "\n".join(lines), deduped
@@ -0,0 +1,238 @@
+"""
+Hybrid retrieval for the chat engine.
+
+Lexical hits come from the full-text index, semantic hits from an in-memory
+embedding matrix (or FAISS index) of recent verified news. The two rankings
+are merged with reciprocal rank fusion. The query is encoded once and the
+semantic leg is skipped when the latency budget is already spent.
+
+The embedding matrix is kept current outside requests by `warm_index`
+(at startup and after each news cycle in the web process); a request only
+embeds up to RETRIEVAL_REQUEST_ENCODE_ROWS rows that arrived since, and
+none while another refresh is running. Searches never wait for a refresh.
+"""
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from src.database.models import SessionLocal, VerifiedNews
+from src.database.fulltext import search_news
+from src.analysis.embeddings import encode_text, encode_texts
+from src.config.settings import (
+    RETRIEVAL_WINDOW_DAYS, RETRIEVAL_TOP_K, RETRIEVAL_BUDGET_MS, RETRIEVAL_REQUEST_ENCODE_ROWS
+)
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+LEXICAL_WEIGHT = 1.0
+SEMANTIC_WEIGHT = 1.0
+# Cosine similarity below this is noise for MiniLM sentence embeddings
+SEMANTIC_MIN_SCORE = 0.25
+# Brute-force NumPy is faster than building a FAISS index for small matrices
+FAISS_MIN_ROWS = 5000
+
+_FAISS_INITIALIZED = False
+_HAS_FAISS = False
+
+def _check_faiss():
+    global _FAISS_INITIALIZED, _HAS_FAISS
+    if _FAISS_INITIALIZED:
+        return _HAS_FAISS
+
+    try:
+        import faiss
+        _HAS_FAISS = True
+    except Exception:
+        _HAS_FAISS = False
+
+    _FAISS_INITIALIZED = True
+    return _HAS_FAISS
+
+def _embedding_text(title: str, content: Optional[str]) -> str:
+    # Same shape of text the verifier uses for deduplication
+    return (title or "") + " " + (content[:200] if content else "")
+
+class SemanticIndex:
+    """Embedding matrix of verified news published inside a rolling window."""
+
+    def __init__(self, window_days: int = RETRIEVAL_WINDOW_DAYS):
+        self.window_days = window_days
+        self.ids = None
+        self.published = None
+        self.matrix = None
+        self.max_id = 0
+        self._faiss = None
+        # _lock guards the arrays and is only held to swap them; _refresh_lock keeps
+        # two refreshes from encoding the same rows, and is never needed to search
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return 0 if self.ids is None else len(self.ids)
+
+    def refresh(self, session: Session, max_rows: Optional[int] = None, blocking: bool = True) -> int:
+        """
+        Encode rows added since the last refresh and drop expired ones. Returns rows added.
+        With `max_rows`, only the oldest that many new rows are encoded; the next call continues.
+        With `blocking=False`, returns 0 at once if another thread is already refreshing.
+        Searches are not blocked while rows are read and encoded.
+        """
+        import numpy as np
+
+        if not self._refresh_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=self.window_days)
+            query = session.query(
+                VerifiedNews.id, VerifiedNews.title, VerifiedNews.content, VerifiedNews.published_at
+            ).filter(
+                VerifiedNews.id > self.max_id,
+                VerifiedNews.published_at >= cutoff
+            ).order_by(VerifiedNews.id)
+            rows = (query.limit(max_rows) if max_rows is not None else query).all()
+
+            vectors = None
+            if rows:
+                vectors = encode_texts([_embedding_text(r.title, r.content) for r in rows])
+                if vectors is None:
+                    return 0
+
+            with self._lock:
+                # Arrays are replaced, never changed in place, so searches may keep using old ones
+                ids, published, matrix = self.ids, self.published, self.matrix
+                changed = False
+                if rows:
+                    new_ids = np.array([r.id for r in rows], dtype=np.int64)
+                    new_published = np.array([r.published_at for r in rows], dtype="datetime64[s]")
+                    if matrix is None:
+                        ids, published, matrix = new_ids, new_published, vectors
+                    else:
+                        ids = np.concatenate([ids, new_ids])
+                        published = np.concatenate([published, new_published])
+                        matrix = np.vstack([matrix, vectors])
+                    self.max_id = int(new_ids[-1])
+                    changed = True
+
+                if ids is not None:
+                    keep = published >= np.datetime64(cutoff, "s")
+                    if not keep.all():
+                        ids, published, matrix = ids[keep], published[keep], matrix[keep]
+                        changed = True
+
+                if changed:
+                    self.ids, self.published, self.matrix = ids, published, matrix
+                    self._faiss = None
+            return len(rows)
+        finally:
+            self._refresh_lock.release()
+
+    def search(self, query_vector, k: int) -> List[Tuple[int, float]]:
+        """Top-k (news_id, cosine similarity) pairs for a unit query vector."""
+        import numpy as np
+
+        with self._lock:
+            ids, matrix, index = self.ids, self.matrix, self._faiss
+        if matrix is None or len(ids) == 0:
+            return []
+        k = min(k, len(ids))
+
+        if len(ids) >= FAISS_MIN_ROWS and _check_faiss():
+            if index is None:
+                import faiss
+                index = faiss.IndexFlatIP(matrix.shape[1])
+                index.add(matrix)
+                with self._lock:
+                    if self.matrix is matrix:
+                        self._faiss = index
+            scores, positions = index.search(query_vector.reshape(1, -1).astype(np.float32), k)
+            pairs = zip(positions[0], scores[0])
+        else:
+            scores = matrix @ query_vector
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            pairs = ((i, scores[i]) for i in top)
+
+        return [(int(ids[i]), float(s)) for i, s in pairs if i >= 0 and s >= SEMANTIC_MIN_SCORE]
+
+class HybridRetriever:
+    def __init__(self, index: Optional[SemanticIndex] = None, budget_ms: float = RETRIEVAL_BUDGET_MS):
+        self.index = index or SemanticIndex()
+        self.budget_ms = budget_ms
+
+    def encode_query(self, query: str):
+        """Unit vector for the query, or None when no embedding model is available."""
+        if not query or not query.strip():
+            return None
+        return encode_text(query)
+
+    def search(self, session: Session, query: str, k: int = RETRIEVAL_TOP_K,
+               query_embedding=None, mode: str = "hybrid") -> List[Tuple[VerifiedNews, float]]:
+        """
+        Fused top-k news for a query, best first.
+        `mode` is "hybrid", "lexical" or "semantic" (the last two exist for evaluation).
+        """
+        start = time.perf_counter()
+        pool = k * 4
+        fused = {}
+        loaded = {}
+
+        if mode in ("hybrid", "lexical"):
+            for rank, (news, _) in enumerate(search_news(session, query, limit=pool)):
+                fused[news.id] = fused.get(news.id, 0.0) + LEXICAL_WEIGHT / (RRF_K + rank + 1)
+                loaded[news.id] = news
+
+        if mode in ("hybrid", "semantic"):
+            if self._elapsed_ms(start) < self.budget_ms:
+                if query_embedding is None:
+                    query_embedding = self.encode_query(query)
+                if query_embedding is not None and self._elapsed_ms(start) < self.budget_ms:
+                    # Bounded, and skipped while warm_index or another request is refreshing
+                    self.index.refresh(session, max_rows=RETRIEVAL_REQUEST_ENCODE_ROWS, blocking=False)
+                    for rank, (news_id, _) in enumerate(self.index.search(query_embedding, pool)):
+                        fused[news_id] = fused.get(news_id, 0.0) + SEMANTIC_WEIGHT / (RRF_K + rank + 1)
+            else:
+                logger.debug(f"Retrieval budget spent after lexical search, skipping semantic ({self.budget_ms}ms)")
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        missing = [news_id for news_id, _ in ranked if news_id not in loaded]
+        if missing:
+            for news in session.query(VerifiedNews).filter(VerifiedNews.id.in_(missing)).all():
+                loaded[news.id] = news
+
+        logger.debug(f"Retrieved {len(ranked)} articles in {self._elapsed_ms(start):.1f}ms")
+        return [(loaded[news_id], score) for news_id, score in ranked if news_id in loaded]
+
+    @staticmethod
+    def _elapsed_ms(start: float) -> float:
+        return (time.perf_counter() - start) * 1000
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever() -> HybridRetriever:
+    """Process-wide retriever, so the embedding matrix is built once."""
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = HybridRetriever()
+    return _retriever
+
+def warm_index() -> int:
+    """Embed every row the retriever's index is missing. Returns rows added."""
+    db = SessionLocal()
+    try:
+        added = get_retriever().index.refresh(db)
+        if added:
+            logger.info(f"Retrieval index warmed with {added} articles.")
+        return added
+    except Exception as e:
+        logger.warning(f"Retrieval index warm-up failed: {e}")
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,123 @@
+"""
+HTML-to-text normalization for collected articles.
+
+Feed summaries arrive as HTML fragments with inline images, links and
+publisher boilerplate. They are cleaned once at ingestion so embeddings, LLM
+prompts and dashboard payloads all work on plain text. The lead image URL is
+extracted in the same parse.
+"""
+import re
+import html
+import logging
+from typing import Any, Dict, Optional
+
+from src.analysis.prompt_builder import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Elements whose content is never article text
+_DROP_TAGS = ("script", "style", "noscript", "iframe", "form", "button")
+# Elements that end a line of text
+_BLOCK_TAGS = ("p", "br", "div", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+               "blockquote", "figcaption", "tr", "section", "article")
+
+# Publisher boilerplate, matched against each line of cleaned text
+BOILERPLATE_PATTERNS = [
+    # A "Continue reading" line, or a teaser ending the line with an ellipsis; not the phrase mid-sentence
+    re.compile(r"^\s*Continue reading\b.{0,40}$|\s*\bContinue reading\b[^.!?]{0,80}(\.{3}|…)\s*$", re.IGNORECASE),
+    # Same for "Read more" / "Read the full story": a line of its own, or a marker ending a longer line
+    re.compile(r"^\s*Read (the )?(full|more)( story| article)?\s*(\.{3}|…|»|→)?\s*$"
+               r"|\s*\bRead (the )?(full|more)( story| article)?\s*(\.{3}|…|»|→)\s*$", re.IGNORECASE),
+    re.compile(r"\s*The post .+ appeared first on .+$", re.IGNORECASE),
+    re.compile(r"\s*\[\+\d+ chars\]\s*$"),
+    re.compile(r"^\s*(Comments|View comments|Share this( article)?)\s*$", re.IGNORECASE),
+]
+
+_LXML_INITIALIZED = False
+_HAS_LXML = False
+
+def _check_lxml():
+    global _LXML_INITIALIZED, _HAS_LXML
+    if _LXML_INITIALIZED:
+        return _HAS_LXML
+
+    try:
+        import lxml.html
+        _HAS_LXML = True
+    except Exception:
+        _HAS_LXML = False
+
+    _LXML_INITIALIZED = True
+    return _HAS_LXML
+
+def _is_image_url(src: Optional[str]) -> bool:
+    return bool(src) and src.startswith(("http://", "https://")) and "pixel" not in src and "feeds.feedburner" not in src
+
+def _parse_lxml(markup: str):
+    import lxml.html
+    root = lxml.html.fragment_fromstring(markup, create_parent="div")
+
+    image_url = None
+    for img in root.iter("img"):
+        src = img.get("src") or img.get("data-src")
+        if _is_image_url(src):
+            image_url = src
+            break
+
+    for element in list(root.iter(*_DROP_TAGS)):
+        element.drop_tree()
+    for element in root.iter(*_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+
+    return root.text_content(), image_url
+
+def _parse_bs4(markup: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(markup, "html.parser")
+
+    image_url = None
+    for img in soup.find_all("img"):
+        src = img.get("src") or img.get("data-src")
+        if _is_image_url(src):
+            image_url = src
+            break
+
+    for element in soup.find_all(_DROP_TAGS):
+        element.decompose()
+    return soup.get_text("\n"), image_url
+
+def _strip_boilerplate(text: str) -> str:
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t ]+", " ", line).strip()
+        for pattern in BOILERPLATE_PATTERNS:
+            line = pattern.sub("", line).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+def clean_html(markup: Optional[str]) -> Dict[str, Any]:
+    """
+    Convert a feed HTML fragment to plain text.
+    Returns the text, the first usable image URL and the bytes/tokens saved.
+    """
+    markup = markup or ""
+    image_url = None
+
+    if "<" in markup:
+        try:
+            text, image_url = _parse_lxml(markup) if _check_lxml() else _parse_bs4(markup)
+        except Exception as e:
+            # Malformed fragments: drop anything that looks like a tag
+            logger.debug(f"HTML parse failed, using regex fallback: {e}")
+            text = html.unescape(re.sub(r"<[^>]*>", "\n", markup))
+    else:
+        text = html.unescape(markup)
+
+    text = _strip_boilerplate(text)
+    return {
+        "text": text,
+        "image_url": image_url,
+        "bytes_saved": len(markup.encode("utf-8")) - len(text.encode("utf-8")),
+        "tokens_saved": count_tokens(markup) - count_tokens(text)
+    }
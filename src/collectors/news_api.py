@@ -4,6 +4,7 @@ from typing import List, Dict, Any
 from newsapi import NewsApiClient
 from src.config.settings import NEWS_API_KEY
 from src.database.models import SessionLocal, RawNews
+from src.collectors.html_cleaner import clean_html
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ class NewsCollector:
             self.client = None
         else:
             self.client = NewsApiClient(api_key=self.api_key)
+        self.categories = ['business', 'technology', 'science', 'health']
 
     def fetch_recent_news(self, query: str = None, domains: str = None, categories: str = None) -> int:
         """
@@ -25,44 +27,39 @@ class NewsCollector:
             logger.error("NewsAPI client not initialized.")
             return 0
 
-        # Time range: last 24 hours
-        to_date = datetime.utcnow()
-        from_date = to_date - timedelta(hours=24)
-        
+        # We can customize this to fetch top headlines or everything
+        # For this agent, we might want 'everything' for breadth or 'top-headlines' for quality
+        # Let's start with top headlines for major categories
+        return sum(len(self.fetch_category(cat)) for cat in self.categories)
+
+    def fetch_category(self, category: str) -> List[int]:
+        """Fetch top headlines for one category. Returns ids of new RawNews rows."""
+        if not self.client:
+            return []
+
         try:
-            # We can customize this to fetch top headlines or everything
-            # For this agent, we might want 'everything' for breadth or 'top-headlines' for quality
-            # Let's start with top headlines for major categories
-            
-            categories_list = ['business', 'technology', 'science', 'health']
-            all_articles = []
-            
-            for cat in categories_list:
-                response = self.client.get_top_headlines(
-                    category=cat,
-                    language='en',
-                    page_size=100
-                )
-                if response['status'] == 'ok':
-                    articles = response.get('articles', [])
-                    # Tag them with category for initial filtering context (optional)
-                    for a in articles:
-                        a['_initial_category'] = cat
-                    all_articles.extend(articles)
-            
-            # Also fetch general tech/AI specific via 'everything' endpoint if needed
-            # But let's stick to headlines to save API calls for now
-            
-            saved_count = self._save_articles(all_articles)
-            return saved_count
+            response = self.client.get_top_headlines(
+                category=category,
+                language='en',
+                page_size=100
+            )
+            if response['status'] != 'ok':
+                return []
+            articles = response.get('articles', [])
+            # Tag them with category for initial filtering context (optional)
+            for a in articles:
+                a['_initial_category'] = category
+            return self._save_articles(articles)
             
         except Exception as e:
             logger.error(f"Error fetching news: {e}")
-            return 0
+            return []
 
-    def _save_articles(self, articles: List[Dict[str, Any]]) -> int:
+    def _save_articles(self, articles: List[Dict[str, Any]]) -> List[int]:
+        """Insert new articles. Returns the ids of the rows created."""
         session = SessionLocal()
-        count = 0
+        added = []
+        bytes_saved = tokens_saved = 0
         try:
             for article in articles:
                 url = article.get('url')
@@ -85,27 +82,38 @@ class NewsCollector:
                 else:
                     pub_dt = datetime.utcnow()
 
+                # NewsAPI content carries HTML fragments and a "[+N chars]" suffix
+                description = clean_html(article.get('description'))
+                content = clean_html(article.get('content'))
+                bytes_saved += description["bytes_saved"] + content["bytes_saved"]
+                tokens_saved += description["tokens_saved"] + content["tokens_saved"]
+
                 raw_news = RawNews(
                     source_id=article.get('source', {}).get('id'),
                     source_name=article.get('source', {}).get('name'),
                     author=article.get('author'),
                     title=article.get('title'),
-                    description=article.get('description'),
+                    description=description["text"] or None,
                     url=url,
-                    url_to_image=article.get('urlToImage'),
+                    url_to_image=article.get('urlToImage') or content["image_url"],
                     published_at=pub_dt,
-                    content=article.get('content')
+                    content=content["text"] or None
                 )
                 session.add(raw_news)
-                count += 1
+                added.append(raw_news)
             
+            session.flush()
+            saved = [r.id for r in added]
             session.commit()
+            count = len(saved)
             logger.info(f"Saved {count} new articles.")
-            return count
+            if count:
+                logger.info(f"HTML cleanup saved {bytes_saved // count} bytes / {tokens_saved // count} tokens per article.")
+            return saved
         except Exception as e:
             logger.error(f"Database error: {e}")
             session.rollback()
-            return 0
+            return []
         finally:
             session.close()
 
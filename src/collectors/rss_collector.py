@@ -2,8 +2,9 @@ import feedparser
 import logging
 from datetime import datetime, timedelta
 from dateutil import parser
-from typing import List, Dict, Any
-from src.database.models import SessionLocal, RawNews
+from typing import List, Dict, Any, Optional
+from src.database.models import SessionLocal, RawNews, FeedState
+from src.collectors.html_cleaner import clean_html
 
 logger = logging.getLogger(__name__)
 
@@ -81,50 +82,99 @@ class RSSCollector:
         Returns count of new articles saved.
         """
         total_saved = 0
-        
         for source_name, feed_url in self.feeds.items():
-            try:
-                # Parse the feed
-                feed = feedparser.parse(feed_url)
+            total_saved += len(self.fetch_feed(source_name, feed_url))
+        return total_saved
+
+    def fetch_feed(self, source_name: str, feed_url: str) -> List[int]:
+        """Fetch one feed's items from the last 24 hours. Returns ids of new RawNews rows."""
+        try:
+            # Conditional GET: an unchanged feed answers 304 with no body to parse
+            state = self._load_state(source_name)
+            feed = feedparser.parse(feed_url, etag=state.get("etag"), modified=state.get("modified"))
+            if feed.get("status") == 304:
+                logger.debug(f"{source_name} not modified since last fetch; skipping.")
+                self._save_state(source_name, feed, changed=False)
+                return []
+
+            # Check for parsing errors
+            if feed.bozo:
+                logger.warning(f"Potential issue parsing feed {source_name}: {feed.bozo_exception}")
+
+            # Process entries
+            articles = []
+            bytes_saved = tokens_saved = 0
+            for entry in feed.entries:
+                # Extract published date
+                published_at = self._parse_date(entry)
                 
-                # Check for parsing errors
-                if feed.bozo:
-                    logger.warning(f"Potential issue parsing feed {source_name}: {feed.bozo_exception}")
-
-                # Process entries
-                articles = []
-                for entry in feed.entries:
-                    # Extract published date
-                    published_at = self._parse_date(entry)
+                # Filter by last 24h
+                if self._is_recent(published_at):
+                    # Plain text and the inline image come from a single parse
+                    cleaned = clean_html(entry.get("summary", "") or entry.get("description", ""))
+                    bytes_saved += cleaned["bytes_saved"]
+                    tokens_saved += cleaned["tokens_saved"]
+
+                    # Extract Image
+                    image_url = self._extract_image(entry, cleaned["image_url"])
                     
-                    # Filter by last 24h
-                    if self._is_recent(published_at):
-                        # Extract Image
-                        image_url = self._extract_image(entry)
-                        
-                        articles.append({
-                            "source_id": source_name,
-                            "source_name": feed.feed.get("title", source_name),
-                            "title": entry.get("title"),
-                            "url": entry.get("link"),
-                            "content": entry.get("summary", "") or entry.get("description", ""),
-                            "author": entry.get("author", "Unknown"),
-                            "published_at": published_at,
-                            "url_to_image": image_url
-                        })
-                
-                if articles:
-                   saved = self._save_articles(articles)
-                   total_saved += saved
-                   logger.info(f"Fetched {len(articles)} recent items from {source_name}, saved {saved} new.")
-                
-            except Exception as e:
-                logger.error(f"Error fetching RSS feed {source_name}: {e}")
-                continue
-                
-        return total_saved
+                    articles.append({
+                        "source_id": source_name,
+                        "source_name": feed.feed.get("title", source_name),
+                        "title": entry.get("title"),
+                        "url": entry.get("link"),
+                        "content": cleaned["text"],
+                        "author": entry.get("author", "Unknown"),
+                        "published_at": published_at,
+                        "url_to_image": image_url
+                    })
+            
+            if not articles:
+                self._save_state(source_name, feed, changed=False)
+                return []
 
-    def _extract_image(self, entry) -> str:
+            saved = self._save_articles(articles)
+            self._save_state(source_name, feed, changed=bool(saved))
+            logger.info(
+                f"Fetched {len(articles)} recent items from {source_name}, saved {len(saved)} new. "
+                f"HTML cleanup saved {bytes_saved // len(articles)} bytes / "
+                f"{tokens_saved // len(articles)} tokens per article."
+            )
+            return saved
+            
+        except Exception as e:
+            logger.error(f"Error fetching RSS feed {source_name}: {e}")
+            return []
+
+    def _load_state(self, source_name: str) -> Dict[str, Optional[str]]:
+        session = SessionLocal()
+        try:
+            state = session.get(FeedState, f"rss:{source_name}")
+            return {"etag": state.etag, "modified": state.modified} if state else {}
+        finally:
+            session.close()
+
+    def _save_state(self, source_name: str, feed, changed: bool):
+        """Remember the feed's validators; a 304 keeps the previous ones."""
+        session = SessionLocal()
+        try:
+            key = f"rss:{source_name}"
+            state = session.get(FeedState, key) or FeedState(source=key)
+            if feed.get("status") != 304:
+                state.etag = feed.get("etag")
+                state.modified = feed.get("modified")
+            state.checked_at = datetime.utcnow()
+            if changed:
+                state.changed_at = state.checked_at
+            session.add(state)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Could not save fetch state for {source_name}: {e}")
+        finally:
+            session.close()
+
+    def _extract_image(self, entry, summary_image: str = None) -> str:
         """Try to find an image URL in common RSS fields"""
         # 1. media_content
         if 'media_content' in entry:
@@ -142,19 +192,8 @@ class RSSCollector:
                 if link.get('rel') == 'enclosure' and link.get('type', '').startswith('image'):
                     return link.get('href')
                     
-        # 4. Parse summary HTML (Basic check)
-        summary = entry.get("summary", "") or entry.get("description", "")
-        if '<img' in summary:
-            # Very naive extraction, can be improved with BeautifulSoup if needed
-            try:
-                start = summary.find('src="') + 5
-                end = summary.find('"', start)
-                if start > 4 and end > start:
-                    return summary[start:end]
-            except:
-                pass
-                
-        return None
+        # 4. First <img> in the summary HTML, found by clean_html
+        return summary_image
 
     def _parse_date(self, entry) -> datetime:
         """Attempt to parse date from common RSS fields"""
@@ -186,18 +225,17 @@ class RSSCollector:
             date_obj = date_obj.replace(tzinfo=None)
         return date_obj > cutoff
 
-    def _save_articles(self, articles: List[Dict[str, Any]]) -> int:
+    def _save_articles(self, articles: List[Dict[str, Any]]) -> List[int]:
+        """Insert new articles. Returns the ids of the rows created."""
         session = SessionLocal()
-        count = 0
+        saved = []
         try:
+            # One lookup for the whole feed; most items were seen on earlier fetches
+            urls = [a['url'] for a in articles if a.get('url')]
+            known = {u for (u,) in session.query(RawNews.url).filter(RawNews.url.in_(urls)).all()} if urls else set()
             for article in articles:
                 url = article.get('url')
-                if not url:
-                    continue
-                
-                # Check for duplicates - skip silently
-                exists = session.query(RawNews).filter(RawNews.url == url).first()
-                if exists:
+                if not url or url in known:
                     continue
                 
                 try:
@@ -215,19 +253,20 @@ class RSSCollector:
                         content=article['content']
                     )
                     session.add(raw_news)
-                    session.flush() # Flush to catch integrity errors early
-                    count += 1
+                    # Commit per row: feeds are saved concurrently and a URL
+                    # collision must only roll back its own row
+                    session.commit()
+                    saved.append(raw_news.id)
                 except Exception as e:
                     session.rollback() # Rollback the failed insertion
                     # logger.debug(f"Skipping duplicate or invalid article: {url}")
                     continue
             
-            session.commit()
-            return count
+            return saved
         except Exception as e:
             logger.error(f"Database error saving RSS: {e}")
             session.rollback()
-            return 0
+            return []
         finally:
             session.close()
 
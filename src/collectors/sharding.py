@@ -0,0 +1,169 @@
+"""
+Sharded feed collection.
+
+With COLLECTOR_SHARDING on, feeds are polled by `python main.py collector`
+processes instead of the news cycle. Each collector holds a lease named
+`collector:<node>` (see src/scheduler/lease.py); the live leases are the
+membership. Feed keys are placed on a consistent-hash ring of the members
+(with bounded loads), so each node polls only its share, and a node joining
+or leaving moves only a fraction of the feeds. Before polling, a node also takes the
+feed's slot for the current interval in `feed_states`, so a feed is polled
+once per interval even while two nodes briefly disagree on membership.
+"""
+import bisect
+import hashlib
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from src.config.settings import COLLECTOR_INTERVAL_SECONDS, PIPELINE_COLLECT_WORKERS
+from src.database.models import SessionLocal, SchedulerLease, FeedState
+from src.scheduler.lease import Lease, default_holder
+
+MEMBER_PREFIX = "collector:"
+# Virtual points per node; more points even out the shares
+RING_REPLICAS = 64
+# Most feeds a node takes, relative to an even split
+LOAD_FACTOR = 1.25
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str], replicas: int = RING_REPLICAS):
+        self.nodes = sorted(set(nodes))
+        self._points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [h for h, _ in self._points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[i][1]
+
+    def assign(self, keys: Iterable[str], load_factor: float = LOAD_FACTOR) -> Dict[str, List[str]]:
+        """
+        Keys grouped by owning node. With only a few dozen feeds the plain ring
+        is lumpy, so each node takes at most `load_factor` times its fair share
+        and overflow moves on to the next node clockwise (bounded loads).
+        """
+        keys = sorted(set(keys))
+        owners = {node: [] for node in self.nodes}
+        if not self.nodes:
+            return owners
+        capacity = math.ceil(len(keys) * load_factor / len(self.nodes))
+        for key in keys:
+            i = bisect.bisect(self._hashes, _hash(key))
+            while True:
+                node = self._points[i % len(self._points)][1]
+                if len(owners[node]) < capacity:
+                    owners[node].append(key)
+                    break
+                i += 1
+        return owners
+
+def collection_tasks(api_collector, rss_collector) -> Dict[str, Callable[[], List[int]]]:
+    """One task per feed and NewsAPI category, keyed by a stable feed key."""
+    tasks = {}
+    if api_collector.client:
+        for cat in api_collector.categories:
+            tasks[f"newsapi:{cat}"] = lambda cat=cat: api_collector.fetch_category(cat)
+    for name, url in rss_collector.feeds.items():
+        tasks[f"rss:{name}"] = lambda name=name, url=url: rss_collector.fetch_feed(name, url)
+    return tasks
+
+def live_members() -> List[str]:
+    """Nodes whose collector lease is still being renewed."""
+    db = SessionLocal()
+    try:
+        return sorted(holder for (holder,) in db.query(SchedulerLease.holder).filter(
+            SchedulerLease.name.like(f"{MEMBER_PREFIX}%"),
+            SchedulerLease.holder != None,
+            SchedulerLease.expires_at > datetime.utcnow()
+        ).all())
+    finally:
+        db.close()
+
+def take_poll_slot(key: str, interval: float = COLLECTOR_INTERVAL_SECONDS) -> bool:
+    """True if no node has polled `key` within the last half interval; marks it polled now."""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(FeedState)
+            .where(FeedState.source == key,
+                   or_(FeedState.polled_at == None, FeedState.polled_at < now - timedelta(seconds=interval / 2)))
+            .values(polled_at=now)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return True
+        if db.get(FeedState, key) is not None:
+            return False
+        db.add(FeedState(source=key, polled_at=now))
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another node created the row first
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+class ShardedCollector:
+    """Polls this node's share of the feeds every `interval` seconds until stopped."""
+
+    def __init__(self, interval: float = COLLECTOR_INTERVAL_SECONDS, node_id: Optional[str] = None):
+        from src.collectors.news_api import NewsCollector
+        from src.collectors.rss_collector import RSSCollector
+
+        self.interval = interval
+        self.node_id = node_id or default_holder()
+        self.lease = Lease(f"{MEMBER_PREFIX}{self.node_id}", holder=self.node_id)
+        self.tasks = collection_tasks(NewsCollector(), RSSCollector())
+        self._stop = threading.Event()
+        self._thread = None
+
+    def owned(self) -> List[str]:
+        members = live_members()
+        if self.node_id not in members:
+            return []
+        return HashRing(members).assign(self.tasks).get(self.node_id, [])
+
+    def run_once(self) -> Dict[str, int]:
+        """Poll the feeds this node owns. Returns new articles per polled feed."""
+        keys = [key for key in self.owned() if take_poll_slot(key, self.interval)]
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=PIPELINE_COLLECT_WORKERS) as pool:
+            counts = dict(zip(keys, (len(ids) for ids in pool.map(lambda key: self.tasks[key](), keys))))
+        logger.info(f"Collector {self.node_id} polled {len(keys)}/{len(self.tasks)} feeds, "
+                    f"{sum(counts.values())} new articles.")
+        return counts
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Collector {self.node_id} round failed: {e}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.lease.start_heartbeat()
+        self._thread = threading.Thread(target=self._loop, name="collector", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling and leave the ring so the other nodes take over at once."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.lease.release()
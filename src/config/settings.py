@@ -34,9 +34,53 @@ VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/news.db")
 VECTOR_DB_PATH = DATA_DIR / "vector_store.index"
+# SQLite profile (see src/database/engine.py)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", 256))
+# Postgres profile
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000))
+
+# Retention: older rows move to compressed files under ARCHIVE_DIR
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 30))
+DIGEST_RETENTION_DAYS = int(os.getenv("DIGEST_RETENTION_DAYS", 90))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 7))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", DATA_DIR / "archive"))
 
 # Scheduling
 SCHEDULE_TIME = os.getenv("SCHEDULE_TIME", "06:00")
+# "embedded": the web process also runs the scheduler (single-process deploys).
+# "worker": the web process only serves; run `python main.py worker` separately.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "embedded")
+
+# Leases held in the database so only one process runs scheduled jobs
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", 60))
+
+# Background Job Queue
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 5))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+# News Cycle Pipeline
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 100))
+PIPELINE_COLLECT_WORKERS = int(os.getenv("PIPELINE_COLLECT_WORKERS", 8))
+PIPELINE_ANALYZE_WORKERS = int(os.getenv("PIPELINE_ANALYZE_WORKERS", 4))
+PIPELINE_VERIFY_BATCH = int(os.getenv("PIPELINE_VERIFY_BATCH", 25))
+# Seconds between digest updates while articles are still being analyzed
+PIPELINE_PUBLISH_INTERVAL = float(os.getenv("PIPELINE_PUBLISH_INTERVAL", 30))
+# How long a worker may hold an article it is verifying or analyzing before others may take it
+PIPELINE_CLAIM_SECONDS = float(os.getenv("PIPELINE_CLAIM_SECONDS", 300))
+# Minutes between hand-backs of outage fallback analyses to the LLM
+REANALYZE_INTERVAL_MINUTES = float(os.getenv("REANALYZE_INTERVAL_MINUTES", 30))
+
+# Sharded Collection: feeds are polled by `python main.py collector` nodes
+# instead of the news cycle, each node taking its share of a hash ring
+COLLECTOR_SHARDING = os.getenv("COLLECTOR_SHARDING", "false").lower() == "true"
+COLLECTOR_INTERVAL_SECONDS = float(os.getenv("COLLECTOR_INTERVAL_SECONDS", 120))
 
 # News Settings
 NEWS_SOURCES_RSS = [
@@ -51,5 +95,36 @@ NEWS_SOURCES_RSS = [
 MIN_CREDIBILITY_SCORE = 0.6
 SIMILARITY_THRESHOLD = 0.85
 
+# Digest Settings
+DIGEST_WINDOW_HOURS = int(os.getenv("DIGEST_WINDOW_HOURS", 24))
+# How digest content is stored: json, json+zlib, msgpack or msgpack+zlib
+DIGEST_STORAGE_FORMAT = os.getenv("DIGEST_STORAGE_FORMAT", "json")
+
+# Chat Retrieval Settings
+RETRIEVAL_WINDOW_DAYS = int(os.getenv("RETRIEVAL_WINDOW_DAYS", 7))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 5))
+RETRIEVAL_BUDGET_MS = float(os.getenv("RETRIEVAL_BUDGET_MS", 250))
+# New rows a chat request may embed itself; the rest waits for warm_index()
+RETRIEVAL_REQUEST_ENCODE_ROWS = int(os.getenv("RETRIEVAL_REQUEST_ENCODE_ROWS", 32))
+
+# Prompt Token Budgets
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", 1500))
+ANALYSIS_CONTENT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_CONTENT_TOKEN_BUDGET", 600))
+
+# Chat Answer Cache
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 512))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.92))
+
+# Personalized Digests
+PERSONAL_DIGEST_SIZE = int(os.getenv("PERSONAL_DIGEST_SIZE", 20))
+# Shared ranked candidates each personal digest is drawn from
+PERSONAL_CANDIDATES = int(os.getenv("PERSONAL_CANDIDATES", 500))
+
+# Dashboard Page Cache
+# How long the known latest digest version is trusted before the database is asked again
+DASHBOARD_CACHE_CHECK_SECONDS = float(os.getenv("DASHBOARD_CACHE_CHECK_SECONDS", 15))
+DASHBOARD_MAX_AGE_SECONDS = int(os.getenv("DASHBOARD_MAX_AGE_SECONDS", 0)) # Browser freshness; 0 revalidates on every load
+
 # Web Settings
 PORT = int(os.getenv("PORT", 8000))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 2))
@@ -0,0 +1,60 @@
+"""
+Async sessions for the web routes.
+
+Routes whose work is database I/O await their queries on an AsyncEngine
+(aiosqlite or asyncpg, same profile as the sync engine, see engine.py). A
+request waiting on the database then parks on the event loop instead of
+holding one of the threadpool's workers, so concurrent requests are no
+longer capped by the threadpool size. Sync helpers shared with the pipeline
+run inside the async session with `await db.run_sync(fn, ...)`.
+
+The pipeline, scheduler and CLI keep the sync engine in models.py. Routes
+that are mostly CPU work (chat retrieval, personalization) or file reads
+(the cold archive) also stay on the sync session in the threadpool.
+
+The engine is created on first use, so processes that never serve requests
+do not need the async drivers.
+"""
+import logging
+from typing import AsyncIterator
+
+from src.config.settings import DATABASE_URL
+from src.database.engine import make_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Global flag to avoid repeated failed import attempts
+_ASYNC_INITIALIZED = False
+_HAS_ASYNC = False
+
+async_engine = None
+AsyncSessionLocal = None
+
+def _check_async():
+    global _ASYNC_INITIALIZED, _HAS_ASYNC, async_engine, AsyncSessionLocal
+    if _ASYNC_INITIALIZED:
+        return _HAS_ASYNC
+
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        async_engine = make_async_engine(DATABASE_URL)
+        # Attributes stay readable after commit; lazy reloads are not possible in async code
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        _HAS_ASYNC = True
+    except Exception as e:
+        logger.error(f"Async database driver unavailable (install aiosqlite or asyncpg): {e}")
+        _HAS_ASYNC = False
+
+    _ASYNC_INITIALIZED = True
+    return _HAS_ASYNC
+
+async def get_async_db() -> AsyncIterator:
+    """FastAPI dependency: one AsyncSession per request."""
+    if not _check_async():
+        raise RuntimeError("Async database driver unavailable; install aiosqlite or asyncpg.")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
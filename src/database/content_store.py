@@ -0,0 +1,59 @@
+"""
+Content-addressed, compressed storage for article text.
+
+Article bodies and descriptions live in `article_contents`, keyed by the
+SHA-256 of their text, instead of on the raw_news and verified_news rows
+that every listing, dedup and digest query scans. A verified article and the
+raw article it was promoted from point at the same row, so each body is
+stored once.
+
+On SQLite the text is zlib-compressed by `CompressedText`; the same codec is
+registered as the SQL function `article_text()` so the full-text triggers
+can index it. On Postgres the column is plain text, which TOAST already
+compresses out of line, so tsvector triggers can read it directly.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, Text, TypeDecorator
+
+ZLIB_LEVEL = 6
+
+# SQL function, registered on SQLite connections, that decompresses a stored body
+SQLITE_TEXT_FUNCTION = "article_text"
+
+def content_hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+def compress_text(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"), ZLIB_LEVEL)
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+def register_sqlite_functions(dbapi_connection):
+    """Make `article_text(body)` available to triggers and queries on this connection."""
+    dbapi_connection.create_function(SQLITE_TEXT_FUNCTION, 1, decompress_text, deterministic=True)
+
+class CompressedText(TypeDecorator):
+    """Text stored as zlib bytes, except on Postgres where TOAST compresses it."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return decompress_text(value)
@@ -0,0 +1,103 @@
+"""
+Engine profiles per database backend.
+
+SQLite: WAL lets dashboard reads proceed while the pipeline writes (readers
+no longer wait on the writer's lock), synchronous=NORMAL is durable under
+WAL except for the last transactions on power loss, and busy_timeout makes a
+second writer wait instead of failing with "database is locked". The pragmas
+are connection-level, so they are applied on every new connection.
+
+Postgres: a bounded pool with pre-ping (hosted databases and proxies drop
+idle connections) and a server-side statement timeout so one slow query
+cannot hold a worker forever.
+
+`make_async_engine` applies the same profile to the async drivers
+(aiosqlite, asyncpg) used by the web routes.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+from src.config.settings import (
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SECONDS, DB_STATEMENT_TIMEOUT_MS
+)
+from src.database.content_store import register_sqlite_functions
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def _install_sqlite_pragmas(engine: Engine, url):
+    in_memory = url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        # Negative values are KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.close()
+        # Used by the full-text triggers to index compressed article text
+        register_sqlite_functions(dbapi_connection)
+
+def _sqlite_engine(url, **kwargs) -> Engine:
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+    _install_sqlite_pragmas(engine, url)
+    return engine
+
+def _postgres_engine(url, **kwargs) -> Engine:
+    connect_args = {}
+    if url.get_driver_name() in ("psycopg2", "psycopg"):
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        connect_args=connect_args,
+        **kwargs
+    )
+
+def _parse_url(database_url: str):
+    if database_url.startswith("postgres://"):
+        # Scheme used by Heroku-style providers; SQLAlchemy only knows "postgresql"
+        database_url = "postgresql://" + database_url[len("postgres://"):]
+    return make_url(database_url)
+
+def make_engine(database_url: str, **kwargs) -> Engine:
+    """Create an engine tuned for the backend in `database_url`."""
+    url = _parse_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return _sqlite_engine(url, **kwargs)
+    if backend == "postgresql":
+        return _postgres_engine(url, **kwargs)
+    return create_engine(url, **kwargs)
+
+def make_async_engine(database_url: str, **kwargs):
+    """Create an AsyncEngine for `database_url`, switched to its backend's async driver."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = _parse_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == "sqlite":
+        engine = create_async_engine(url, **kwargs)
+        # Pool events fire on the sync engine behind the async facade
+        _install_sqlite_pragmas(engine.sync_engine, url)
+        return engine
+    if backend == "postgresql":
+        return create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE_SECONDS,
+            connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}},
+            **kwargs
+        )
+    return create_async_engine(url, **kwargs)
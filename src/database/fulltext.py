@@ -0,0 +1,255 @@
+"""
+Full-text index over verified news.
+
+SQLite uses a contentless FTS5 table kept in sync by triggers and ranked
+with bm25(). Postgres uses a trigger-maintained, weighted tsvector column
+with a GIN index ranked with ts_rank_cd(). The article body is read from
+article_contents in both cases. Both are created idempotently by
+`install_fulltext_index`, which `init_db` calls on startup.
+"""
+import re
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import String, func, or_, select, text, type_coerce
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+
+from src.database.models import VerifiedNews, ArticleContent
+from src.database.content_store import SQLITE_TEXT_FUNCTION
+from src.utils.text import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "verified_news_fts"
+MAX_QUERY_TERMS = 12
+
+# Column weights: a hit in the title counts far more than one in the body.
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+SUMMARY_WEIGHT = 4.0
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Keyed by engine URL: which index backend is installed ("sqlite", "postgresql" or None)
+_BACKENDS = {}
+
+# Article text is compressed in article_contents; the triggers index it
+# through article_text() (see src/database/content_store.py)
+_BODY_OF = "(SELECT {fn}(body) FROM article_contents WHERE hash = {row}.content_hash)"
+_NEW_BODY = _BODY_OF.format(fn=SQLITE_TEXT_FUNCTION, row="new")
+_OLD_BODY = _BODY_OF.format(fn=SQLITE_TEXT_FUNCTION, row="old")
+
+_SQLITE_DDL = [
+    # Contentless: the index keeps no copy of the text it was built from
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, summary_bullets,
+        content='',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON verified_news BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, summary_bullets)
+        VALUES (new.id, new.title, {_NEW_BODY}, new.summary_bullets);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON verified_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, summary_bullets)
+        VALUES ('delete', old.id, old.title, {_OLD_BODY}, old.summary_bullets);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content_hash, summary_bullets ON verified_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, summary_bullets)
+        VALUES ('delete', old.id, old.title, {_OLD_BODY}, old.summary_bullets);
+        INSERT INTO {FTS_TABLE}(rowid, title, content, summary_bullets)
+        VALUES (new.id, new.title, {_NEW_BODY}, new.summary_bullets);
+    END
+    """,
+]
+
+# Contentless tables cannot 'rebuild'; rows written before the triggers are indexed with this
+_SQLITE_BACKFILL = f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, content, summary_bullets)
+    SELECT v.id, v.title, {SQLITE_TEXT_FUNCTION}(c.body), v.summary_bullets
+    FROM verified_news v LEFT JOIN article_contents c ON c.hash = v.content_hash
+"""
+
+# A generated column cannot read article_contents, so a trigger keeps the vector current
+_POSTGRES_DDL = [
+    "ALTER TABLE verified_news ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION verified_news_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.summary_bullets::text, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT body FROM article_contents WHERE hash = NEW.content_hash), '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS verified_news_search_vector_trg ON verified_news",
+    """
+    CREATE TRIGGER verified_news_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, summary_bullets, content_hash ON verified_news
+    FOR EACH ROW EXECUTE FUNCTION verified_news_search_vector()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_verified_news_search_vector ON verified_news USING GIN (search_vector)",
+]
+
+# Fires the trigger for rows written before it existed
+_POSTGRES_BACKFILL = "UPDATE verified_news SET title = title WHERE search_vector IS NULL"
+
+def tokenize_query(query: str) -> List[str]:
+    """Lowercase, split on non-word characters and drop stopwords and duplicates."""
+    terms = []
+    for token in _TOKEN_RE.findall((query or "").lower()):
+        if len(token) < 2 or token in STOPWORDS or token in terms:
+            continue
+        terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
+def install_fulltext_index(engine: Engine) -> Optional[str]:
+    """Create the full-text index for this engine's backend if it is missing."""
+    backend = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if backend == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first()
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index rows that were written before the triggers existed
+                    conn.execute(text(_SQLITE_BACKFILL))
+                    logger.info("Built SQLite FTS5 index for verified news.")
+            elif backend == "postgresql":
+                for statement in _POSTGRES_DDL:
+                    conn.execute(text(statement))
+                conn.execute(text(_POSTGRES_BACKFILL))
+            else:
+                logger.warning(f"No full-text index support for '{backend}', search will use LIKE.")
+                backend = None
+    except Exception as e:
+        # e.g. an SQLite build without FTS5
+        logger.warning(f"Full-text index unavailable, search will use LIKE: {e}")
+        backend = None
+
+    _BACKENDS[str(engine.url)] = backend
+    return backend
+
+def _backend_for(session: Session) -> Optional[str]:
+    engine = session.get_bind()
+    key = str(engine.url)
+    if key not in _BACKENDS:
+        # Processes that never ran init_db (e.g. serverless) detect the index lazily
+        backend = engine.dialect.name
+        try:
+            if backend == "sqlite":
+                found = session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first()
+            elif backend == "postgresql":
+                found = session.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'verified_news' AND column_name = 'search_vector'"
+                )).first()
+            else:
+                found = None
+        except Exception:
+            found = None
+        _BACKENDS[key] = backend if found else None
+    return _BACKENDS[key]
+
+def _ranked_ids(session: Session, backend: str, terms: List[str], category: Optional[str],
+                since: Optional[datetime], until: Optional[datetime], limit: int) -> List[Tuple[int, float]]:
+    params = {"limit": limit}
+    filters = []
+    if category:
+        filters.append("v.category = :category")
+        params["category"] = category
+    if since:
+        filters.append("v.published_at >= :since")
+        params["since"] = since
+    if until:
+        filters.append("v.published_at < :until")
+        params["until"] = until
+    extra = "".join(f" AND {f}" for f in filters)
+
+    if backend == "sqlite":
+        # Quoting each term keeps user input out of the FTS5 query syntax
+        params["match"] = " OR ".join(f'"{t}"' for t in terms)
+        sql = f"""
+            SELECT v.id, bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CONTENT_WEIGHT}, {SUMMARY_WEIGHT}) AS rank
+            FROM {FTS_TABLE} JOIN verified_news v ON v.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match{extra}
+            ORDER BY rank
+            LIMIT :limit
+        """
+        # bm25() is lower-is-better; flip it so callers always sort descending
+        return [(row[0], -row[1]) for row in session.execute(text(sql), params)]
+
+    params["tsquery"] = " | ".join(terms)
+    sql = f"""
+        SELECT v.id, ts_rank_cd(v.search_vector, q) AS rank
+        FROM verified_news v, to_tsquery('english', :tsquery) q
+        WHERE v.search_vector @@ q{extra}
+        ORDER BY rank DESC
+        LIMIT :limit
+    """
+    return [(row[0], row[1]) for row in session.execute(text(sql), params)]
+
+def _body_text(session: Session):
+    """Article body as a plain string expression, for LIKE matching."""
+    body = ArticleContent.body
+    if session.get_bind().dialect.name == "sqlite":
+        body = getattr(func, SQLITE_TEXT_FUNCTION)(body)
+    return select(type_coerce(body, String)).where(
+        ArticleContent.hash == VerifiedNews.content_hash
+    ).scalar_subquery()
+
+def search_news(session: Session, query: str, category: Optional[str] = None,
+                since: Optional[datetime] = None, until: Optional[datetime] = None,
+                limit: int = 20, with_source: bool = False) -> List[Tuple[VerifiedNews, float]]:
+    """
+    Ranked search over title, content and summary bullets.
+    Returns (news, score) pairs, best first.
+    """
+    terms = tokenize_query(query)
+    if not terms:
+        return []
+
+    options = [selectinload(VerifiedNews.raw_news)] if with_source else []
+    backend = _backend_for(session)
+
+    if backend is None:
+        # Unranked LIKE scan, only used when no index could be installed
+        body = _body_text(session)
+        filters = [VerifiedNews.title.contains(t) | body.contains(t) for t in terms]
+        q = session.query(VerifiedNews).options(*options).filter(or_(*filters))
+        if category:
+            q = q.filter(VerifiedNews.category == category)
+        if since:
+            q = q.filter(VerifiedNews.published_at >= since)
+        if until:
+            q = q.filter(VerifiedNews.published_at < until)
+        rows = q.order_by(VerifiedNews.published_at.desc()).limit(limit).all()
+        return [(n, 0.0) for n in rows]
+
+    ranked = _ranked_ids(session, backend, terms, category, since, until, limit)
+    if not ranked:
+        return []
+
+    rows = session.query(VerifiedNews).options(*options).filter(
+        VerifiedNews.id.in_([news_id for news_id, _ in ranked])
+    ).all()
+    by_id = {n.id: n for n in rows}
+    return [(by_id[news_id], score) for news_id, score in ranked if news_id in by_id]
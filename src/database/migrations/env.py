@@ -0,0 +1,69 @@
+"""
+Alembic environment.
+
+Runs against the application's engine (DATABASE_URL and its profile), or
+against the connection passed in `config.attributes["connection"]` by
+`init_db`. The full-text objects managed by src/database/fulltext.py are
+left out of autogenerate.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import text
+
+from src.database.models import Base, engine
+
+config = context.config
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Arbitrary key for the Postgres advisory lock that serializes concurrent upgrades
+MIGRATION_LOCK_ID = 726_142_001
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith("verified_news_fts"):
+        return False
+    if type_ == "column" and name == "search_vector":
+        return False
+    return True
+
+def _configure(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite cannot ALTER most things in place; batch mode copies the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+def run_migrations_offline():
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _run(connection):
+    _configure(connection)
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})"))
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.connect() as connection:
+        _run(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,220 @@
+"""baseline schema
+
+The schema as it stood when migrations were introduced. Databases created
+earlier by `Base.metadata.create_all` are adopted rather than recreated:
+missing tables are created, columns added since then are appended and
+missing indexes built, so any older database reaches the same baseline.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 23:24:12.779083
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _tables(metadata: sa.MetaData) -> List[sa.Table]:
+    """Baseline tables in dependency order."""
+    return [
+        sa.Table(
+            'daily_digests', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=True),
+            sa.Column('content_json', sa.JSON(), nullable=True),
+            sa.Column('content_blob', sa.LargeBinary(), nullable=True),
+            sa.Column('content_format', sa.String(), nullable=True),
+            sa.Column('is_published', sa.Boolean(), nullable=True),
+            sa.Column('edition_date', sa.Date(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('source_watermark', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_daily_digests_edition_date', 'edition_date', unique=True),
+            sa.Index('ix_daily_digests_id', 'id')
+        ),
+        sa.Table(
+            'feed_states', metadata,
+            sa.Column('source', sa.String(), nullable=False),
+            sa.Column('etag', sa.String(), nullable=True),
+            sa.Column('modified', sa.String(), nullable=True),
+            sa.Column('checked_at', sa.DateTime(), nullable=True),
+            sa.Column('changed_at', sa.DateTime(), nullable=True),
+            sa.Column('polled_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('source')
+        ),
+        sa.Table(
+            'jobs', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(), nullable=True),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('payload', sa.JSON(), nullable=True),
+            sa.Column('result', sa.JSON(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('max_attempts', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('run_after', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('lease_owner', sa.String(), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_jobs_id', 'id'),
+            sa.Index('ix_jobs_kind', 'kind'),
+            sa.Index('ix_jobs_status', 'status')
+        ),
+        sa.Table(
+            'raw_news', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('source_id', sa.String(), nullable=True),
+            sa.Column('source_name', sa.String(), nullable=True),
+            sa.Column('author', sa.String(), nullable=True),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('url', sa.String(), nullable=True),
+            sa.Column('url_to_image', sa.String(), nullable=True),
+            sa.Column('published_at', sa.DateTime(), nullable=True),
+            sa.Column('content', sa.Text(), nullable=True),
+            sa.Column('collected_at', sa.DateTime(), nullable=True),
+            sa.Column('is_verified', sa.Boolean(), nullable=True),
+            sa.Column('verification_score', sa.Float(), nullable=True),
+            sa.Column('processed', sa.Boolean(), nullable=True),
+            sa.Column('claimed_by', sa.String(), nullable=True),
+            sa.Column('claim_expires_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_raw_news_id', 'id'),
+            sa.Index('ix_raw_news_source_id', 'source_id'),
+            sa.Index('ix_raw_news_url', 'url', unique=True)
+        ),
+        sa.Table(
+            'scheduler_leases', metadata,
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('holder', sa.String(), nullable=True),
+            sa.Column('token', sa.Integer(), nullable=True),
+            sa.Column('acquired_at', sa.DateTime(), nullable=True),
+            sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        ),
+        sa.Table(
+            'users', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('firebase_uid', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('phone', sa.String(), nullable=True),
+            sa.Column('push_token', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_users_firebase_uid', 'firebase_uid', unique=True),
+            sa.Index('ix_users_id', 'id')
+        ),
+        sa.Table(
+            'folders', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_folders_id', 'id')
+        ),
+        sa.Table(
+            'subscriptions', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_subscriptions_id', 'id')
+        ),
+        sa.Table(
+            'verified_news', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('raw_news_id', sa.Integer(), nullable=True),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('content', sa.Text(), nullable=True),
+            sa.Column('summary_bullets', sa.JSON(), nullable=True),
+            sa.Column('analysis', sa.JSON(), nullable=True),
+            sa.Column('impact_tags', sa.JSON(), nullable=True),
+            sa.Column('bias_rating', sa.String(), nullable=True),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.Column('credibility_score', sa.Float(), nullable=True),
+            sa.Column('impact_score', sa.Integer(), nullable=True),
+            sa.Column('why_it_matters', sa.Text(), nullable=True),
+            sa.Column('who_is_affected', sa.Text(), nullable=True),
+            sa.Column('short_term_impact', sa.Text(), nullable=True),
+            sa.Column('long_term_impact', sa.Text(), nullable=True),
+            sa.Column('sentiment', sa.String(), nullable=True),
+            sa.Column('published_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('analyzed_at', sa.DateTime(), nullable=True),
+            sa.Column('claimed_by', sa.String(), nullable=True),
+            sa.Column('claim_expires_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['raw_news_id'], ['raw_news.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_verified_news_analyzed_at', 'analyzed_at'),
+            sa.Index('ix_verified_news_category', 'category'),
+            sa.Index('ix_verified_news_id', 'id')
+        ),
+        sa.Table(
+            'read_history', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('news_id', sa.Integer(), nullable=True),
+            sa.Column('read_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['news_id'], ['verified_news.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_read_history_id', 'id')
+        ),
+        sa.Table(
+            'saved_articles', metadata,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('folder_id', sa.Integer(), nullable=True),
+            sa.Column('news_id', sa.Integer(), nullable=True),
+            sa.Column('saved_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['folder_id'], ['folders.id']),
+            sa.ForeignKeyConstraint(['news_id'], ['verified_news.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_saved_articles_id', 'id')
+        ),
+    ]
+
+
+def upgrade() -> None:
+    """Create the baseline schema, or bring a create_all database up to it."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    for table in _tables(sa.MetaData()):
+        if table.name not in existing:
+            table.create(bind)
+            continue
+        # Every column added before migrations existed was nullable
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in present:
+                op.add_column(table.name, sa.Column(column.name, column.type, nullable=True))
+        present_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present_indexes:
+                index.create(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table in reversed(_tables(sa.MetaData())):
+        table.drop(bind, checkfirst=True)
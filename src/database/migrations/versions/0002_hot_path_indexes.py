@@ -0,0 +1,57 @@
+"""hot path indexes
+
+Indexes for the queries the pipeline, dashboard and retention endpoints run
+on every request or cycle:
+
+- RawNews.processed = false            verification backlog (partial)
+- VerifiedNews.impact_score IS NULL    analysis backlog (partial)
+- VerifiedNews.published_at >= cutoff  digest, personalization and chat windows
+- DailyDigest ORDER BY date DESC       latest digest
+- ReadHistory (user_id, read_at)       history page, personal digests
+- SavedArticle (user_id, news_id)      unique: one save per user and article
+
+Duplicate saves from before the constraint are collapsed into the oldest.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 23:40:03.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_raw_news_unprocessed', 'raw_news', ['id'],
+                    sqlite_where=sa.text('processed = 0'), postgresql_where=sa.text('processed = false'))
+    op.create_index('ix_verified_news_unanalyzed', 'verified_news', ['id'],
+                    sqlite_where=sa.text('impact_score IS NULL'), postgresql_where=sa.text('impact_score IS NULL'))
+    op.create_index('ix_verified_news_published_at', 'verified_news', ['published_at'])
+    op.create_index('ix_daily_digests_date', 'daily_digests', ['date'])
+    op.create_index('ix_read_history_user_read_at', 'read_history', ['user_id', 'read_at'])
+
+    op.execute(
+        "DELETE FROM saved_articles WHERE id NOT IN "
+        "(SELECT MIN(id) FROM saved_articles GROUP BY user_id, news_id)"
+    )
+    op.create_index('uq_saved_articles_user_news', 'saved_articles', ['user_id', 'news_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_saved_articles_user_news', table_name='saved_articles')
+    op.drop_index('ix_read_history_user_read_at', table_name='read_history')
+    op.drop_index('ix_daily_digests_date', table_name='daily_digests')
+    op.drop_index('ix_verified_news_published_at', table_name='verified_news')
+    op.drop_index('ix_verified_news_unanalyzed', table_name='verified_news')
+    op.drop_index('ix_raw_news_unprocessed', table_name='raw_news')
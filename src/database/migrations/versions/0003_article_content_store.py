@@ -0,0 +1,176 @@
+"""article content store
+
+Moves raw_news.content, raw_news.description and verified_news.content into
+article_contents, keyed by the SHA-256 of the text and compressed (see
+src/database/content_store.py). A verified row and its raw row end up
+pointing at the same body. Existing text is copied over in batches before
+the old columns are dropped.
+
+The full-text objects read the old columns, so they are dropped here and
+rebuilt by `install_fulltext_index` on the next `init_db`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 23:32:25.800147
+
+"""
+from datetime import datetime
+from typing import Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.content_store import CompressedText, content_hash
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# (table, text column, hash column)
+TEXT_COLUMNS = [
+    ('raw_news', 'content', 'content_hash'),
+    ('raw_news', 'description', 'description_hash'),
+    ('verified_news', 'content', 'content_hash'),
+]
+
+contents = sa.table(
+    'article_contents',
+    sa.column('hash', sa.String()),
+    sa.column('body', CompressedText()),
+    sa.column('size', sa.Integer()),
+    sa.column('created_at', sa.DateTime()),
+)
+
+
+def _drop_fulltext() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS verified_news_fts_{suffix}')
+        op.execute('DROP TABLE IF EXISTS verified_news_fts')
+    elif op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS verified_news_search_vector_trg ON verified_news')
+        op.execute('DROP INDEX IF EXISTS ix_verified_news_search_vector')
+        op.execute('ALTER TABLE verified_news DROP COLUMN IF EXISTS search_vector')
+
+
+def _store(bind, texts: List[str]) -> None:
+    rows: Dict[str, str] = {content_hash(value): value for value in texts}
+    if not rows:
+        return
+    known = {h for (h,) in bind.execute(sa.select(contents.c.hash).where(contents.c.hash.in_(list(rows))))}
+    missing = [
+        {'hash': h, 'body': value, 'size': len(value.encode('utf-8')), 'created_at': datetime.utcnow()}
+        for h, value in rows.items() if h not in known
+    ]
+    if missing:
+        bind.execute(contents.insert(), missing)
+
+
+def _move_text_out(table_name: str, text_column: str, hash_column: str) -> None:
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer()), sa.column(text_column, sa.Text()),
+                     sa.column(hash_column, sa.String()))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[text_column])
+            .where(table.c.id > last_id, table.c[text_column].isnot(None))
+            .order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        _store(bind, [value for _, value in rows])
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id'))
+            .values({hash_column: sa.bindparam('row_hash')}),
+            [{'row_id': row_id, 'row_hash': content_hash(value)} for row_id, value in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def _move_text_back(table_name: str, text_column: str, hash_column: str) -> None:
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer()), sa.column(text_column, sa.Text()),
+                     sa.column(hash_column, sa.String()))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, contents.c.body)
+            .join(contents, contents.c.hash == table.c[hash_column])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id'))
+            .values({text_column: sa.bindparam('row_text')}),
+            [{'row_id': row_id, 'row_text': body} for row_id, body in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_fulltext()
+    op.create_table('article_contents',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('body', CompressedText(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('raw_news', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('description_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+    with op.batch_alter_table('verified_news', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    for table_name, text_column, hash_column in TEXT_COLUMNS:
+        _move_text_out(table_name, text_column, hash_column)
+
+    with op.batch_alter_table('raw_news', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_raw_news_content_hash'), ['content_hash'], unique=False)
+        batch_op.create_index(batch_op.f('ix_raw_news_description_hash'), ['description_hash'], unique=False)
+        batch_op.create_foreign_key('fk_raw_news_content_hash', 'article_contents', ['content_hash'], ['hash'])
+        batch_op.create_foreign_key('fk_raw_news_description_hash', 'article_contents', ['description_hash'], ['hash'])
+        batch_op.drop_column('description')
+        batch_op.drop_column('content')
+
+    with op.batch_alter_table('verified_news', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_verified_news_content_hash'), ['content_hash'], unique=False)
+        batch_op.create_foreign_key('fk_verified_news_content_hash', 'article_contents', ['content_hash'], ['hash'])
+        batch_op.drop_column('content')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_fulltext()
+    with op.batch_alter_table('verified_news', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content', sa.TEXT(), nullable=True))
+    with op.batch_alter_table('raw_news', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content', sa.TEXT(), nullable=True))
+        batch_op.add_column(sa.Column('description', sa.TEXT(), nullable=True))
+
+    for table_name, text_column, hash_column in TEXT_COLUMNS:
+        _move_text_back(table_name, text_column, hash_column)
+
+    with op.batch_alter_table('verified_news', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_verified_news_content_hash', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_verified_news_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('raw_news', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_raw_news_description_hash', type_='foreignkey')
+        batch_op.drop_constraint('fk_raw_news_content_hash', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_raw_news_description_hash'))
+        batch_op.drop_index(batch_op.f('ix_raw_news_content_hash'))
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('description_hash')
+
+    op.drop_table('article_contents')
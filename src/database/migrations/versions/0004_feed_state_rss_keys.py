@@ -0,0 +1,37 @@
+"""feed state rss keys
+
+RSS validator rows in feed_states were keyed by the bare feed name until
+collection was sharded; they are now keyed rss:<name>. Old rows are renamed
+so feeds keep their ETag/Last-Modified and are not refetched in full. An old
+row whose new key already exists is stale and dropped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:12:47.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only RSS rows existed before keys were prefixed, so an unprefixed key is an RSS feed
+    op.execute(
+        "DELETE FROM feed_states WHERE source NOT LIKE '%:%' "
+        "AND 'rss:' || source IN (SELECT source FROM feed_states)"
+    )
+    op.execute("UPDATE feed_states SET source = 'rss:' || source WHERE source NOT LIKE '%:%'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE feed_states SET source = SUBSTR(source, 5) WHERE source LIKE 'rss:%'")
@@ -1,13 +1,37 @@
+import time
 from datetime import datetime
+from pathlib import Path
 from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, Boolean, ForeignKey, JSON, LargeBinary
+from sqlalchemy import Index, event, select, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import attributes, column_property, deferred, relationship, sessionmaker
 
 from src.config.settings import DATABASE_URL
+from src.database.engine import make_engine
+from src.database.content_store import CompressedText, content_hash
 
 Base = declarative_base()
 
+class ArticleContent(Base):
+    __tablename__ = "article_contents"
+
+    # Content-addressed article text, see src/database/content_store.py
+    hash = Column(String(64), primary_key=True) # SHA-256 of the UTF-8 text
+    body = Column(CompressedText)
+    size = Column(Integer) # Uncompressed UTF-8 bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+def _text_of(hash_column):
+    # Read-only, loaded on first access (or with undefer_group("article_text")),
+    # so listing queries never join article_contents. Assigning stores the text
+    # through _store_article_text on flush.
+    return deferred(
+        column_property(select(ArticleContent.body).where(ArticleContent.hash == hash_column).scalar_subquery()),
+        group="article_text"
+    )
+
 class RawNews(Base):
     __tablename__ = "raw_news"
 
@@ -16,17 +40,29 @@ class RawNews(Base):
     source_name = Column(String)
     author = Column(String, nullable=True)
     title = Column(String)
-    description = Column(Text, nullable=True)
+    description_hash = Column(String(64), ForeignKey("article_contents.hash"), nullable=True, index=True)
     url = Column(String, unique=True, index=True)
     url_to_image = Column(String, nullable=True)
     published_at = Column(DateTime)
-    content = Column(Text, nullable=True)
+    content_hash = Column(String(64), ForeignKey("article_contents.hash"), nullable=True, index=True)
     collected_at = Column(DateTime, default=datetime.utcnow)
     
     # Metadata for processing status
     is_verified = Column(Boolean, default=False)
     verification_score = Column(Float, default=0.0)
     processed = Column(Boolean, default=False)
+    # Verification claim, see src/scheduler/work_claims.py
+    claimed_by = Column(String, nullable=True)
+    claim_expires_at = Column(DateTime, nullable=True)
+
+    description = _text_of(description_hash)
+    content = _text_of(content_hash)
+
+    __table_args__ = (
+        # Verification backlog: only unprocessed rows are indexed
+        Index("ix_raw_news_unprocessed", "id", sqlite_where=text("processed = 0"),
+              postgresql_where=text("processed = false")),
+    )
 
 class VerifiedNews(Base):
     __tablename__ = "verified_news"
@@ -34,7 +70,7 @@ class VerifiedNews(Base):
     id = Column(Integer, primary_key=True, index=True)
     raw_news_id = Column(Integer, ForeignKey("raw_news.id"))
     title = Column(String)
-    content = Column(Text)
+    content_hash = Column(String(64), ForeignKey("article_contents.hash"), nullable=True, index=True) # Shared with the raw row
     summary_bullets = Column(JSON) # List of strings
     
     # Analysis Fields
@@ -51,19 +87,38 @@ class VerifiedNews(Base):
     long_term_impact = Column(Text, nullable=True)
     sentiment = Column(String)
     
-    published_at = Column(DateTime)
+    published_at = Column(DateTime, index=True) # Digest and retrieval windows
     created_at = Column(DateTime, default=datetime.utcnow)
+    analyzed_at = Column(DateTime, nullable=True, index=True) # Set when analysis fields are written
+    # Analysis claim, see src/scheduler/work_claims.py
+    claimed_by = Column(String, nullable=True)
+    claim_expires_at = Column(DateTime, nullable=True)
     
     raw_news = relationship("RawNews")
+    content = _text_of(content_hash)
+
+    __table_args__ = (
+        # Analysis backlog: only rows still awaiting analysis are indexed
+        Index("ix_verified_news_unanalyzed", "id", sqlite_where=text("impact_score IS NULL"),
+              postgresql_where=text("impact_score IS NULL")),
+    )
 
 class DailyDigest(Base):
     __tablename__ = "daily_digests"
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(DateTime, default=datetime.utcnow)
-    content_json = Column(JSON) # Full structured digest
+    date = Column(DateTime, default=datetime.utcnow, index=True) # Latest digest is ORDER BY date DESC
+    content_json = Column(JSON) # Structured digest, see src/digest/payload.py for formats
+    content_blob = Column(LargeBinary, nullable=True) # Serialized digest when not stored as plain JSON
+    content_format = Column(String, nullable=True) # "json", "json+zlib", "msgpack" or "msgpack+zlib"
     is_published = Column(Boolean, default=False)
 
+    # One row per edition, updated in place as new articles are analyzed
+    edition_date = Column(Date, unique=True, index=True, nullable=True) # NULL for legacy per-cycle rows
+    version = Column(Integer, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    source_watermark = Column(DateTime, nullable=True) # Latest VerifiedNews.analyzed_at merged
+
 class User(Base):
     __tablename__ = "users"
 
@@ -112,6 +167,10 @@ class SavedArticle(Base):
     folder = relationship("Folder", back_populates="saved_articles")
     news = relationship("VerifiedNews")
 
+    __table_args__ = (
+        Index("uq_saved_articles_user_news", "user_id", "news_id", unique=True),
+    )
+
 class ReadHistory(Base):
     __tablename__ = "read_history"
 
@@ -122,9 +181,106 @@ class ReadHistory(Base):
 
     user = relationship("User", back_populates="read_history")
     news = relationship("VerifiedNews")
+
+    __table_args__ = (
+        # A user's history, newest first
+        Index("ix_read_history_user_read_at", "user_id", "read_at"),
+    )
     
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True) # e.g. "scheduler", "news_cycle"
+    holder = Column(String, nullable=True) # host:pid:nonce of the current owner
+    token = Column(Integer, default=0) # Incremented on every change of owner
+    acquired_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+class FeedState(Base):
+    __tablename__ = "feed_states"
+
+    source = Column(String, primary_key=True) # Feed key, e.g. "rss:techcrunch" or "newsapi:business"
+    etag = Column(String, nullable=True) # Validators for the next conditional GET
+    modified = Column(String, nullable=True)
+    checked_at = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, nullable=True) # Last fetch that saved new articles
+    polled_at = Column(DateTime, nullable=True) # Poll slot taken by a sharded collector
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True) # e.g. "news_cycle"
+    status = Column(String, default="queued", index=True) # queued, running, succeeded, failed
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    run_after = Column(DateTime, default=datetime.utcnow) # Delays retries
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True) # A running job past this is reclaimed
+
+def _store_article_text(connection, value: str) -> str:
+    """Insert `value` into article_contents unless an identical text is there. Returns its hash."""
+    key = content_hash(value)
+    row = {"hash": key, "body": value, "size": len(value.encode("utf-8")), "created_at": datetime.utcnow()}
+    table = ArticleContent.__table__
+    if connection.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        connection.execute(insert(table).values(row).on_conflict_do_nothing(index_elements=["hash"]))
+    elif connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        connection.execute(insert(table).values(row).on_conflict_do_nothing(index_elements=["hash"]))
+    elif connection.execute(select(table.c.hash).where(table.c.hash == key)).first() is None:
+        connection.execute(table.insert().values(row))
+    return key
+
+_TEXT_COLUMNS = {RawNews: {"content": "content_hash", "description": "description_hash"},
+                 VerifiedNews: {"content": "content_hash"}}
+
+def _persist_text(mapper, connection, target):
+    for attr, hash_attr in _TEXT_COLUMNS[mapper.class_].items():
+        added = attributes.get_history(target, attr).added
+        if added:
+            value = added[-1]
+            setattr(target, hash_attr, None if value is None else _store_article_text(connection, value))
+
+for _model in _TEXT_COLUMNS:
+    event.listen(_model, "before_insert", _persist_text)
+    event.listen(_model, "before_update", _persist_text)
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+def upgrade_schema(target=None):
+    """Apply pending migrations (src/database/migrations) to DATABASE_URL, or to the `target` engine."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    with (target or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+def init_db(attempts: int = 3):
+    # Web workers and the pipeline worker may all start against a fresh
+    # database at once; whoever loses a CREATE race retries and finds it done.
+    for attempt in range(attempts):
+        try:
+            upgrade_schema()
+
+            from src.database.fulltext import install_fulltext_index
+            install_fulltext_index(engine)
+            return
+        except DBAPIError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.5 * (attempt + 1))
@@ -0,0 +1,252 @@
+"""
+Tiered retention: hot rows in the database, cold rows in compressed files.
+
+Articles older than RETENTION_DAYS and digests older than
+DIGEST_RETENTION_DAYS are appended to date-partitioned JSONL archives under
+ARCHIVE_DIR (zstd when `zstandard` is installed, gzip otherwise), then
+deleted from the database in batches. Each batch is written and flushed to
+the archive before its rows are deleted; a run interrupted in between only
+archives those rows twice, and readers keep the last copy.
+
+Archived articles carry their text; bodies in article_contents that no row
+references any more are deleted afterwards.
+
+Articles a user saved or read stay hot so their pages keep working. Freed
+SQLite pages are reused by new rows, so the database file stops growing
+once the policy is in place.
+
+Archived digests stay readable through `load_archived_digest` and
+`digest_history`.
+"""
+import base64
+import gzip
+import io
+import json
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, exists, func, select, text
+from sqlalchemy.orm import Session, undefer_group
+
+from src.config.settings import (
+    ARCHIVE_DIR, RETENTION_DAYS, DIGEST_RETENTION_DAYS, RETENTION_BATCH_SIZE, JOB_RETENTION_DAYS
+)
+from src.database.models import (
+    RawNews, VerifiedNews, DailyDigest, SavedArticle, ReadHistory, Job, ArticleContent
+)
+
+logger = logging.getLogger(__name__)
+
+# Global flag to avoid repeated failed import attempts
+_ZSTD_INITIALIZED = False
+_HAS_ZSTD = False
+
+ZSTD_LEVEL = 10
+
+def _check_zstd():
+    global _ZSTD_INITIALIZED, _HAS_ZSTD
+    if _ZSTD_INITIALIZED:
+        return _HAS_ZSTD
+
+    try:
+        import zstandard
+        _HAS_ZSTD = True
+    except Exception:
+        logger.warning("zstandard not installed; archives are written as gzip.")
+        _HAS_ZSTD = False
+
+    _ZSTD_INITIALIZED = True
+    return _HAS_ZSTD
+
+def _partition(table: str, day: date, suffix: str) -> Path:
+    return Path(ARCHIVE_DIR) / table / f"{day:%Y}" / f"{day:%Y-%m-%d}.jsonl{suffix}"
+
+def _append(path: Path, lines: List[str]):
+    """Append one compressed frame (zstd) or member (gzip); both read back as one stream."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(line + "\n" for line in lines).encode()
+    if path.suffix == ".zst":
+        import zstandard
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        data = gzip.compress(data)
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+
+def _read_lines(path: Path) -> Iterator[str]:
+    if path.suffix == ".zst":
+        if not _check_zstd():
+            logger.warning(f"Cannot read {path}: zstandard not installed.")
+            return
+        import zstandard
+        with open(path, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+            yield from io.TextIOWrapper(reader, encoding="utf-8")
+    else:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            yield from f
+
+def _partitions(table: str, day: date) -> List[Path]:
+    return [p for p in (_partition(table, day, ".zst"), _partition(table, day, ".gz")) if p.exists()]
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    return value
+
+def _row_dict(row) -> Dict[str, Any]:
+    return {c.name: _encode(getattr(row, c.name)) for c in row.__table__.columns}
+
+def _news_dict(row) -> Dict[str, Any]:
+    record = _row_dict(row)
+    # Archives are self-contained: the text goes with the row, not its hash
+    for attr in ("content", "description"):
+        if hasattr(row, attr):
+            record[attr] = getattr(row, attr)
+    return record
+
+def _digest_dict(row: DailyDigest) -> Dict[str, Any]:
+    from src.digest.payload import encode_digest, load_digest
+
+    record = _row_dict(row)
+    # Stored once, in the normalized format, whatever the row's storage format was
+    record.pop("content_blob", None)
+    record.pop("content_json", None)
+    record["content_format"] = None
+    record["digest"] = encode_digest(load_digest(row) or {})
+    return record
+
+def archive_rows(table: str, rows: List[Any], day_of: Callable[[Any], date],
+                 to_dict: Callable[[Any], Dict[str, Any]] = _row_dict) -> int:
+    """Append `rows` to their day partitions of `table`. Returns the number written."""
+    suffix = ".zst" if _check_zstd() else ".gz"
+    by_day: Dict[date, List[str]] = {}
+    for row in rows:
+        by_day.setdefault(day_of(row), []).append(json.dumps(to_dict(row), ensure_ascii=False))
+    for day, lines in by_day.items():
+        _append(_partition(table, day, suffix), lines)
+    return len(rows)
+
+def read_archive(table: str, day: date) -> List[Dict[str, Any]]:
+    """Archived rows of `table` for one day, last copy of each id."""
+    records = {}
+    for path in _partitions(table, day):
+        for line in _read_lines(path):
+            if line.strip():
+                record = json.loads(line)
+                records[record["id"]] = record
+    return list(records.values())
+
+def _news_day(row) -> date:
+    return (row.published_at or getattr(row, "collected_at", None) or datetime.utcnow()).date()
+
+def _digest_day(row: DailyDigest) -> date:
+    return row.edition_date or row.date.date()
+
+def _archive_in_batches(db: Session, model, conditions, table: str, day_of, to_dict, batch_size: int) -> int:
+    total = 0
+    while True:
+        rows = db.query(model).options(undefer_group("article_text")).filter(*conditions) \
+            .order_by(model.id).limit(batch_size).all()
+        if not rows:
+            return total
+        archive_rows(table, rows, day_of, to_dict)
+        ids = [row.id for row in rows]
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        total += len(ids)
+        logger.info(f"Archived {total} {table} rows so far.")
+
+def _references(column, model, due: Optional[list]):
+    """A row of `model` points at the body through `column`; with `due`, a row that is not due."""
+    kept = [] if due is None else [model.id.notin_(select(model.id).where(*due).correlate(None))]
+    return exists().where(column == ArticleContent.hash, *kept)
+
+def apply_retention(db: Session, days: int = RETENTION_DAYS, digest_days: int = DIGEST_RETENTION_DAYS,
+                    batch_size: int = RETENTION_BATCH_SIZE, dry_run: bool = False) -> Dict[str, int]:
+    """Move expired rows to the cold archive. Returns rows archived (or, with dry_run, due) per table."""
+    now = datetime.utcnow()
+    news_cutoff = now - timedelta(days=days)
+    digest_cutoff = now - timedelta(days=digest_days)
+
+    verified_due = [
+        VerifiedNews.published_at < news_cutoff,
+        ~exists().where(SavedArticle.news_id == VerifiedNews.id),
+        ~exists().where(ReadHistory.news_id == VerifiedNews.id),
+    ]
+    policies = [
+        # Verified first, so the raw rows behind them are no longer referenced
+        ("verified_news", VerifiedNews, verified_due, _news_day, _news_dict),
+        ("raw_news", RawNews, [
+            func.coalesce(RawNews.published_at, RawNews.collected_at) < news_cutoff,
+            # Raw rows stay while a verified row that is kept points at them
+            ~exists().where(VerifiedNews.raw_news_id == RawNews.id, ~and_(*verified_due)),
+        ], _news_day, _news_dict),
+        ("daily_digests", DailyDigest, [DailyDigest.date < digest_cutoff], _digest_day, _digest_dict),
+    ]
+
+    counts = {}
+    for table, model, conditions, day_of, to_dict in policies:
+        if dry_run:
+            counts[table] = db.query(func.count(model.id)).filter(*conditions).scalar()
+        else:
+            counts[table] = _archive_in_batches(db, model, conditions, table, day_of, to_dict, batch_size)
+
+    # Text no row points at any more (archived, deleted or replaced). A dry run has
+    # deleted nothing, so there rows that are due do not count as references.
+    due = {model: (conditions if dry_run else None) for _, model, conditions, _, _ in policies}
+    unreferenced = db.query(ArticleContent).filter(
+        ~_references(RawNews.content_hash, RawNews, due[RawNews]),
+        ~_references(RawNews.description_hash, RawNews, due[RawNews]),
+        ~_references(VerifiedNews.content_hash, VerifiedNews, due[VerifiedNews]),
+    )
+    counts["article_contents"] = unreferenced.count() if dry_run else unreferenced.delete(synchronize_session=False)
+
+    # Finished jobs are only kept for inspection; they are not archived
+    finished_jobs = db.query(Job).filter(Job.finished_at < now - timedelta(days=JOB_RETENTION_DAYS))
+    counts["jobs"] = finished_jobs.count() if dry_run else finished_jobs.delete(synchronize_session=False)
+    db.commit()
+
+    if not dry_run and db.bind.dialect.name == "sqlite":
+        # Hand the WAL's space back; freed pages are reused by later inserts
+        db.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return counts
+
+def load_archived_digest(edition_date: date) -> Optional[Dict[str, Any]]:
+    """Full digest dict of an archived edition, or None."""
+    from src.digest.payload import decode_digest
+
+    records = read_archive("daily_digests", edition_date)
+    if not records:
+        return None
+    latest = max(records, key=lambda r: (r.get("version") or 1, r.get("updated_at") or ""))
+    return decode_digest(latest["digest"])
+
+def digest_history(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
+    """The latest `limit` digests, newest first, from the database and then the archive."""
+    from src.digest.payload import load_digest
+
+    history = [
+        {"id": row.id, "date": row.date, "edition_date": _digest_day(row), "version": row.version,
+         "digest": load_digest(row), "archived": False}
+        for row in db.query(DailyDigest).order_by(DailyDigest.date.desc()).limit(limit).all()
+    ]
+    seen = {entry["edition_date"] for entry in history}
+    root = Path(ARCHIVE_DIR) / "daily_digests"
+    files = sorted(root.glob("*/*.jsonl.*"), reverse=True) if root.exists() else []
+    for path in files:
+        if len(history) >= limit:
+            break
+        day = date.fromisoformat(path.name.split(".")[0])
+        if day in seen:
+            continue
+        seen.add(day)
+        history.append({"id": None, "date": datetime.combine(day, datetime.min.time()), "edition_date": day,
+                        "version": None, "digest": load_archived_digest(day), "archived": True})
+    return history
@@ -0,0 +1,124 @@
+"""
+Rendered dashboard pages, cached per digest version.
+
+The /dashboard HTML depends only on the latest digest (its id and version)
+and the template, so each version is rendered once and then served from
+memory under a strong ETag built from that key. A request whose
+If-None-Match carries the current ETag gets 304 without rendering.
+
+Which version is current is read from the database (id and version only)
+at most every DASHBOARD_CACHE_CHECK_SECONDS; in between, cache hits and
+conditional requests touch neither the database nor Jinja. A digest
+committed in this process (embedded scheduler) drops the known version at
+once; one committed by a separate worker is picked up at the next check.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config.settings import DASHBOARD_CACHE_CHECK_SECONDS
+from src.database.models import DailyDigest
+
+# Pages kept: the current version and the few before it, for slow clients
+MAX_CACHED_PAGES = 4
+
+# Returned by `latest()` when the known version has to be re-read
+STALE = object()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+class RenderedPageCache:
+    """Rendered pages keyed by (digest id, version, template version)."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_PAGES, check_seconds: float = DASHBOARD_CACHE_CHECK_SECONDS):
+        self.max_entries = max_entries
+        self.check_seconds = check_seconds
+        self._pages: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._latest: Optional[Tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def latest(self):
+        """(digest id, version) of the latest digest, None if there is none, or STALE."""
+        with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at > self.check_seconds:
+                return STALE
+            return self._latest
+
+    def set_latest(self, key: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            self._latest = key
+            self._checked_at = time.monotonic()
+        return key
+
+    def invalidate(self):
+        """Forget the known latest version; the next request re-reads it."""
+        with self._lock:
+            self._checked_at = None
+
+    @staticmethod
+    def etag(key: tuple) -> str:
+        # Strong: the same key always renders the same bytes
+        return '"' + "-".join(str(part) for part in key) + '"'
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._pages.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        with self._lock:
+            self._pages[key] = body
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def record_not_modified(self):
+        """Count a conditional request answered with 304."""
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "latest": list(self._latest) if self._latest else None,
+                "pages": len(self._pages),
+                "bytes": sum(len(body) for body in self._pages.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified
+            }
+
+dashboard_pages = RenderedPageCache()
+
+@event.listens_for(Session, "after_flush")
+def _note_digest_write(session, flush_context):
+    # new/dirty still hold what was just flushed
+    if any(isinstance(obj, DailyDigest) for obj in list(session.new) + list(session.dirty)):
+        session.info["digest_written"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_digest_commit(session):
+    if session.info.pop("digest_written", False):
+        dashboard_pages.invalidate()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_digest_write(session, previous_transaction):
+    session.info.pop("digest_written", None)
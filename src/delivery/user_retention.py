@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from src.database.models import SessionLocal, User, Folder, SavedArticle, ReadHistory, VerifiedNews
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from src.database.models import User, Folder, SavedArticle, ReadHistory, VerifiedNews
+from src.database.async_session import get_async_db
+from src.digest.personalization import personal_digests
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter(tags=["Retention"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def _user_by_uid(db: AsyncSession, firebase_uid: str) -> Optional[User]:
+    return (await db.execute(select(User).where(User.firebase_uid == firebase_uid))).scalars().first()
+
+def _with_news(relationship):
+    # Article and source for listings; async sessions cannot lazy-load relationships
+    return selectinload(relationship).selectinload(VerifiedNews.raw_news)
 
 class SaveRequest(BaseModel):
     firebase_uid: str
@@ -28,16 +33,16 @@ class HistoryRequest(BaseModel):
     news_id: int
 
 @router.post("/save")
-async def save_article(payload: SaveRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == payload.firebase_uid).first()
+async def save_article(payload: SaveRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, payload.firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail=f"Retention Error: User {payload.firebase_uid} not found in DB")
     
     # Check if already saved
-    existing = db.query(SavedArticle).filter(
+    existing = (await db.execute(select(SavedArticle.id).where(
         SavedArticle.user_id == user.id,
         SavedArticle.news_id == payload.news_id
-    ).first()
+    ))).first()
     
     if existing:
         return {"status": "already_saved", "message": "Article already in saves"}
@@ -48,12 +53,17 @@ async def save_article(payload: SaveRequest, db: Session = Depends(get_db)):
         folder_id=payload.folder_id
     )
     db.add(save_entry)
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request saved it first (unique user_id, news_id)
+        await db.rollback()
+        return {"status": "already_saved", "message": "Article already in saves"}
     return {"status": "success", "message": "Article saved"}
 
 @router.post("/history")
-async def track_history(payload: HistoryRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == payload.firebase_uid).first()
+async def track_history(payload: HistoryRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, payload.firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail=f"Retention Error: User {payload.firebase_uid} not found in DB")
     
@@ -63,16 +73,19 @@ async def track_history(payload: HistoryRequest, db: Session = Depends(get_db)):
         news_id=payload.news_id
     )
     db.add(history_entry)
-    db.commit()
+    await db.commit()
+    await db.run_sync(personal_digests.refresh_user, user.id)
     return {"status": "success", "message": "History tracked"}
 
 @router.get("/saved/{firebase_uid}")
-async def get_saved_articles(firebase_uid: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+async def get_saved_articles(firebase_uid: str, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    saves = db.query(SavedArticle).filter(SavedArticle.user_id == user.id).all()
+    saves = (await db.execute(
+        select(SavedArticle).options(_with_news(SavedArticle.news)).where(SavedArticle.user_id == user.id)
+    )).scalars().all()
     result = []
     for s in saves:
         news = s.news
@@ -89,12 +102,15 @@ async def get_saved_articles(firebase_uid: str, db: Session = Depends(get_db)):
     return result
 
 @router.get("/history/{firebase_uid}")
-async def get_history(firebase_uid: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+async def get_history(firebase_uid: str, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    history = db.query(ReadHistory).filter(ReadHistory.user_id == user.id).order_by(ReadHistory.read_at.desc()).all()
+    history = (await db.execute(
+        select(ReadHistory).options(_with_news(ReadHistory.news))
+        .where(ReadHistory.user_id == user.id).order_by(ReadHistory.read_at.desc())
+    )).scalars().all()
     result = []
     for h in history:
         news = h.news
@@ -110,22 +126,23 @@ async def get_history(firebase_uid: str, db: Session = Depends(get_db)):
     return result
 
 @router.delete("/history/{firebase_uid}")
-async def clear_history(firebase_uid: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+async def clear_history(firebase_uid: str, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.query(ReadHistory).filter(ReadHistory.user_id == user.id).delete()
-    db.commit()
+    await db.execute(delete(ReadHistory).where(ReadHistory.user_id == user.id))
+    await db.commit()
+    await db.run_sync(personal_digests.refresh_user, user.id)
     return {"status": "success", "message": "History cleared"}
 
 @router.post("/folders")
-async def create_folder(payload: FolderRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.firebase_uid == payload.firebase_uid).first()
+async def create_folder(payload: FolderRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await _user_by_uid(db, payload.firebase_uid)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     folder = Folder(user_id=user.id, name=payload.name)
     db.add(folder)
-    db.commit()
+    await db.commit()
     return {"status": "success", "folder_id": folder.id}
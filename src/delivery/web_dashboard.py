@@ -1,13 +1,32 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
+import hashlib
+import json
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.database.models import SessionLocal, DailyDigest, VerifiedNews
-from src.analysis.chat_engine import NewsChatEngine
+from src.database.async_session import get_async_db
+from src.database.fulltext import search_news
+from src.analysis.chat_engine import get_chat_engine
+from src.analysis.answer_cache import answer_cache
+from src.analysis.circuit_breaker import llm_breaker
+from src.digest.generator import DigestGenerator
+from src.digest.personalization import personal_digests
+from src.digest.payload import load_digest, encode_digest
+from src.database.retention import digest_history, load_archived_digest
+from src.delivery.page_cache import dashboard_pages, etag_matches, STALE
 
 router = APIRouter()
 templates = Jinja2Templates(directory="web/templates")
 
+# Sync sessions for routes that hand the session to CPU-bound helpers in the
+# threadpool; routes that only query use get_async_db
 def get_db():
     db = SessionLocal()
     try:
@@ -28,12 +47,8 @@ async def landing_page(request: Request):
     }
     return templates.TemplateResponse("login.html", {"request": request, "firebase_config": firebase_config})
 
-@router.get("/dashboard")
-async def dashboard(request: Request, db: Session = Depends(get_db)):
+def _dashboard_context(request: Request, latest_digest: Optional[DailyDigest]) -> dict:
     from src.config import settings
-    # Get latest digest
-    latest_digest = db.query(DailyDigest).order_by(DailyDigest.date.desc()).first()
-    
     firebase_config = {
         "apiKey": settings.FIREBASE_API_KEY,
         "authDomain": settings.FIREBASE_AUTH_DOMAIN,
@@ -42,20 +57,72 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
         "messagingSenderId": settings.FIREBASE_MESSAGING_SENDER_ID,
         "appId": settings.FIREBASE_APP_ID
     }
-    
-    context = {
+    return {
         "request": request,
-        "digest": latest_digest.content_json if latest_digest else None,
+        "digest": load_digest(latest_digest),
         "date": latest_digest.date.strftime("%B %d, %Y") if latest_digest else "No Digest Available",
         "firebase_config": firebase_config,
         "vapid_public_key": settings.VAPID_PUBLIC_KEY
     }
-    return templates.TemplateResponse("dashboard.html", context)
+
+_TEMPLATE_VERSION = None
+
+def _template_version() -> str:
+    """Hash of the dashboard template and the settings rendered into it."""
+    global _TEMPLATE_VERSION
+    if _TEMPLATE_VERSION is None:
+        source, _, _ = templates.env.loader.get_source(templates.env, "dashboard.html")
+        static = _dashboard_context(None, None)
+        fingerprint = source + json.dumps([static["firebase_config"], static["vapid_public_key"]], sort_keys=True)
+        _TEMPLATE_VERSION = hashlib.sha256(fingerprint.encode()).hexdigest()[:12]
+    return _TEMPLATE_VERSION
+
+def _render_dashboard(request: Request, latest_digest: Optional[DailyDigest]) -> bytes:
+    return templates.get_template("dashboard.html").render(_dashboard_context(request, latest_digest)).encode()
+
+@router.get("/dashboard")
+async def dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Digest page, rendered once per digest version; see src/delivery/page_cache.py."""
+    from src.config import settings
+
+    latest = dashboard_pages.latest()
+    if latest is STALE:
+        row = (await db.execute(
+            select(DailyDigest.id, DailyDigest.version).order_by(DailyDigest.date.desc()).limit(1)
+        )).first()
+        latest = dashboard_pages.set_latest((row.id, row.version) if row else None)
+    if latest is None:
+        return HTMLResponse(_render_dashboard(request, None), headers={"Cache-Control": "no-cache"})
+
+    key = (*latest, _template_version())
+    headers = {
+        "ETag": dashboard_pages.etag(key),
+        "Cache-Control": f"public, max-age={settings.DASHBOARD_MAX_AGE_SECONDS}, must-revalidate"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        dashboard_pages.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    body = dashboard_pages.get(key)
+    if body is None:
+        latest_digest = await db.get(DailyDigest, key[0])
+        if latest_digest is None or latest_digest.version != key[1]:
+            # Replaced since the version was read; render what is there now
+            dashboard_pages.invalidate()
+            return HTMLResponse(_render_dashboard(request, latest_digest), headers={"Cache-Control": "no-cache"})
+        body = _render_dashboard(request, latest_digest)
+        dashboard_pages.put(key, body)
+    return HTMLResponse(body, headers=headers)
+
+@router.get("/api/dashboard/cache-stats")
+async def dashboard_cache_stats():
+    return dashboard_pages.stats()
 
 @router.get("/archive")
 async def archive(request: Request, db: Session = Depends(get_db)):
-    topic_list = db.query(DailyDigest).order_by(DailyDigest.date.desc()).limit(10).all()
-    return templates.TemplateResponse("archive.html", {"request": request, "digests": topic_list})
+    # Older editions come from the cold archive once retention has moved them
+    history = await run_in_threadpool(digest_history, db, 10)
+    return templates.TemplateResponse(request, "archive.html", {"digests": history})
 
 @router.get("/saved")
 async def saved_items_page(request: Request):
@@ -86,19 +153,145 @@ async def history_page(request: Request):
 class ChatRequest(BaseModel):
     message: str
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def _stream_chat(db: Session, query: str) -> StreamingResponse:
+    chat_engine = get_chat_engine()
+    # Retrieval runs before the response starts, so the first byte goes out as
+    # soon as the sources are known and the stream never touches the session.
+    turn = await run_in_threadpool(chat_engine.prepare, db, query)
+    return StreamingResponse(
+        chat_engine.stream_response(turn),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/api/chat")
 async def chat_endpoint(payload: ChatRequest, db: Session = Depends(get_db)):
-    chat_engine = NewsChatEngine()
-    response = chat_engine.get_response(db, payload.message)
+    chat_engine = get_chat_engine()
+    response = await run_in_threadpool(chat_engine.get_response, db, payload.message)
     return {"response": response}
 
+@router.post("/api/chat/stream")
+async def chat_stream_endpoint(payload: ChatRequest, db: Session = Depends(get_db)):
+    return await _stream_chat(db, payload.message)
+
+@router.get("/api/chat/cache-stats")
+async def chat_cache_stats():
+    return answer_cache.stats()
+
+@router.get("/api/llm/status")
+async def llm_status():
+    return llm_breaker.status()
+
+@router.get("/api/scheduler/leases")
+async def scheduler_leases():
+    from src.scheduler.lease import lease_status
+    return await run_in_threadpool(lease_status)
+
+@router.post("/api/jobs/news-cycle", status_code=202)
+async def enqueue_news_cycle(db: AsyncSession = Depends(get_async_db)):
+    """Manual trigger: queue a news cycle and return its job id without waiting."""
+    from src.scheduler.job_queue import enqueue
+    job = await db.run_sync(enqueue, "news_cycle", {"trigger": "manual"})
+    return {"status": job.status, "job_id": job.id, "status_url": f"/api/jobs/{job.id}"}
+
+@router.get("/api/jobs/{job_id}")
+async def job_status_endpoint(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    from src.scheduler.job_queue import job_status
+    status = await db.run_sync(job_status, job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@router.get("/api/search")
+async def search_endpoint(
+    q: str,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    matches = await db.run_sync(
+        search_news, q, category=category, since=since, until=until, limit=limit, with_source=True
+    )
+    return {
+        "query": q,
+        "results": [
+            {
+                "id": n.id,
+                "title": n.title,
+                "category": n.category,
+                "url": n.raw_news.url if n.raw_news else "#",
+                "source_name": n.raw_news.source_name if n.raw_news else "Unknown",
+                "published_at": n.published_at.isoformat() if n.published_at else None,
+                "summary": n.summary_bullets,
+                "score": round(score, 4)
+            } for n, score in matches
+        ]
+    }
+
+async def _latest_row(db: AsyncSession) -> Optional[DailyDigest]:
+    result = await db.execute(select(DailyDigest).order_by(DailyDigest.date.desc()).limit(1))
+    return result.scalars().first()
+
+@router.get("/api/digest/latest")
+async def latest_digest_endpoint(compact: bool = True, db: AsyncSession = Depends(get_async_db)):
+    """Latest digest; normalized format 2 unless compact=false."""
+    latest = await _latest_row(db)
+    if not latest:
+        raise HTTPException(status_code=404, detail="No digest available")
+    digest = load_digest(latest)
+    return {
+        "digest_id": latest.id,
+        "version": latest.version,
+        "digest": encode_digest(digest) if compact else digest
+    }
+
+@router.get("/api/digest/edition/{edition_date}")
+async def edition_digest_endpoint(edition_date: date, compact: bool = True,
+                                  db: AsyncSession = Depends(get_async_db)):
+    """One edition's digest, from the database or the cold archive."""
+    result = await db.execute(select(DailyDigest).where(DailyDigest.edition_date == edition_date))
+    row = result.scalars().first()
+    if row:
+        digest, version, archived = load_digest(row), row.version, False
+    else:
+        # Archive files are read in the threadpool
+        digest, version, archived = await run_in_threadpool(load_archived_digest, edition_date), None, True
+    if digest is None:
+        raise HTTPException(status_code=404, detail=f"No digest for {edition_date}")
+    return {
+        "edition_date": edition_date.isoformat(),
+        "version": version,
+        "archived": archived,
+        "digest": encode_digest(digest) if compact else digest
+    }
+
+def _personal_digest(db: Session, firebase_uid: str):
+    from src.database.models import User
+
+    user = db.query(User.id).filter(User.firebase_uid == firebase_uid).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    key, index = personal_digests.get(db)
+    if index is None:
+        return {"digest_id": None, "version": None, "stories": []}
+    ids = index.ids_for(user.id)
+    return {"digest_id": key[0], "version": key[1], "stories": DigestGenerator().stories_for(db, ids)}
+
+@router.get("/api/digest/personal/{firebase_uid}")
+async def personal_digest_endpoint(firebase_uid: str, db: Session = Depends(get_db)):
+    return await run_in_threadpool(_personal_digest, db, firebase_uid)
+
 class NoteRequest(BaseModel):
     text: str
     url: str
     timestamp: str
 
 @router.post("/api/save-note")
-async def save_note_endpoint(payload: NoteRequest, db: Session = Depends(get_db)):
+async def save_note_endpoint(payload: NoteRequest):
     # For now, just acknowledge the note
     # In a full implementation, you would save this to the database
     # associated with the authenticated user
@@ -110,16 +303,21 @@ class AIQueryRequest(BaseModel):
 
 @router.post("/api/ai-query")
 async def ai_query_endpoint(payload: AIQueryRequest, db: Session = Depends(get_db)):
-    chat_engine = NewsChatEngine()
+    chat_engine = get_chat_engine()
     full_query = f"{payload.query}\n\nContext: {payload.context}"
-    response = chat_engine.get_response(db, full_query)
+    response = await run_in_threadpool(chat_engine.get_response, db, full_query)
     return {"response": response}
 
+@router.post("/api/ai-query/stream")
+async def ai_query_stream_endpoint(payload: AIQueryRequest, db: Session = Depends(get_db)):
+    full_query = f"{payload.query}\n\nContext: {payload.context}"
+    return await _stream_chat(db, full_query)
+
 class AuthRequest(BaseModel):
     id_token: str
 
 @router.post("/api/login")
-async def login_endpoint(payload: AuthRequest, db: Session = Depends(get_db)):
+async def login_endpoint(payload: AuthRequest, db: AsyncSession = Depends(get_async_db)):
     from src.config.firebase_config import verify_token
     from src.database.models import User
     
@@ -128,7 +326,7 @@ async def login_endpoint(payload: AuthRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail="Invalid token")
     
     uid = decoded['uid']
-    user = db.query(User).filter(User.firebase_uid == uid).first()
+    user = (await db.execute(select(User).where(User.firebase_uid == uid))).scalars().first()
     if not user:
         user = User(
             firebase_uid=uid,
@@ -136,7 +334,7 @@ async def login_endpoint(payload: AuthRequest, db: Session = Depends(get_db)):
             phone=decoded.get('phone_number')
         )
         db.add(user)
-        db.commit()
+        await db.commit()
     
     return {"status": "success", "uid": uid}
 
@@ -146,20 +344,22 @@ class SubscribeRequest(BaseModel):
     categories: list # e.g. ["Technology", "All"]
 
 @router.post("/api/subscribe")
-async def subscribe_endpoint(payload: SubscribeRequest, db: Session = Depends(get_db)):
+async def subscribe_endpoint(payload: SubscribeRequest, db: AsyncSession = Depends(get_async_db)):
+    from sqlalchemy import delete
     from src.database.models import User, Subscription
     
-    user = db.query(User).filter(User.firebase_uid == payload.uid).first()
+    user = (await db.execute(select(User).where(User.firebase_uid == payload.uid))).scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.push_token = payload.push_token
     
     # Simple clear and re-add for subscriptions
-    db.query(Subscription).filter(Subscription.user_id == user.id).delete()
+    await db.execute(delete(Subscription).where(Subscription.user_id == user.id))
     for cat in payload.categories:
         sub = Subscription(user_id=user.id, category=cat)
         db.add(sub)
     
-    db.commit()
+    await db.commit()
+    await db.run_sync(personal_digests.refresh_user, user.id)
     return {"status": "subscribed"}
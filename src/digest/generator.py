@@ -1,133 +1,300 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import logging
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Iterable, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from src.database.models import VerifiedNews, DailyDigest
+from src.digest.payload import store_digest, load_digest
+from src.config.settings import DIGEST_WINDOW_HOURS
 
 logger = logging.getLogger(__name__)
 
+TOTAL_LIMIT = 50
+# Smart Balancing: Tech/AI cannot exceed 15% of total stories
+TECH_AI_CATEGORIES = ["Technology", "AI & Machine Learning"]
+CATEGORY_QUOTAS = {"tech_ai": int(TOTAL_LIMIT * 0.15)}
+
+MANDATORY_CATEGORIES = [
+    "Breaking News", "Politics", "Business & Economy", "Sports", 
+    "Technology", "AI & Machine Learning", "World News", "India / Local News",
+    "Science & Health", "Education", "Entertainment",
+    "Environment & Climate", "Lifestyle & Wellness", "Defense & Security"
+]
+
 class DigestGenerator:
     def __init__(self):
         pass
 
-    def create_daily_digest(self, session: Session) -> Dict[str, Any]:
+    def _ranking(self):
+        """Sort order shared by every digest query: impact, then credibility."""
+        return (
+            func.coalesce(VerifiedNews.impact_score, 0).desc(),
+            func.coalesce(VerifiedNews.credibility_score, 0).desc(),
+            VerifiedNews.id.desc()
+        )
+
+    def _select_balanced(self, session: Session, cutoff: datetime) -> List[VerifiedNews]:
         """
-        Gather verified news from the last 24h, rank them, and create a digest structure.
+        Top TOTAL_LIMIT stories in the window with per-group quotas applied in SQL.
+        A row_number() per quota group drops e.g. the 8th Tech/AI story before the
+        overall limit is taken, which matches the old greedy Python filter.
         """
-        # Get start of today (or last 24h window)
-        # simplistic: just take all unprocessed verified news or news from last 24h
-        
-        # In a real app, we'd filter by 'created_at' > 24 hours ago
-        recent_news = session.query(VerifiedNews).limit(50).all() # limit for prototype
-        
-        if not recent_news:
-            logger.info("No news found for digest.")
-            return {}
+        quota_group = case(
+            (VerifiedNews.category.in_(TECH_AI_CATEGORIES), "tech_ai"),
+            else_=func.coalesce(VerifiedNews.category, "Other")
+        )
+        ranked = session.query(
+            VerifiedNews.id.label("id"),
+            quota_group.label("quota_group"),
+            func.row_number().over(partition_by=quota_group, order_by=self._ranking()).label("group_rank")
+        ).filter(VerifiedNews.published_at >= cutoff).subquery()
 
-        # Sort by impact score (desc) & credibility
-        sorted_news = sorted(
-            recent_news, 
-            key=lambda x: (x.impact_score or 0, x.credibility_score or 0), 
-            reverse=True
+        quota = case(
+            *[(ranked.c.quota_group == group, limit) for group, limit in CATEGORY_QUOTAS.items()],
+            else_=TOTAL_LIMIT
         )
+        return session.query(VerifiedNews).join(ranked, ranked.c.id == VerifiedNews.id).filter(
+            ranked.c.group_rank <= quota
+        ).options(
+            selectinload(VerifiedNews.raw_news)
+        ).order_by(*self._ranking()).limit(TOTAL_LIMIT).all()
+
+    def ranked_candidates(self, session: Session, limit: int) -> List[Tuple[int, str]]:
+        """(id, category) of the top `limit` stories in the window, unbalanced."""
+        cutoff = datetime.utcnow() - timedelta(hours=DIGEST_WINDOW_HOURS)
+        return session.query(VerifiedNews.id, VerifiedNews.category).filter(
+            VerifiedNews.published_at >= cutoff
+        ).order_by(*self._ranking()).limit(limit).all()
+
+    def stories_for(self, session: Session, ids: List[int]) -> List[Dict[str, Any]]:
+        """Story dicts for `ids`, in the given order."""
+        rows = session.query(VerifiedNews).options(selectinload(VerifiedNews.raw_news)).filter(
+            VerifiedNews.id.in_(ids)
+        ).all()
+        by_id = {n.id: n for n in rows}
+        return [{**self._story(by_id[i]), "category": by_id[i].category} for i in ids if i in by_id]
+
+    def _story(self, news: VerifiedNews) -> Dict[str, Any]:
+        raw = news.raw_news
+        return {
+            "id": news.id,
+            "title": news.title,
+            "url": raw.url if raw else "#",
+            "source_name": raw.source_name if raw else "Unknown",
+            "published_at": news.published_at.isoformat() if news.published_at else None,
+            "image_url": raw.url_to_image if raw and raw.url_to_image else None,
+            "why": news.why_it_matters,
+            "affected": news.who_is_affected,
+            "short_impact": news.short_term_impact,
+            "long_impact": news.long_term_impact,
+            "tags": news.impact_tags,
+            "bias": news.bias_rating
+        }
 
-        # Smart Balancing: Tech/AI cannot exceed 15% of total stories
-        total_limit = 50
-        tech_ai_limit = int(total_limit * 0.15)
-        
-        final_list = []
-        tech_ai_count = 0
-        
-        for news in sorted_news:
-            if len(final_list) >= total_limit:
+    def _entry(self, news: VerifiedNews) -> Dict[str, Any]:
+        return {**self._story(news), "summary": news.summary_bullets, "category": news.category}
+
+    def _rank_key(self, news: VerifiedNews) -> List[Any]:
+        """[id, impact, credibility, quota group]: everything re-ranking needs, stored with the digest."""
+        group = "tech_ai" if news.category in TECH_AI_CATEGORIES else (news.category or "Other")
+        return [news.id, news.impact_score or 0, news.credibility_score or 0, group]
+
+    def _entries_from(self, digest: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """Recover one entry per article from a stored digest's sections."""
+        entries = {}
+        for cat, items in digest.get("categories", {}).items():
+            for item in items:
+                entries[item["id"]] = {**item, "category": cat}
+        for item in digest.get("top_stories", []):
+            if item["id"] not in entries:
+                story = {k: v for k, v in item.items() if k not in ("bullets", "category")}
+                entries[item["id"]] = {**story, "summary": item.get("bullets"), "category": item.get("category")}
+        return entries
+
+    def _apply_quotas(self, ranked: List[List[Any]]) -> List[List[Any]]:
+        """Python twin of the SQL quota filter, used when merging a few new articles."""
+        counts = {}
+        selected = []
+        for candidate in ranked:
+            if len(selected) >= TOTAL_LIMIT:
                 break
-            
-            is_tech_ai = news.category in ["Technology", "AI & Machine Learning"]
-            if is_tech_ai:
-                if tech_ai_count < tech_ai_limit:
-                    final_list.append(news)
-                    tech_ai_count += 1
-            else:
-                final_list.append(news)
-
-        top_10 = sorted_news[:10] # Top 10 regardless of balance for the feature section? 
-        # Actually PROMPT said: "Technology/AI combined cannot exceed 15% of total coverage"
-        # So I will use the final_list for top_10 too.
-        top_10 = [n for n in final_list if n.impact_score and n.impact_score >= 7][:10]
+            group = candidate[3]
+            if counts.get(group, 0) >= CATEGORY_QUOTAS.get(group, TOTAL_LIMIT):
+                continue
+            counts[group] = counts.get(group, 0) + 1
+            selected.append(candidate)
+        return selected
+
+    def _assemble(self, session: Session, edition_date, candidates: Iterable[List[Any]],
+                  entries: Dict[int, Dict[str, Any]], brief_candidates: Iterable[List[Any]],
+                  titles: Dict[int, str]) -> Dict[str, Any]:
+        ranked = sorted(candidates, key=lambda c: (c[1], c[2], c[0]), reverse=True)
+        final_list = self._apply_quotas(ranked)
+
+        missing = [c[0] for c in final_list if c[0] not in entries]
+        if missing:
+            # Only stories that were ranked but never displayed lack a stored entry
+            for news in session.query(VerifiedNews).options(selectinload(VerifiedNews.raw_news)).filter(
+                VerifiedNews.id.in_(missing)
+            ).all():
+                entries[news.id] = self._entry(news)
+            final_list = [c for c in final_list if c[0] in entries]
+
+        # PROMPT said: "Technology/AI combined cannot exceed 15% of total coverage"
+        # So the balanced final_list is used for top_10 too.
+        top_10 = [c for c in final_list if c[1] >= 7][:10]
         if not top_10:
              top_10 = final_list[:10]
-        
+
         # Categorize
-        mandatory_categories = [
-            "Breaking News", "Politics", "Business & Economy", "Sports", 
-            "Technology", "AI & Machine Learning", "World News", "India / Local News",
-            "Science & Health", "Education", "Entertainment",
-            "Environment & Climate", "Lifestyle & Wellness", "Defense & Security"
-        ]
-        categories = {cat: [] for cat in mandatory_categories}
-
-        for news in final_list:
-            cat = news.category or "Other"
+        categories = {cat: [] for cat in MANDATORY_CATEGORIES}
+        for candidate in final_list:
+            entry = entries[candidate[0]]
+            cat = entry["category"] or "Other"
             if cat not in categories:
                 # Prompt says mandatory categories are always visible. 
                 # If we get something bizarre, we can drop it into a 'Misc' or just ignore if it doesn't fit the 14.
                 # For compliance, let's only use the 14.
                 continue
-            
-            categories[cat].append({
-                "id": news.id,
-                "title": news.title,
-                "url": news.raw_news.url if news.raw_news else "#",
-                "source_name": news.raw_news.source_name if news.raw_news else "Unknown",
-                "published_at": news.published_at.isoformat() if news.published_at else None,
-                "image_url": news.raw_news.url_to_image if news.raw_news and news.raw_news.url_to_image else None,
-                "summary": news.summary_bullets,
-                "why": news.why_it_matters,
-                "affected": news.who_is_affected,
-                "short_impact": news.short_term_impact,
-                "long_impact": news.long_term_impact,
-                "tags": news.impact_tags,
-                "bias": news.bias_rating
-            })
-            
-        digest_data = {
-            "date": datetime.utcnow().strftime("%Y-%m-%d"),
-            "top_stories": [
-                {
-                    "id": n.id,
-                    "title": n.title,
-                    "url": n.raw_news.url if n.raw_news else "#",
-                    "source_name": n.raw_news.source_name if n.raw_news else "Unknown",
-                    "published_at": n.published_at.isoformat() if n.published_at else None,
-                    "image_url": n.raw_news.url_to_image if n.raw_news and n.raw_news.url_to_image else None,
-                    "bullets": n.summary_bullets,
-                    "why": n.why_it_matters,
-                    "affected": n.who_is_affected,
-                    "short_impact": n.short_term_impact,
-                    "long_impact": n.long_term_impact,
-                    "tags": n.impact_tags,
-                    "bias": n.bias_rating,
-                    "category": n.category or "General"
-                } for n in top_10
-            ],
-            "brief": [
-                {
-                    "id": n.id,
-                    "title": n.title
-                } for n in sorted_news[:5]
-            ],
+            categories[cat].append({k: v for k, v in entry.items() if k != "category"})
+
+        brief = sorted(brief_candidates, key=lambda c: (c[1], c[2], c[0]), reverse=True)[:5]
+
+        top_stories = []
+        for candidate in top_10:
+            entry = entries[candidate[0]]
+            story = {k: v for k, v in entry.items() if k not in ("summary", "category")}
+            top_stories.append({**story, "bullets": entry["summary"], "category": entry["category"] or "General"})
+
+        return {
+            "date": edition_date.strftime("%Y-%m-%d"),
+            "top_stories": top_stories,
+            "brief": [{"id": c[0], "title": titles.get(c[0])} for c in brief],
             "categories": categories,
             "insight": "Daily insight goes here...", # LLM generation needed normally
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": datetime.utcnow().isoformat(),
+            # Ranking keys let the next cycle merge new articles without re-querying the day
+            "ranking": [list(c) for c in final_list],
+            "brief_ranking": [list(c) for c in brief]
         }
-        
-        # Save to DB
-        digest_entry = DailyDigest(
-            content_json=digest_data,
+
+    def _build_edition(self, session: Session, edition_date) -> Dict[str, Any]:
+        """First digest of the day: rank the whole window in SQL."""
+        cutoff = datetime.utcnow() - timedelta(hours=DIGEST_WINDOW_HOURS)
+        final_list = self._select_balanced(session, cutoff)
+
+        if not final_list:
+            logger.info("No news found for digest.")
+            return {}
+
+        # The 60-second brief uses the unbalanced ranking, so only ids, titles and scores are needed
+        brief = session.query(
+            VerifiedNews.id, VerifiedNews.title, VerifiedNews.impact_score, VerifiedNews.credibility_score
+        ).filter(
+            VerifiedNews.published_at >= cutoff
+        ).order_by(*self._ranking()).limit(5).all()
+        watermark = session.query(func.max(VerifiedNews.analyzed_at)).filter(
+            VerifiedNews.published_at >= cutoff
+        ).scalar()
+
+        digest_data = self._assemble(
+            session, edition_date,
+            [self._rank_key(n) for n in final_list],
+            {n.id: self._entry(n) for n in final_list},
+            [[b.id, b.impact_score or 0, b.credibility_score or 0] for b in brief],
+            {b.id: b.title for b in brief}
+        )
+
+        edition = DailyDigest(
+            edition_date=edition_date,
+            version=1,
+            source_watermark=watermark,
             is_published=False
         )
-        session.add(digest_entry)
+        store_digest(edition, digest_data)
+        session.add(edition)
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another runner created today's edition first; the next cycle merges into it
+            session.rollback()
+            logger.warning("Edition for today was created concurrently; skipping this build.")
+            return {}
+        logger.info(f"Created digest edition {edition_date} with {len(final_list)} stories.")
+        return digest_data
+
+    def update_daily_digest(self, session: Session) -> Tuple[Dict[str, Any], bool]:
+        """
+        Keep one digest per edition date up to date.
+
+        The first call of the day ranks the window in SQL. Later calls only load
+        articles analyzed since the edition's watermark, merge them into the stored
+        ranking and bump `version`; nothing is written when the result is unchanged.
+        Returns the digest and whether a new version was written.
+        """
+        edition_date = datetime.utcnow().date()
+        edition = session.query(DailyDigest).filter(DailyDigest.edition_date == edition_date).first()
+        if edition is None:
+            digest_data = self._build_edition(session, edition_date)
+            return digest_data, bool(digest_data)
+
+        cutoff = datetime.utcnow() - timedelta(hours=DIGEST_WINDOW_HOURS)
+        # Read first and merge only up to it, so an article analyzed meanwhile is left for the next call
+        latest = session.query(func.max(VerifiedNews.analyzed_at)).scalar()
+        query = session.query(VerifiedNews).options(selectinload(VerifiedNews.raw_news)).filter(
+            VerifiedNews.analyzed_at.isnot(None),
+            VerifiedNews.analyzed_at <= latest,
+            VerifiedNews.published_at >= cutoff
+        )
+        if edition.source_watermark:
+            query = query.filter(VerifiedNews.analyzed_at > edition.source_watermark)
+        new_news = query.all()
+
+        current = load_digest(edition) or {}
+        if not new_news:
+            if latest and (edition.source_watermark is None or latest > edition.source_watermark):
+                # Only articles outside the window were analyzed (e.g. old ones re-analyzed):
+                # move past them so the pipeline's dirty check sees the digest as current
+                edition.source_watermark = latest
+                session.commit()
+            return current, False
+
+        candidates = {c[0]: c for c in current.get("ranking", [])}
+        brief_candidates = {c[0]: c for c in current.get("brief_ranking", [])}
+        titles = {b["id"]: b["title"] for b in current.get("brief", [])}
+        entries = self._entries_from(current)
+        for news in new_news:
+            # Re-analyzed articles replace their previous ranking and entry. A story
+            # whose score drops can let through one that was cut earlier only on
+            # the next full build (the first run of the following edition).
+            key = self._rank_key(news)
+            candidates[news.id] = key
+            brief_candidates[news.id] = key[:3]
+            titles[news.id] = news.title
+            entries[news.id] = self._entry(news)
+
+        digest_data = self._assemble(session, edition_date, candidates.values(), entries,
+                                     brief_candidates.values(), titles)
+        edition.source_watermark = latest
+
+        unchanged = all(digest_data[k] == current.get(k) for k in digest_data if k != "generated_at")
+        if unchanged:
+            # New articles did not make the cut: only advance the watermark
+            session.commit()
+            return current, False
+
+        store_digest(edition, digest_data)
+        edition.version = (edition.version or 1) + 1
         session.commit()
-        
+        logger.info(f"Merged {len(new_news)} new articles into edition {edition_date} (v{edition.version}).")
+        return digest_data, True
+
+    def create_daily_digest(self, session: Session) -> Dict[str, Any]:
+        """
+        Gather verified news from the last DIGEST_WINDOW_HOURS, rank them, and
+        update today's digest edition.
+        """
+        digest_data, _ = self.update_daily_digest(session)
         return digest_data
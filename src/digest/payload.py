@@ -0,0 +1,173 @@
+"""
+Compact storage format for digest content.
+
+Format 1 (legacy) repeats every article dict in `top_stories` and
+`categories` and keeps all 14 category lists. Format 2 stores each article
+once under short keys and the sections as id lists:
+
+    {"v": 2, "date": ..., "insight": ..., "generated_at": ...,
+     "a": {"<id>": {"t": title, "u": url, ...}},
+     "top": [ids], "brief": [ids], "cats": {category: [ids]},
+     "rk": ranking, "br": brief ranking}
+
+Null fields and empty categories are omitted. `decode_digest` turns either
+format back into the full dict the templates and generator use.
+
+For storage the payload can also be serialized as MessagePack and/or zlib
+compressed into `DailyDigest.content_blob` (DIGEST_STORAGE_FORMAT).
+"""
+import json
+import zlib
+import logging
+from typing import Any, Dict, Optional
+
+from src.config.settings import DIGEST_STORAGE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+STORAGE_FORMATS = ("json", "json+zlib", "msgpack", "msgpack+zlib")
+
+# Stable short keys. Never reuse a key for a different field.
+FIELD_KEYS = {
+    "title": "t",
+    "url": "u",
+    "source_name": "s",
+    "published_at": "p",
+    "image_url": "m",
+    "why": "w",
+    "affected": "a",
+    "short_impact": "si",
+    "long_impact": "li",
+    "tags": "g",
+    "bias": "b",
+    "summary": "sm",
+    "category": "c",
+}
+
+_MSGPACK_INITIALIZED = False
+_HAS_MSGPACK = False
+
+def _check_msgpack():
+    global _MSGPACK_INITIALIZED, _HAS_MSGPACK
+    if _MSGPACK_INITIALIZED:
+        return _HAS_MSGPACK
+
+    try:
+        import msgpack
+        _HAS_MSGPACK = True
+    except Exception:
+        logger.warning("msgpack not installed; digests are stored as JSON.")
+        _HAS_MSGPACK = False
+
+    _MSGPACK_INITIALIZED = True
+    return _HAS_MSGPACK
+
+def _compact(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {FIELD_KEYS[k]: v for k, v in entry.items() if k in FIELD_KEYS and v is not None}
+
+def _expand(article: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: article.get(short) for name, short in FIELD_KEYS.items()}
+
+def encode_digest(digest: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a full digest dict (format 1) into format 2."""
+    if not digest or digest.get("v") == FORMAT_VERSION:
+        return digest
+
+    articles: Dict[str, Dict[str, Any]] = {}
+    cats = {}
+    for cat, items in digest.get("categories", {}).items():
+        if items:
+            cats[cat] = [item["id"] for item in items]
+        for item in items:
+            articles[str(item["id"])] = _compact({**item, "category": cat})
+    for story in digest.get("top_stories", []):
+        key = str(story["id"])
+        if key not in articles:
+            articles[key] = _compact({**story, "summary": story.get("bullets"),
+                                      "category": story.get("category")})
+    for item in digest.get("brief", []):
+        articles.setdefault(str(item["id"]), {"t": item["title"]})
+
+    return {
+        "v": FORMAT_VERSION,
+        "date": digest.get("date"),
+        "insight": digest.get("insight"),
+        "generated_at": digest.get("generated_at"),
+        "a": articles,
+        "top": [s["id"] for s in digest.get("top_stories", [])],
+        "brief": [b["id"] for b in digest.get("brief", [])],
+        "cats": cats,
+        "rk": digest.get("ranking", []),
+        "br": digest.get("brief_ranking", []),
+    }
+
+def decode_digest(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Full digest dict from either format. Legacy payloads are returned as is."""
+    if not payload or payload.get("v") != FORMAT_VERSION:
+        return payload
+
+    # Imported here: the generator imports this module
+    from src.digest.generator import MANDATORY_CATEGORIES
+
+    articles = {int(k): v for k, v in payload["a"].items()}
+
+    def story(news_id):
+        entry = _expand(articles[news_id])
+        return {"id": news_id, **{k: v for k, v in entry.items() if k not in ("summary", "category")}}
+
+    categories = {cat: [] for cat in MANDATORY_CATEGORIES}
+    for cat, ids in payload.get("cats", {}).items():
+        categories[cat] = [{**story(i), "summary": articles[i].get("sm")} for i in ids]
+
+    return {
+        "date": payload.get("date"),
+        "top_stories": [
+            {**story(i), "bullets": articles[i].get("sm"), "category": articles[i].get("c") or "General"}
+            for i in payload.get("top", [])
+        ],
+        "brief": [{"id": i, "title": articles[i].get("t")} for i in payload.get("brief", [])],
+        "categories": categories,
+        "insight": payload.get("insight"),
+        "generated_at": payload.get("generated_at"),
+        "ranking": payload.get("rk", []),
+        "brief_ranking": payload.get("br", []),
+    }
+
+def serialize(payload: Dict[str, Any], storage_format: str) -> bytes:
+    if storage_format.startswith("msgpack") and _check_msgpack():
+        import msgpack
+        data = msgpack.packb(payload, use_bin_type=True)
+    else:
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(data, 6) if storage_format.endswith("+zlib") else data
+
+def deserialize(data: bytes, storage_format: str) -> Dict[str, Any]:
+    if storage_format.endswith("+zlib"):
+        data = zlib.decompress(data)
+    if storage_format.startswith("msgpack"):
+        import msgpack
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+def store_digest(row, digest: Dict[str, Any], storage_format: str = DIGEST_STORAGE_FORMAT):
+    """Write `digest` to a DailyDigest row in format 2 using the configured storage format."""
+    payload = encode_digest(digest)
+    if storage_format == "json" or storage_format not in STORAGE_FORMATS:
+        row.content_json = payload
+        row.content_blob = None
+        row.content_format = "json"
+        return
+    if storage_format.startswith("msgpack") and not _check_msgpack():
+        storage_format = storage_format.replace("msgpack", "json")
+    row.content_json = None
+    row.content_blob = serialize(payload, storage_format)
+    row.content_format = storage_format
+
+def load_digest(row) -> Optional[Dict[str, Any]]:
+    """Full digest dict of a DailyDigest row, whatever format it was stored in."""
+    if row is None:
+        return None
+    if row.content_blob is not None and row.content_format in STORAGE_FORMATS:
+        return decode_digest(deserialize(row.content_blob, row.content_format))
+    return decode_digest(row.content_json)
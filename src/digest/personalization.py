@@ -0,0 +1,204 @@
+"""
+Per-user digests derived from one shared candidate set per edition.
+
+Each edition version gets a single ranked list of candidate stories. Every
+category is a bit; an article's mask has its category bit, a user's mask is
+the OR of the categories they follow ("All" sets every bit). A user's digest
+is the first PERSONAL_DIGEST_SIZE candidates whose mask intersects theirs,
+minus stories in their ReadHistory.
+
+Users are grouped by mask, so the match matrix has one row per distinct
+subscription set rather than per user. Only users who have read one of the
+candidates get their own row. Selections are stored as packed bits over the
+candidate list: about 64 bytes per distinct row for 500 candidates.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.database.models import DailyDigest, Subscription, ReadHistory
+from src.digest.generator import DigestGenerator, MANDATORY_CATEGORIES
+from src.config.settings import PERSONAL_DIGEST_SIZE, PERSONAL_CANDIDATES
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_BITS = {cat: 1 << i for i, cat in enumerate(MANDATORY_CATEGORIES)}
+OTHER_BIT = 1 << len(MANDATORY_CATEGORIES)
+ALL_BITS = (OTHER_BIT << 1) - 1
+
+# Indexes kept for the latest edition versions
+MAX_CACHED_EDITIONS = 2
+
+def category_bit(category: Optional[str]) -> int:
+    return CATEGORY_BITS.get(category, OTHER_BIT)
+
+def subscription_mask(categories: Iterable[str]) -> int:
+    """Mask for a user's followed categories. No subscriptions means everything."""
+    mask = 0
+    for cat in categories:
+        if cat == "All":
+            return ALL_BITS
+        mask |= category_bit(cat)
+    return mask or ALL_BITS
+
+class PersonalDigestIndex:
+    """Personal selections for one edition version."""
+
+    def __init__(self, article_ids: List[int], article_categories: List[Optional[str]],
+                 limit: int = PERSONAL_DIGEST_SIZE):
+        import numpy as np
+
+        self.article_ids = np.asarray(article_ids, dtype=np.int64)
+        self.article_masks = np.asarray([category_bit(c) for c in article_categories], dtype=np.uint32)
+        self.position = {int(a): i for i, a in enumerate(article_ids)}
+        self.limit = limit
+
+        self._group_of: Dict[int, int] = {}
+        self._group_bits = np.zeros((0, 0), dtype=np.uint8)
+        self._reader_of: Dict[int, int] = {}
+        self._reader_bits = np.zeros((0, 0), dtype=np.uint8)
+        # Users computed one at a time after a read or subscription change
+        self._overrides: Dict[int, List[int]] = {}
+        self._default = self.article_ids[:limit].tolist()
+        self._lock = threading.Lock()
+
+    def _first_matches(self, match):
+        """Keep the first `limit` True columns of each row."""
+        import numpy as np
+        return match & (np.cumsum(match, axis=1) <= self.limit)
+
+    def _match(self, masks):
+        return (masks[:, None] & self.article_masks[None, :]) != 0
+
+    def build(self, user_ids, user_masks, read_pairs: List[Tuple[int, int]]):
+        """
+        Compute every user's selection in one pass.
+        `user_ids`/`user_masks` are parallel arrays; `read_pairs` are
+        (user_id, news_id) rows already limited to the candidate ids.
+        """
+        import numpy as np
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        user_masks = np.asarray(user_masks, dtype=np.uint32)
+        groups, group_index = np.unique(user_masks, return_inverse=True)
+        match = self._match(groups)
+        self._group_bits = np.packbits(self._first_matches(match), axis=1)
+        self._group_of = dict(zip(user_ids.tolist(), group_index.tolist()))
+
+        known = [(u, self.position[n]) for u, n in read_pairs if n in self.position]
+        if not known:
+            return self
+
+        pairs = np.asarray(known, dtype=np.int64)
+        readers, reader_index = np.unique(pairs[:, 0], return_inverse=True)
+        # Readers without subscriptions follow everything: point them at an all-True row
+        match = np.vstack([match, np.ones((1, match.shape[1]), dtype=bool)])
+        reader_groups = np.asarray([self._group_of.get(int(u), -1) for u in readers], dtype=np.int64)
+        rows = match[reader_groups]
+        rows[reader_index, pairs[:, 1]] = False
+        self._reader_bits = np.packbits(self._first_matches(rows), axis=1)
+        self._reader_of = {int(u): i for i, u in enumerate(readers)}
+        return self
+
+    def _unpack(self, bits) -> List[int]:
+        import numpy as np
+        selected = np.unpackbits(bits, count=len(self.article_ids)).astype(bool)
+        return self.article_ids[selected].tolist()
+
+    def ids_for(self, user_id: int) -> List[int]:
+        """Story ids of a user's digest, in rank order."""
+        with self._lock:
+            override = self._overrides.get(user_id)
+        if override is not None:
+            return override
+        if user_id in self._reader_of:
+            return self._unpack(self._reader_bits[self._reader_of[user_id]])
+        if user_id in self._group_of:
+            return self._unpack(self._group_bits[self._group_of[user_id]])
+        return self._default
+
+    def recompute_user(self, user_id: int, mask: int, read_ids: Iterable[int]) -> List[int]:
+        """Refresh one user after their reads or subscriptions changed."""
+        import numpy as np
+
+        row = self._match(np.asarray([mask], dtype=np.uint32))
+        positions = [self.position[n] for n in read_ids if n in self.position]
+        row[0, positions] = False
+        ids = self.article_ids[self._first_matches(row)[0]].tolist()
+        with self._lock:
+            self._overrides[user_id] = ids
+        return ids
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "candidates": len(self.article_ids),
+            "users": len(self._group_of),
+            "subscription_groups": len(self._group_bits),
+            "readers": len(self._reader_of),
+            "overrides": len(self._overrides),
+            "bytes": int(self._group_bits.nbytes + self._reader_bits.nbytes)
+        }
+
+def _user_masks(session: Session):
+    """Parallel arrays of user ids and subscription masks."""
+    masks: Dict[int, int] = {}
+    for user_id, category in session.query(Subscription.user_id, Subscription.category).all():
+        if category == "All":
+            masks[user_id] = ALL_BITS
+        else:
+            masks[user_id] = masks.get(user_id, 0) | category_bit(category)
+    return list(masks.keys()), list(masks.values())
+
+def build_personal_index(session: Session) -> PersonalDigestIndex:
+    """Rank the shared candidates once and select every subscribed user's digest."""
+    candidates = DigestGenerator().ranked_candidates(session, PERSONAL_CANDIDATES)
+    index = PersonalDigestIndex([c.id for c in candidates], [c.category for c in candidates])
+
+    user_ids, user_masks = _user_masks(session)
+    read_pairs = session.query(ReadHistory.user_id, ReadHistory.news_id).filter(
+        ReadHistory.news_id.in_(list(index.position))
+    ).all() if candidates else []
+    index.build(user_ids, user_masks, [tuple(p) for p in read_pairs])
+    logger.info(f"Personal digests built: {index.stats()}")
+    return index
+
+class PersonalDigestCache:
+    """Indexes per (digest id, version), built on first use."""
+
+    def __init__(self, max_editions: int = MAX_CACHED_EDITIONS):
+        self.max_editions = max_editions
+        self._indexes: "OrderedDict[tuple, PersonalDigestIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session: Session) -> Tuple[Optional[tuple], Optional[PersonalDigestIndex]]:
+        latest = session.query(DailyDigest.id, DailyDigest.version).order_by(DailyDigest.date.desc()).first()
+        if not latest:
+            return None, None
+        key = (latest[0], latest[1])
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return key, self._indexes[key]
+            # Built under the lock so concurrent first requests share one build
+            index = build_personal_index(session)
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_editions:
+                self._indexes.popitem(last=False)
+        return key, index
+
+    def refresh_user(self, session: Session, user_id: int):
+        """Re-select one user in the cached indexes after a read or subscription change."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        if not indexes:
+            return
+        categories = [c for (c,) in session.query(Subscription.category).filter(Subscription.user_id == user_id).all()]
+        read_ids = [n for (n,) in session.query(ReadHistory.news_id).filter(ReadHistory.user_id == user_id).all()]
+        mask = subscription_mask(categories)
+        for index in indexes:
+            index.recompute_user(user_id, mask, read_ids)
+
+personal_digests = PersonalDigestCache()
@@ -0,0 +1,196 @@
+"""
+Durable job queue stored in the application database.
+
+Request handlers call `enqueue` and return the job id straight away; a
+`JobWorker` in the worker process (or the embedded scheduler) claims jobs
+and runs them. A claim is a conditional UPDATE that takes a lease on the
+job. The worker extends the lease while the job runs, so a job whose worker
+died is picked up again once its lease expires. Failed jobs are retried
+with backoff up to `max_attempts`.
+"""
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from src.config.settings import JOB_LEASE_SECONDS, JOB_POLL_SECONDS, JOB_MAX_ATTEMPTS
+from src.database.models import SessionLocal, Job
+from src.scheduler.lease import default_holder
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Seconds before retry n (1-based); the last value repeats
+RETRY_BACKOFF = [30, 120, 600]
+# Candidates examined per claim when other workers win the race
+CLAIM_CANDIDATES = 5
+
+def enqueue(db: Session, kind: str, payload: Optional[Dict[str, Any]] = None, coalesce: bool = True) -> Job:
+    """
+    Add a job. With `coalesce`, a job of the same kind that is still waiting
+    is returned instead, so repeated triggers do not stack up.
+    """
+    if coalesce:
+        waiting = db.query(Job).filter(Job.kind == kind, Job.status == QUEUED).order_by(Job.id).first()
+        if waiting:
+            return waiting
+    job = Job(kind=kind, payload=payload or {}, status=QUEUED, max_attempts=JOB_MAX_ATTEMPTS,
+              created_at=datetime.utcnow(), run_after=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == QUEUED, Job.run_after <= now),
+        # Worker died mid-run: its lease ran out without a heartbeat
+        and_(Job.status == RUNNING, Job.lease_expires_at < now)
+    )
+
+def claim(db: Session, worker_id: str, kinds: List[str], lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+    """Lease the oldest runnable job of one of `kinds`, or return None."""
+    now = datetime.utcnow()
+    candidates = [i for (i,) in db.query(Job.id).filter(
+        Job.kind.in_(kinds), _claimable(now)
+    ).order_by(Job.id).limit(CLAIM_CANDIDATES).all()]
+
+    for job_id in candidates:
+        # Only one worker's UPDATE can match while the job is still claimable
+        result = db.execute(
+            update(Job).where(Job.id == job_id, _claimable(now)).values(
+                status=RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                started_at=now,
+                attempts=Job.attempts + 1
+            )
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(Job, job_id)
+    return None
+
+def extend_lease(db: Session, job_id: int, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+    result = db.execute(
+        update(Job).where(Job.id == job_id, Job.lease_owner == worker_id, Job.status == RUNNING).values(
+            lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def _finish(db: Session, job_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+    # Guarded by the owner: a worker whose job was reclaimed must not overwrite the new run
+    result = db.execute(
+        update(Job).where(Job.id == job_id, Job.lease_owner == worker_id, Job.status == RUNNING).values(
+            lease_owner=None, lease_expires_at=None, **values
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def complete(db: Session, job: Job, worker_id: str, result: Any = None) -> bool:
+    return _finish(db, job.id, worker_id, {"status": SUCCEEDED, "result": result, "finished_at": datetime.utcnow()})
+
+def fail(db: Session, job: Job, worker_id: str, error: str) -> bool:
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BACKOFF[min(job.attempts, len(RETRY_BACKOFF)) - 1]
+        return _finish(db, job.id, worker_id, {
+            "status": QUEUED, "error": error, "run_after": datetime.utcnow() + timedelta(seconds=delay)
+        })
+    return _finish(db, job.id, worker_id, {"status": FAILED, "error": error, "finished_at": datetime.utcnow()})
+
+def job_status(db: Session, job_id: int) -> Optional[Dict[str, Any]]:
+    job = db.get(Job, job_id)
+    if not job:
+        return None
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "run_after": job.run_after.isoformat() if job.status == QUEUED and job.run_after else None,
+        "result": job.result,
+        "error": job.error
+    }
+
+class JobWorker:
+    """Claims and runs jobs for the kinds in `handlers` until stopped."""
+
+    def __init__(self, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 lease_seconds: float = JOB_LEASE_SECONDS, poll_seconds: float = JOB_POLL_SECONDS):
+        self.handlers = handlers
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = default_holder()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _keep_alive(self, job_id: int, done: threading.Event):
+        while not done.wait(self.lease_seconds / 3):
+            db = SessionLocal()
+            try:
+                if not extend_lease(db, job_id, self.worker_id, self.lease_seconds):
+                    logger.warning(f"Job {job_id} lease lost; another worker may run it again.")
+                    return
+            except Exception as e:
+                logger.error(f"Job {job_id} heartbeat failed: {e}")
+            finally:
+                db.close()
+
+    def run_once(self) -> bool:
+        """Run one job if any is runnable. Returns False when the queue was empty."""
+        db = SessionLocal()
+        try:
+            job = claim(db, self.worker_id, list(self.handlers), self.lease_seconds)
+            if not job:
+                return False
+
+            logger.info(f"Job {job.id} ({job.kind}) started, attempt {job.attempts}/{job.max_attempts}.")
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self._keep_alive, args=(job.id, done), daemon=True)
+            heartbeat.start()
+            try:
+                result = self.handlers[job.kind](job.payload or {})
+                complete(db, job, self.worker_id, result)
+                logger.info(f"Job {job.id} ({job.kind}) succeeded.")
+            except Exception as e:
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+                db.rollback()
+                fail(db, job, self.worker_id, "".join(traceback.format_exception_only(type(e), e)).strip())
+            finally:
+                done.set()
+                heartbeat.join()
+            return True
+        finally:
+            db.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker error: {e}", exc_info=True)
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="job-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,167 @@
+"""
+Database-backed leases for cross-process coordination.
+
+A lease is a row in `scheduler_leases` owned by one holder until
+`expires_at`. Acquiring is a single conditional UPDATE: it succeeds when the
+row is free, expired, or already ours. A background heartbeat extends the
+lease every TTL/3 seconds. If the holder crashes, the heartbeats stop and any
+other process can take the lease once the TTL has passed. `token` increases
+on every change of owner, so a stale holder can tell it was replaced.
+
+Expiry uses each node's UTC clock, so clocks must agree to well within the TTL.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from src.config.settings import LEASE_TTL_SECONDS
+from src.database.models import SessionLocal, SchedulerLease
+
+def default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class Lease:
+    def __init__(self, name: str, ttl: float = LEASE_TTL_SECONDS, holder: Optional[str] = None,
+                 on_lost: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or default_holder()
+        self.on_lost = on_lost
+        self.held = False
+        # Local monotonic deadline of the last successful take or renewal
+        self._held_until = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def try_acquire(self) -> bool:
+        """Take or extend the lease. True if this holder owns it afterwards."""
+        # Taken before the write, so the local deadline never outlives the one stored
+        deadline = time.monotonic() + self.ttl
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=self.ttl)
+        ours = SchedulerLease.holder == self.holder
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name,
+                       or_(ours, SchedulerLease.holder == None, SchedulerLease.expires_at < now))
+                .values(
+                    acquired_at=case((ours, SchedulerLease.acquired_at), else_=now),
+                    token=case((ours, SchedulerLease.token), else_=SchedulerLease.token + 1),
+                    holder=self.holder,
+                    heartbeat_at=now,
+                    expires_at=expires
+                )
+            )
+            db.commit()
+            if result.rowcount == 0:
+                if db.get(SchedulerLease, self.name) is not None:
+                    return self._set_held(False)
+                db.add(SchedulerLease(name=self.name, holder=self.holder, token=1,
+                                      acquired_at=now, heartbeat_at=now, expires_at=expires))
+                db.commit()
+            self._held_until = deadline
+            return self._set_held(True)
+        except IntegrityError:
+            # Another process inserted the row first
+            db.rollback()
+            return self._set_held(False)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Lease '{self.name}' heartbeat failed: {e}")
+            # Still ours until the last renewal runs out; after that another process may have it
+            return self._set_held(self.held and time.monotonic() < self._held_until)
+        finally:
+            db.close()
+
+    def _set_held(self, held: bool) -> bool:
+        if held and not self.held:
+            logger.info(f"Lease '{self.name}' acquired by {self.holder}.")
+        elif self.held and not held:
+            logger.warning(f"Lease '{self.name}' lost by {self.holder}.")
+            if self.on_lost:
+                self.on_lost()
+        self.held = held
+        return held
+
+    def release(self):
+        """Give the lease up immediately so another process can take it."""
+        self.stop_heartbeat()
+        if not self.held:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(holder=None, expires_at=datetime.utcnow())
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Lease '{self.name}' release failed: {e}")
+        finally:
+            db.close()
+            self.held = False
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            self.try_acquire()
+
+    def start_heartbeat(self):
+        """Keep trying to take, then keep renewing, the lease in a daemon thread."""
+        if self._thread:
+            return
+        self._stop.clear()
+        self.try_acquire()
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    @contextmanager
+    def hold(self):
+        """Yield True with the lease held and heartbeating, or False if someone else has it."""
+        if not self.try_acquire():
+            yield False
+            return
+        self.start_heartbeat()
+        try:
+            yield True
+        finally:
+            self.release()
+
+def lease_status() -> List[Dict[str, Any]]:
+    """Every lease row with its remaining time, for monitoring."""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        return [
+            {
+                "name": lease.name,
+                "holder": lease.holder,
+                "token": lease.token,
+                "acquired_at": lease.acquired_at.isoformat() if lease.acquired_at else None,
+                "heartbeat_at": lease.heartbeat_at.isoformat() if lease.heartbeat_at else None,
+                "expires_at": lease.expires_at.isoformat() if lease.expires_at else None,
+                "active": bool(lease.holder and lease.expires_at and lease.expires_at > now),
+                "expires_in_seconds": round((lease.expires_at - now).total_seconds(), 1) if lease.expires_at else None
+            }
+            for lease in db.query(SchedulerLease).order_by(SchedulerLease.name).all()
+        ]
+    finally:
+        db.close()
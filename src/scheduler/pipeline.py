@@ -0,0 +1,465 @@
+"""
+Staged news cycle.
+
+Collection, verification, analysis and publishing run as stages connected by
+bounded queues, each with its own worker threads. Feeds are fetched
+concurrently and an article is analyzed as soon as its feed has been
+verified, instead of after every source has returned. A full queue blocks
+the stage feeding it (backpressure), so a slow LLM backlog throttles
+collection rather than piling work up in memory.
+
+End of input flows through the queues as a sentinel: when the last worker of
+a stage exits it passes one sentinel per downstream worker. `stop()` ends
+every stage at its next queue operation, e.g. on application shutdown.
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer_group
+
+from src.config.settings import (
+    PIPELINE_QUEUE_SIZE, PIPELINE_COLLECT_WORKERS, PIPELINE_ANALYZE_WORKERS,
+    PIPELINE_VERIFY_BATCH, PIPELINE_PUBLISH_INTERVAL, COLLECTOR_SHARDING
+)
+from src.database.models import SessionLocal, RawNews, VerifiedNews, DailyDigest
+from src.scheduler.lease import default_holder
+from src.scheduler.work_claims import claim_items, release_items
+from src.collectors.sharding import collection_tasks
+
+_STOP = object()
+# How often blocked workers re-check the stop flag
+POLL_SECONDS = 0.5
+
+# Fallback-analyzed articles retried per cycle once the LLM is reachable again
+REANALYZE_BATCH = 20
+# Times one article is handed back to the LLM before its fallback analysis is kept
+REANALYZE_MAX_RETRIES = 3
+# Fallback reasons that mean the provider was unavailable, so a retry can succeed.
+# An invalid response or a missing key would fail the same way again.
+REANALYZE_REASONS = ("quota", "rate_limit", "transient", "circuit open", "circuit half_open")
+
+class Stage:
+    """
+    A pool of worker threads reading from `inbox` and writing to `outbox`.
+    `handler` takes a list of up to `batch_size` items and returns the
+    items to pass downstream.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], Iterable[Any]], workers: int = 1,
+                 batch_size: int = 1, on_finish: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.on_finish = on_finish
+        self.inbox: Optional[queue.Queue] = None
+        self.outbox: Optional[queue.Queue] = None
+        self.downstream_workers = 0
+
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.first_output_s = None
+        self.finished_s = None
+        self._active = workers
+        self._lock = threading.Lock()
+
+    def _get(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                return self.inbox.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _put(self, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                self.outbox.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_batch(self, stop: threading.Event):
+        """Block for one item, then take whatever else is already queued. Returns (batch, saw_stop)."""
+        item = self._get(stop)
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def run_worker(self, pipeline: "Pipeline"):
+        stop = pipeline.stop_event
+        done = False
+        while not done:
+            batch, done = self._next_batch(stop)
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                outputs = list(self.handler(batch) or [])
+            except Exception as e:
+                logger.error(f"Stage '{self.name}' failed on {len(batch)} items: {e}", exc_info=True)
+                outputs = []
+                with self._lock:
+                    self.errors += len(batch)
+            with self._lock:
+                self.items_in += len(batch)
+                self.busy_seconds += time.perf_counter() - started
+
+            for output in outputs:
+                if self.outbox is not None and not self._put(output, stop):
+                    break
+                with self._lock:
+                    self.items_out += 1
+                    if self.first_output_s is None:
+                        self.first_output_s = time.perf_counter() - pipeline.started
+        self._worker_exited(pipeline)
+
+    def _worker_exited(self, pipeline: "Pipeline"):
+        with self._lock:
+            self._active -= 1
+            last = self._active == 0
+        if not last:
+            return
+
+        stop = pipeline.stop_event
+        if self.on_finish and not stop.is_set():
+            try:
+                self.on_finish()
+            except Exception as e:
+                logger.error(f"Stage '{self.name}' finish hook failed: {e}", exc_info=True)
+        self.finished_s = time.perf_counter() - pipeline.started
+        if self.outbox is not None:
+            for _ in range(self.downstream_workers):
+                self._put(_STOP, stop)
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        active_seconds = self.finished_s or wall_seconds
+        return {
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "throughput_per_s": round(self.items_in / active_seconds, 2) if active_seconds else 0.0,
+            "first_output_s": round(self.first_output_s, 2) if self.first_output_s is not None else None,
+            "finished_s": round(active_seconds, 2)
+        }
+
+class Pipeline:
+    """Stages chained by bounded queues. The first stage reads the inputs given to `run`."""
+
+    def __init__(self, stages: List[Stage], queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.stop_event = threading.Event()
+        self.started = None
+        stages[0].inbox = queue.Queue()
+        for upstream, downstream in zip(stages, stages[1:]):
+            link = queue.Queue(maxsize=queue_size)
+            upstream.outbox = link
+            upstream.downstream_workers = downstream.workers
+            downstream.inbox = link
+
+    def run(self, inputs: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Process `inputs` through every stage and return per-stage stats."""
+        self.started = time.perf_counter()
+        first = self.stages[0]
+        for item in inputs:
+            first.inbox.put(item)
+        for _ in range(first.workers):
+            first.inbox.put(_STOP)
+
+        threads = [
+            threading.Thread(target=stage.run_worker, args=(self,), name=f"{stage.name}-{i}", daemon=True)
+            for stage in self.stages for i in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - self.started
+        return {stage.name: stage.report(wall) for stage in self.stages}
+
+    def stop(self):
+        self.stop_event.set()
+
+def requeue_fallback_analyses(db: Session, limit: int = None) -> int:
+    """
+    Mark articles the local fallback analyzed during an LLM outage as unanalyzed so the LLM
+    retries them. Each article is retried at most REANALYZE_MAX_RETRIES times; the least
+    retried, longest waiting articles go first so repeat failures cannot fill every batch.
+    """
+    retries = func.coalesce(VerifiedNews.analysis["retries"].as_integer(), 0)
+    query = db.query(VerifiedNews).filter(
+        VerifiedNews.analysis["mode"].as_string() == "fallback",
+        VerifiedNews.analysis["fallback_reason"].as_string().in_(REANALYZE_REASONS),
+        retries < REANALYZE_MAX_RETRIES
+    ).order_by(retries, VerifiedNews.analyzed_at, VerifiedNews.id)
+    if limit:
+        query = query.limit(limit)
+
+    requeued = query.all()
+    for news in requeued:
+        news.impact_score = None
+        news.analysis = {**news.analysis, "retries": news.analysis.get("retries", 0) + 1}
+    db.commit()
+    return len(requeued)
+
+def apply_analysis(news: VerifiedNews, result: Dict[str, Any]):
+    """Copy an LLMAnalyzer result onto a VerifiedNews row."""
+    news.summary_bullets = result.get("summary_bullets", [])
+    news.why_it_matters = result.get("why_it_matters", "")
+    news.who_is_affected = result.get("who_is_affected", "")
+    news.short_term_impact = result.get("short_term_impact", "")
+    news.long_term_impact = result.get("long_term_impact", "")
+    news.sentiment = result.get("sentiment", "Neutral")
+    news.impact_tags = result.get("impact_tags", [])
+    news.bias_rating = result.get("bias_rating", "Neutral")
+    news.impact_score = result.get("impact_score", 5)
+    # Record how the article was analyzed so fallback results can be redone later
+    news.analysis = {
+        **(news.analysis or {}),
+        "mode": result.get("analysis_mode", "llm"),
+        "fallback_reason": result.get("fallback_reason")
+    }
+
+    # Robust Classification: Override LLM category based on Source ID if known
+    cat = result.get("category", "General")
+    if news.raw_news and news.raw_news.source_id:
+        sid = news.raw_news.source_id.lower()
+        if "sport" in sid or "espn" in sid:
+            cat = "Sports"
+        elif "tech" in sid or "wired" in sid:
+            cat = "Technology"
+        elif "politics" in sid or "politico" in sid:
+            cat = "Politics"
+        elif "business" in sid or "cnbc" in sid or "wsj" in sid:
+            cat = "Business & Economy"
+        elif "world" in sid or "aljazeera" in sid:
+            cat = "World News"
+        elif "india" in sid or "ndtv" in sid:
+            cat = "India / Local News"
+        elif "science" in sid or "webmd" in sid or "nasa" in sid:
+            cat = "Science & Health"
+        elif "education" in sid or "chronicle" in sid:
+            cat = "Education"
+        elif "variety" in sid or "hollywood" in sid:
+            cat = "Entertainment"
+        elif "mit" in sid or "ai" in sid:
+            cat = "AI & Machine Learning"
+        elif "grist" in sid or "natgeo" in sid or "earth" in sid:
+            cat = "Environment & Climate"
+        elif "lifestyle" in sid or "travel" in sid:
+            cat = "Lifestyle & Wellness"
+        elif "defense" in sid or "military" in sid:
+            cat = "Defense & Security"
+
+    news.category = cat
+    news.analyzed_at = datetime.utcnow()
+
+def deliver_digest(db: Session, digest: Dict[str, Any]):
+    """Send the daily brief and the top story alerts for a new digest version."""
+    from src.delivery.notifications import NotificationManager
+
+    # Send Daily Brief
+    if digest and "brief" in digest:
+        NotificationManager.send_daily_brief(db, digest["brief"])
+
+    # Notify for top stories in the digest
+    if digest and "top_stories" in digest:
+         for story in digest["top_stories"][:2]: # Notify top 2 for brevity
+             NotificationManager.notify_subscribers(db, story.get("category", "General"), story["title"], story["url"])
+
+class NewsPipeline:
+    """
+    The news cycle as four stages:
+
+        collect (one task per source) -> verify -> analyze -> publish
+
+    Collect tasks return new RawNews ids. Verify promotes them and passes on
+    the VerifiedNews ids still awaiting analysis. Analyze writes the LLM
+    result per article. Publish merges analyzed articles into today's digest
+    every PIPELINE_PUBLISH_INTERVAL seconds and once at the end, delivering
+    notifications only when the digest changed.
+
+    Verify and analyze claim their rows first (see work_claims), so several
+    pipelines can share a backlog and a restarted one resumes where the
+    last stopped: verification commits once per batch, analysis once per
+    article, each together with releasing the claim.
+
+    Stages only do work when their input changed: unchanged feeds answer a
+    conditional GET with 304, verify and analyze only see new or unfinished
+    rows, and publish is skipped while the digest's watermark is at the
+    newest analysis. The verification model is loaded on first use, so an
+    idle cycle costs a handful of queries.
+    """
+
+    def __init__(self):
+        from src.collectors.news_api import NewsCollector
+        from src.collectors.rss_collector import RSSCollector
+        from src.analysis.llm_analyzer import LLMAnalyzer
+        from src.digest.generator import DigestGenerator
+
+        self.api_collector = NewsCollector()
+        self.rss_collector = RSSCollector()
+        self._verifier = None
+        self.analyzer = LLMAnalyzer()
+        self.generator = DigestGenerator()
+        self.worker_id = default_holder()
+        self._last_publish = time.monotonic()
+        self._publish_lock = threading.Lock()
+        self.published_versions = 0
+        self.skipped: Dict[str, str] = {}
+
+        self.pipeline = Pipeline([
+            Stage("collect", self._collect, workers=PIPELINE_COLLECT_WORKERS),
+            Stage("verify", self._verify, workers=1, batch_size=PIPELINE_VERIFY_BATCH),
+            Stage("analyze", self._analyze, workers=PIPELINE_ANALYZE_WORKERS),
+            Stage("publish", self._on_analyzed, workers=1, batch_size=PIPELINE_QUEUE_SIZE, on_finish=self._publish)
+        ])
+
+    @property
+    def verifier(self):
+        # Only the verify stage's single worker calls this, so no lock is needed
+        if self._verifier is None:
+            from src.verification.verifier import VerificationEngine
+            self._verifier = VerificationEngine()
+        return self._verifier
+
+    def _tasks(self) -> List[Callable[[], List[int]]]:
+        # Leftovers from an interrupted cycle go first so they are not starved by new items
+        tasks = [self._pending]
+        if COLLECTOR_SHARDING:
+            # Collector nodes fetch the feeds; the cycle processes what they saved
+            return tasks
+        return tasks + list(collection_tasks(self.api_collector, self.rss_collector).values())
+
+    def _pending(self) -> List[int]:
+        """RawNews ids not yet verified, or verified but still awaiting analysis."""
+        db = SessionLocal()
+        try:
+            unprocessed = [i for (i,) in db.query(RawNews.id).filter(RawNews.processed == False).all()]
+            unanalyzed = [i for (i,) in db.query(VerifiedNews.raw_news_id).filter(VerifiedNews.impact_score == None).all()]
+            return unprocessed + unanalyzed
+        finally:
+            db.close()
+
+    def _collect(self, tasks: List[Callable[[], List[int]]]) -> List[int]:
+        ids = []
+        for task in tasks:
+            ids.extend(task())
+        return ids
+
+    def _verify(self, raw_ids: List[int]) -> List[int]:
+        db = SessionLocal()
+        try:
+            claimed = claim_items(db, RawNews, RawNews.processed == False, self.worker_id, ids=raw_ids)
+            if claimed:
+                try:
+                    self.verifier.verify_batch(db, claimed)
+                finally:
+                    release_items(db, RawNews, claimed, self.worker_id)
+            # Already verified rows pass straight through to analysis
+            return [i for (i,) in db.query(VerifiedNews.id).filter(
+                VerifiedNews.raw_news_id.in_(raw_ids), VerifiedNews.impact_score == None
+            ).all()]
+        finally:
+            db.close()
+
+    def _analyze(self, news_ids: List[int]) -> List[int]:
+        db = SessionLocal()
+        claimed = []
+        analyzed = []
+        try:
+            claimed = claim_items(db, VerifiedNews, VerifiedNews.impact_score == None, self.worker_id, ids=news_ids)
+            for news in db.query(VerifiedNews).options(undefer_group("article_text")) \
+                    .filter(VerifiedNews.id.in_(claimed)).order_by(VerifiedNews.id).all():
+                result = self.analyzer.analyze_article(news.title, news.content)
+                apply_analysis(news, result)
+                # The result and the end of the claim are committed together
+                news.claimed_by = None
+                news.claim_expires_at = None
+                db.commit()
+                analyzed.append(news.id)
+            return analyzed
+        finally:
+            # Hand back anything left unfinished by an error or shutdown
+            leftover = [i for i in claimed if i not in analyzed]
+            if leftover:
+                db.rollback()
+                release_items(db, VerifiedNews, leftover, self.worker_id)
+            db.close()
+
+    def _on_analyzed(self, news_ids: List[int]) -> List[int]:
+        if time.monotonic() - self._last_publish >= PIPELINE_PUBLISH_INTERVAL:
+            self._publish()
+        return news_ids
+
+    def _publish(self):
+        with self._publish_lock:
+            self._last_publish = time.monotonic()
+            db = SessionLocal()
+            try:
+                reason = self._digest_current(db)
+                if reason:
+                    self.skipped["publish"] = reason
+                    return
+                self.skipped.pop("publish", None)
+                digest, changed = self.generator.update_daily_digest(db)
+                if not changed:
+                    logger.info("Digest unchanged; skipping delivery.")
+                    return
+                self.published_versions += 1
+                deliver_digest(db, digest)
+            finally:
+                db.close()
+
+    def _digest_current(self, db: Session) -> Optional[str]:
+        """Why today's digest needs no update, or None if it may."""
+        edition = db.query(DailyDigest.source_watermark).filter(
+            DailyDigest.edition_date == datetime.utcnow().date()
+        ).first()
+        if edition is None:
+            return None
+        latest = db.query(func.max(VerifiedNews.analyzed_at)).scalar()
+        if latest is None or (edition.source_watermark and latest <= edition.source_watermark):
+            return f"no articles analyzed since the digest watermark ({edition.source_watermark})"
+        return None
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        report = self.pipeline.run(self._tasks())
+        if report["verify"]["items_in"] == 0:
+            self.skipped["verify"] = "no new or unverified articles"
+        if report["analyze"]["items_in"] == 0:
+            self.skipped["analyze"] = "no articles awaiting analysis"
+        for name, reason in self.skipped.items():
+            logger.info(f"Stage {name} skipped: {reason}.")
+        for name, stats in report.items():
+            if name in self.skipped:
+                continue
+            logger.info(
+                f"Stage {name}: {stats['items_in']} in / {stats['items_out']} out, "
+                f"{stats['throughput_per_s']}/s over {stats['finished_s']}s with {stats['workers']} workers, "
+                f"first output at {stats['first_output_s']}s, {stats['errors']} errors"
+            )
+        return report
+
+    def stop(self):
+        self.pipeline.stop()
@@ -1,134 +1,119 @@
-import time
+import threading
 # import logging
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session
 
-from src.config.settings import SCHEDULE_TIME
-from src.database.models import SessionLocal, RawNews
-from src.collectors.news_api import NewsCollector
-from src.verification.verifier import VerificationEngine
-from src.analysis.llm_analyzer import LLMAnalyzer
-from src.digest.generator import DigestGenerator
-from src.database.models import VerifiedNews, RawNews
-from src.delivery.notifications import NotificationManager
+from src.config.settings import SCHEDULE_TIME, SCHEDULER_MODE, OPENAI_API_KEY, REANALYZE_INTERVAL_MINUTES
+from src.scheduler.pipeline import NewsPipeline, requeue_fallback_analyses, REANALYZE_BATCH
+from src.scheduler.lease import Lease
+from src.scheduler.job_queue import JobWorker
+from src.analysis.circuit_breaker import llm_breaker
 
 from loguru import logger
 
+_active_pipeline = None
+_active_lock = threading.Lock()
+# Held by the one process allowed to fire scheduled jobs
+_leader_lease = None
+
 def run_news_cycle():
-    logger.info("Starting Daily News Cycle...")
+    """Run one news cycle. Returns per-stage stats, or {"coalesced": True} if one was already running."""
+    global _active_pipeline
+    # One cycle at a time across all processes: a run that overlaps one in
+    # progress is folded into it instead of starting a second pipeline.
+    with Lease("news_cycle", on_lost=stop_active_cycle).hold() as acquired:
+        if not acquired:
+            logger.info("News cycle already running elsewhere; coalescing into it.")
+            return {"coalesced": True}
+
+        logger.info("Starting Daily News Cycle...")
+        try:
+            pipeline = NewsPipeline()
+            with _active_lock:
+                _active_pipeline = pipeline
+            stages = pipeline.run()
+            if SCHEDULER_MODE == "embedded":
+                # Chat retrieval runs in this process: embed the new articles now, not per request
+                from src.analysis.retrieval import warm_index
+                warm_index()
+            return {"coalesced": False, "stages": stages}
+        except Exception as e:
+            logger.error(f"Error in news cycle: {e}", exc_info=True)
+            raise
+        finally:
+            with _active_lock:
+                _active_pipeline = None
+            logger.info("News Cycle Completed.")
+
+def run_retention():
+    """Move rows past the retention window to the cold archive."""
+    from src.database.models import SessionLocal
+    from src.database.retention import apply_retention
+
     db = SessionLocal()
-    
     try:
-        # 1. Collect
-        logger.info("Step 1: Collection")
-        
-        # NewsAPI
-        api_collector = NewsCollector()
-        api_count = api_collector.fetch_recent_news()
-        
-        # RSS
-        from src.collectors.rss_collector import RSSCollector
-        rss_collector = RSSCollector()
-        rss_count = rss_collector.fetch_recent_news()
-        
-        total_count = api_count + rss_count
-        logger.info(f"Collected {total_count} new articles ({api_count} API, {rss_count} RSS).")
-        
-        if total_count == 0 and db.query(RawNews).count() == 0:
-            logger.warning("No news collected and DB is empty. Aborting cycle.")
-            return
+        counts = apply_retention(db)
+        logger.info(f"Retention run archived {counts}.")
+        return counts
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Retention run failed: {e}", exc_info=True)
+    finally:
+        db.close()
 
-        # 2. Verify
-        logger.info("Step 2: Verification")
-        verifier = VerificationEngine()
-        # Get unprocessed raw news
-        unprocessed = db.query(RawNews).filter(RawNews.processed == False).all()
-        verified_count = verifier.verify_batch(db, [n.id for n in unprocessed])
-        logger.info(f"Verified {verified_count} articles.")
-
-        # 3. Analyze
-        logger.info("Step 3: Analysis")
-        analyzer = LLMAnalyzer()
-        # Get verified but unanalyzed news (assuming we check impacts or newly created verified items)
-        # For simplicity, we just check items without analysis fields (e.g. impact_score is None)
-        unanalyzed = db.query(VerifiedNews).filter(VerifiedNews.impact_score == None).all()
-        
-        for news in unanalyzed:
-            result = analyzer.analyze_article(news.title, news.content)
-            
-            news.summary_bullets = result.get("summary_bullets", [])
-            news.why_it_matters = result.get("why_it_matters", "")
-            news.who_is_affected = result.get("who_is_affected", "")
-            news.short_term_impact = result.get("short_term_impact", "")
-            news.long_term_impact = result.get("long_term_impact", "")
-            news.sentiment = result.get("sentiment", "Neutral")
-            news.impact_tags = result.get("impact_tags", [])
-            news.bias_rating = result.get("bias_rating", "Neutral")
-            news.impact_score = result.get("impact_score", 5)
-            
-            # Robust Classification: Override LLM category based on Source ID if known
-            cat = result.get("category", "General")
-            if news.raw_news and news.raw_news.source_id:
-                sid = news.raw_news.source_id.lower()
-                if "sport" in sid or "espn" in sid:
-                    cat = "Sports"
-                elif "tech" in sid or "wired" in sid:
-                    cat = "Technology"
-                elif "politics" in sid or "politico" in sid:
-                    cat = "Politics"
-                elif "business" in sid or "cnbc" in sid or "wsj" in sid:
-                    cat = "Business & Economy"
-                elif "world" in sid or "aljazeera" in sid:
-                    cat = "World News"
-                elif "india" in sid or "ndtv" in sid:
-                    cat = "India / Local News"
-                elif "science" in sid or "webmd" in sid or "nasa" in sid:
-                    cat = "Science & Health"
-                elif "education" in sid or "chronicle" in sid:
-                    cat = "Education"
-                elif "variety" in sid or "hollywood" in sid:
-                    cat = "Entertainment"
-                elif "mit" in sid or "ai" in sid:
-                    cat = "AI & Machine Learning"
-                elif "grist" in sid or "natgeo" in sid or "earth" in sid:
-                    cat = "Environment & Climate"
-                elif "lifestyle" in sid or "travel" in sid:
-                    cat = "Lifestyle & Wellness"
-                elif "defense" in sid or "military" in sid:
-                    cat = "Defense & Security"
-            
-            news.category = cat
-            
-        db.commit()
-        logger.info(f"Analyzed {len(unanalyzed)} articles.")
-
-        # 4. Generate Digest
-        logger.info("Step 4: Digest Generation")
-        generator = DigestGenerator()
-        digest = generator.create_daily_digest(db)
-        logger.info("Digest generated.")
-
-        # 5. Deliver
-        logger.info("Step 5: Delivery - sending notifications...")
-        from src.delivery.notifications import NotificationManager
-        
-        # 5a. Send Daily Brief
-        if digest and "brief" in digest:
-            NotificationManager.send_daily_brief(db, digest["brief"])
-
-        # 5b. Notify for top stories in the digest
-        if digest and "top_stories" in digest:
-             for story in digest["top_stories"][:2]: # Notify top 2 for brevity
-                 NotificationManager.notify_subscribers(db, story.get("category", "General"), story["title"], story["url"])
+def run_reanalysis():
+    """
+    Hand a batch of outage fallback analyses back to the LLM once it is reachable.
+    Kept out of the news cycle so a cycle with no new articles stays read-only.
+    """
+    from src.database.models import SessionLocal
 
+    if not OPENAI_API_KEY or llm_breaker.state != "closed":
+        return 0
+    db = SessionLocal()
+    try:
+        requeued = requeue_fallback_analyses(db, limit=REANALYZE_BATCH)
+        if requeued:
+            logger.info(f"Re-queued {requeued} fallback-analyzed articles for LLM analysis.")
+        return requeued
     except Exception as e:
-        logger.error(f"Error in news cycle: {e}", exc_info=True)
+        db.rollback()
+        logger.error(f"Re-queueing fallback analyses failed: {e}", exc_info=True)
     finally:
         db.close()
-        logger.info("News Cycle Completed.")
+
+# Queued job kinds and what runs them; payloads are unused so far
+JOB_HANDLERS = {
+    "news_cycle": lambda payload: run_news_cycle(),
+}
+
+def start_job_worker() -> JobWorker:
+    """Drain jobs enqueued by the cron and manual trigger endpoints."""
+    return JobWorker(JOB_HANDLERS).start()
+
+def _leader_only(job):
+    """Scheduled jobs fire in every process but only run in the lease holder."""
+    def run():
+        if _leader_lease is None or not _leader_lease.held:
+            logger.debug(f"Not the scheduler leader; skipping {job.__name__}.")
+            return
+        job()
+    run.__name__ = job.__name__
+    return run
+
+def stop_active_cycle():
+    """Ask a running news cycle to stop at its next queue operation."""
+    with _active_lock:
+        if _active_pipeline is not None:
+            logger.info("Stopping running news cycle...")
+            _active_pipeline.stop()
 
 def start_scheduler():
-    scheduler = BackgroundScheduler()
+    global _leader_lease
+    _leader_lease = Lease("scheduler")
+    _leader_lease.start_heartbeat()
+
+    # max_instances=1 + coalesce: a late or overlapping trigger collapses into one run
+    scheduler = BackgroundScheduler(job_defaults={"max_instances": 1, "coalesce": True})
     # Parse time "06:00"
     hour, minute = map(int, SCHEDULE_TIME.split(":"))
     
@@ -136,11 +121,11 @@ def start_scheduler():
     from datetime import datetime, timedelta
     # Run immediately (after 10s buffer) + every 2 minutes
     run_date = datetime.now() + timedelta(seconds=10)
-    scheduler.add_job(run_news_cycle, 'interval', minutes=2, next_run_time=run_date)
+    scheduler.add_job(_leader_only(run_news_cycle), 'interval', minutes=2, next_run_time=run_date)
     
     # Daily Newspaper Update at 6:30 AM IST
     scheduler.add_job(
-        run_news_cycle, 
+        _leader_only(run_news_cycle), 
         'cron', 
         hour=6, 
         minute=30, 
@@ -148,8 +133,28 @@ def start_scheduler():
         id='daily_newspaper_update'
     )
     
+    # Fallback analyses go back to the LLM on their own clock; the next cycle analyzes them
+    scheduler.add_job(_leader_only(run_reanalysis), 'interval', minutes=REANALYZE_INTERVAL_MINUTES, id='reanalysis')
+
+    # Nightly retention, off-peak
+    scheduler.add_job(
+        _leader_only(run_retention),
+        'cron',
+        hour=3,
+        minute=15,
+        timezone='Asia/Kolkata',
+        id='retention'
+    )
+
     # Also add a one-off job to run immediately on startup if DB is empty for demo purposes?
     # Or just rely on manual trigger.
     
     scheduler.start()
     return scheduler
+
+def stop_scheduler(scheduler):
+    """Stop a running cycle, the scheduler, and hand leadership to another process."""
+    stop_active_cycle()
+    scheduler.shutdown()
+    if _leader_lease:
+        _leader_lease.release()
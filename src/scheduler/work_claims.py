@@ -0,0 +1,79 @@
+"""
+Per-item claims for pipeline stages.
+
+Each stage has a "done" marker on its rows (`RawNews.processed` for
+verification, `VerifiedNews.impact_score` for analysis) and a claim made of
+`claimed_by` and `claim_expires_at`. A worker claims rows before working on
+them and writes its result together with releasing the claim, so a row is
+never worked on by two workers at once and finished rows are never redone.
+Rows claimed by a worker that crashed are claimable again once the claim
+expires.
+
+On Postgres candidates are selected with FOR UPDATE SKIP LOCKED so
+concurrent claimers never wait on each other. SQLite serializes writers, so
+there a single conditional UPDATE is already atomic.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.config.settings import PIPELINE_CLAIM_SECONDS
+
+def _claimable(model, now: datetime):
+    return or_(model.claimed_by == None, model.claim_expires_at < now)
+
+def claim_items(db: Session, model, pending, owner: str, ids: Iterable[int] = None,
+                limit: int = None, lease_seconds: float = PIPELINE_CLAIM_SECONDS) -> List[int]:
+    """
+    Claim rows of `model` matching `pending` (optionally only among `ids`)
+    for `owner`. Returns the claimed ids; rows claimed by others are skipped.
+    """
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=lease_seconds)
+    conditions = [pending, _claimable(model, now)]
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return []
+        conditions.append(model.id.in_(ids))
+
+    candidates = select(model.id).where(and_(*conditions)).order_by(model.id)
+    if limit:
+        candidates = candidates.limit(limit)
+
+    try:
+        if db.bind.dialect.name == "postgresql":
+            locked = [i for (i,) in db.execute(candidates.with_for_update(skip_locked=True)).all()]
+            if not locked:
+                db.commit()
+                return []
+            db.execute(update(model).where(model.id.in_(locked)).values(claimed_by=owner, claim_expires_at=expires))
+        else:
+            db.execute(
+                update(model).where(model.id.in_(candidates.scalar_subquery()))
+                .values(claimed_by=owner, claim_expires_at=expires),
+                execution_options={"synchronize_session": False}
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return [i for (i,) in db.query(model.id).filter(
+        model.claimed_by == owner, model.claim_expires_at == expires
+    ).order_by(model.id).all()]
+
+def release_items(db: Session, model, ids: Iterable[int], owner: str) -> int:
+    """Drop `owner`'s claims on `ids` so the rows can be picked up again straight away."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    result = db.execute(
+        update(model).where(model.id.in_(ids), model.claimed_by == owner)
+        .values(claimed_by=None, claim_expires_at=None),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount
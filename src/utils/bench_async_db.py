@@ -0,0 +1,180 @@
+"""
+Route database access: sync session in the threadpool vs async session.
+
+Runs the queries behind the digest and saved-articles routes at increasing
+concurrency, first the old way (sync session inside run_in_threadpool) and
+then on the async session the routes now use, and prints throughput and
+latency for each. Each request also waits --latency-ms inside the database
+(a sleep function on SQLite, pg_sleep on Postgres), standing in for the
+network round trips of a hosted database. With --blockers, that many slow
+calls (standing in for chat and LLM requests) hold threadpool workers during
+the second run, as they do in production; threadpool routes then queue
+behind them, async routes do not.
+
+By default it seeds a scratch SQLite database; with --configured it reads
+DATABASE_URL (read-only queries, nothing is written apart from pending
+migrations).
+
+Usage: python -m src.utils.bench_async_db [--requests 400] [--latency-ms 5] [--blockers 40] [--configured]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, date
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000)
+    return ms
+
+def _install_sleep(sync_engine):
+    from sqlalchemy import event
+
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect",
+                     lambda dbapi_connection, record: dbapi_connection.create_function("bench_sleep", 1, _sleep_ms))
+        sync_engine.dispose()
+
+def _statements(dialect, user_id, latency_ms):
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import selectinload
+    from src.database.models import DailyDigest, SavedArticle, VerifiedNews
+
+    wait = func.pg_sleep(latency_ms / 1000) if dialect == "postgresql" else func.bench_sleep(latency_ms)
+    return [
+        select(wait),
+        select(DailyDigest).order_by(DailyDigest.date.desc()).limit(1),
+        select(SavedArticle).options(selectinload(SavedArticle.news).selectinload(VerifiedNews.raw_news))
+        .where(SavedArticle.user_id == user_id),
+    ]
+
+def _seed(articles):
+    from src.database.models import SessionLocal, User, RawNews, VerifiedNews, SavedArticle, DailyDigest
+
+    db = SessionLocal()
+    user = User(firebase_uid="bench")
+    db.add(user)
+    now = datetime.utcnow()
+    for i in range(articles):
+        raw = RawNews(title=f"Story {i}", url=f"https://news.example.com/{i}", source_name="Example Wire",
+                      content=f"Body of story {i}. " * 40, published_at=now, processed=True)
+        db.add(raw)
+        db.flush()
+        news = VerifiedNews(raw_news_id=raw.id, title=raw.title, content=raw.content, category="World News",
+                            published_at=now, impact_score=5, summary_bullets=["a", "b", "c"])
+        db.add(news)
+        db.flush()
+        if i % 4 == 0:
+            db.add(SavedArticle(user_id=user.id, news_id=news.id))
+    db.add(DailyDigest(edition_date=date.today(), content_json={"date": str(date.today())}, version=1))
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+async def _sync_request(statements):
+    from fastapi.concurrency import run_in_threadpool
+    from src.database.models import SessionLocal
+
+    def work():
+        db = SessionLocal()
+        try:
+            return [db.execute(s).scalars().all() for s in statements]
+        finally:
+            db.close()
+
+    return await run_in_threadpool(work)
+
+async def _async_request(statements):
+    from src.database.async_session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return [(await db.execute(s)).scalars().all() for s in statements]
+
+async def _run(request, statements, total, concurrency, blockers):
+    from fastapi.concurrency import run_in_threadpool
+
+    stop = asyncio.Event()
+
+    async def blocker():
+        while not stop.is_set():
+            await run_in_threadpool(time.sleep, 2)
+
+    background = [asyncio.create_task(blocker()) for _ in range(blockers)]
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            await request(statements)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*background)
+    return total / wall, latencies
+
+async def _bench(args, user_id):
+    from src.database import async_session
+    from src.database.models import engine
+
+    if not async_session._check_async():
+        raise SystemExit("Async driver unavailable; install aiosqlite or asyncpg.")
+    _install_sleep(engine)
+    _install_sleep(async_session.async_engine.sync_engine)
+    statements = _statements(engine.dialect.name, user_id, args.latency_ms)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    modes = {"threadpool": _sync_request, "async": _async_request}
+
+    for blockers in sorted({0, args.blockers}):
+        print(f"\n{blockers} blocking calls holding threadpool workers")
+        print(f"{'mode':<11} {'concurrency':>11} {'req/s':>9} {'p50':>9} {'p95':>9}")
+        for name, request in modes.items():
+            await request(statements)  # warm the pool
+            for level in levels:
+                rate, latencies = await _run(request, statements, args.requests, level, blockers)
+                print(f"{name:<11} {level:>11} {rate:>9.0f} {_percentile(latencies, 50):>7.1f}ms "
+                      f"{_percentile(latencies, 95):>7.1f}ms")
+    await async_session.dispose_async_engine()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="requests per mode and concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--latency-ms", type=float, default=5, help="database wait per request")
+    parser.add_argument("--blockers", type=int, default=40, help="slow threadpool calls during the second run")
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--configured", action="store_true", help="use DATABASE_URL instead of a scratch database")
+    args = parser.parse_args()
+
+    if not args.configured:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/async_bench.db"
+    from src.database.models import engine, init_db, SessionLocal, User
+    init_db()
+    if args.configured:
+        db = SessionLocal()
+        user = db.query(User.id).first()
+        db.close()
+        user_id = user.id if user else 0
+    else:
+        user_id = _seed(args.articles)
+
+    print("=" * 60)
+    print(f"ROUTE DB ACCESS  {engine.dialect.name}  {args.requests} requests per level, {args.latency_ms:g}ms latency")
+    print("=" * 60)
+    asyncio.run(_bench(args, user_id))
+
+if __name__ == "__main__":
+    main()
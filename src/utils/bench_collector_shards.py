@@ -0,0 +1,50 @@
+"""
+Collector shard balance check.
+
+Places the configured feeds on a hash ring of 1..N nodes and prints the
+largest share per node (the poll time of one round scales with it) and how
+many feeds move when a node joins. With --live, prints the collector nodes
+currently holding leases in DATABASE_URL and the feeds each one owns; start
+a few `COLLECTOR_SHARDING=true python main.py collector` processes first.
+
+Usage: python -m src.utils.bench_collector_shards [--nodes 8] [--live]
+"""
+import argparse
+
+from src.collectors.sharding import HashRing, live_members
+from src.collectors.rss_collector import RSS_FEEDS
+
+NEWSAPI_CATEGORIES = ['business', 'technology', 'science', 'health']
+
+def feed_keys():
+    return [f"newsapi:{cat}" for cat in NEWSAPI_CATEGORIES] + [f"rss:{name}" for name in RSS_FEEDS]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    keys = feed_keys()
+    if args.live:
+        members = live_members()
+        print(f"{len(members)} live collectors, {len(keys)} feeds")
+        for node, owned in HashRing(members).assign(keys).items():
+            print(f"  {node}: {len(owned)} feeds  {', '.join(owned)}")
+        return
+
+    print("=" * 60)
+    print(f"SHARD BALANCE  {len(keys)} feeds")
+    print("=" * 60)
+    print(f"{'nodes':>5} {'max share':>10} {'ideal':>7} {'moved on join':>14}")
+    previous = None
+    for n in range(1, args.nodes + 1):
+        ring = HashRing([f"node-{i}" for i in range(n)])
+        shares = ring.assign(keys)
+        owners = {key: node for node, owned in shares.items() for key in owned}
+        moved = sum(owners[k] != previous[k] for k in keys) if previous else 0
+        print(f"{n:>5} {max(len(v) for v in shares.values()):>10} {len(keys) / n:>7.1f} {moved:>14}")
+        previous = owners
+
+if __name__ == "__main__":
+    main()
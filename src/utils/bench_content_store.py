@@ -0,0 +1,141 @@
+"""
+Database size and scan cost with article text inline vs in article_contents.
+
+Seeds the same synthetic articles into two scratch SQLite databases: one at
+migration 0002, with the text on raw_news and verified_news rows, and one at
+head, with the text compressed and shared in article_contents. Each
+database is vacuumed before it is measured. Reports file size, pages per
+table and rows per page (from dbstat), plus the time of the scans that
+listing, dedup and digest queries do over raw_news and verified_news.
+
+Usage: python -m src.utils.bench_content_store [--articles 5000] [--words 350] [--rounds 20]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from src.database.engine import make_engine
+from src.database.models import MIGRATIONS_DIR, RawNews, VerifiedNews
+
+SYLLABLES = "ka lo mi ner sta por ti vel an dus cor ment ra gi on pre sul tra bi ex".split()
+
+def _vocabulary(rng, size=3000):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(size)]
+
+def _body(rng, vocabulary, words):
+    # Zipf-like word frequencies, roughly like news prose
+    picks = [vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)] for _ in range(words)]
+    return ". ".join(" ".join(picks[i:i + 18]).capitalize() for i in range(0, words, 18)) + "."
+
+def _articles(count, words):
+    rng = random.Random(11)
+    vocabulary = _vocabulary(rng)
+    now = datetime.utcnow()
+    for i in range(count):
+        body = _body(rng, vocabulary, words)
+        yield {
+            "id": i + 1, "title": _body(rng, vocabulary, 10), "url": f"https://news.example.com/{i}",
+            "source_name": "Example Wire", "published_at": now - timedelta(minutes=i),
+            "content": body, "description": body[:500] + "...",
+            # Most collected articles are promoted with the same body
+            "verified": rng.random() < 0.7,
+        }
+
+def _migrate(engine, revision):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+def _seed_inline(engine, articles):
+    with engine.begin() as conn:
+        for a in articles:
+            conn.execute(text(
+                "INSERT INTO raw_news (id, title, url, source_name, published_at, content, description, processed) "
+                "VALUES (:id, :title, :url, :source_name, :published_at, :content, :description, 1)"), a)
+            if a["verified"]:
+                conn.execute(text(
+                    "INSERT INTO verified_news (id, raw_news_id, title, content, category, published_at, impact_score) "
+                    "VALUES (:id, :id, :title, :content, 'World News', :published_at, 5)"), a)
+
+def _seed_store(engine, articles):
+    session = sessionmaker(bind=engine)()
+    for a in articles:
+        session.add(RawNews(id=a["id"], title=a["title"], url=a["url"], source_name=a["source_name"],
+                            published_at=a["published_at"], content=a["content"], description=a["description"],
+                            processed=True))
+        if a["verified"]:
+            session.add(VerifiedNews(id=a["id"], raw_news_id=a["id"], title=a["title"], content=a["content"],
+                                     category="World News", published_at=a["published_at"], impact_score=5))
+    session.commit()
+    session.close()
+
+SCANS = {
+    # Row scans the hot queries do without reading the article text
+    "raw dedup scan": "SELECT id, url, title FROM raw_news WHERE source_name != 'none'",
+    "digest window": "SELECT id, title, impact_score FROM verified_news WHERE category != 'none' ORDER BY published_at DESC",
+}
+
+def measure(path, engine, rounds):
+    with engine.begin() as conn:
+        conn.execute(text("VACUUM"))
+    engine.dispose()
+    with engine.connect() as conn:
+        pages = dict(conn.execute(text("SELECT name, COUNT(*) FROM dbstat GROUP BY name")).all())
+        rows = {t: conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar() for t in ("raw_news", "verified_news")}
+        timings = {}
+        for name, sql in SCANS.items():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                conn.execute(text(sql)).all()
+            timings[name] = (time.perf_counter() - started) * 1000 / rounds
+    engine.dispose()
+    return {"size": os.path.getsize(path), "pages": pages, "rows": rows, "timings": timings}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=350, help="words per article body")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    articles = list(_articles(args.articles, args.words))
+    layouts = {"inline": ("0002", _seed_inline), "store": ("head", _seed_store)}
+    results = {}
+    for name, (revision, seed) in layouts.items():
+        path = f"{tempfile.mkdtemp()}/{name}.db"
+        engine = make_engine(f"sqlite:///{path}")
+        _migrate(engine, revision)
+        seed(engine, articles)
+        results[name] = measure(path, engine, args.rounds)
+
+    inline, store = results["inline"], results["store"]
+    print("=" * 78)
+    print(f"ARTICLE TEXT STORAGE  {args.articles} articles, ~{args.words} words each")
+    print("=" * 78)
+    print(f"{'':<28} {'inline':>12} {'store':>12} {'change':>10}")
+    print(f"{'database size (KiB)':<28} {inline['size'] / 1024:>12.0f} {store['size'] / 1024:>12.0f} "
+          f"{(store['size'] / inline['size'] - 1) * 100:>9.0f}%")
+    for table in ("raw_news", "verified_news", "article_contents"):
+        before, after = inline["pages"].get(table, 0), store["pages"].get(table, 0)
+        print(f"{table + ' pages':<28} {before:>12} {after:>12}")
+    for table in ("raw_news", "verified_news"):
+        before = inline["rows"][table] / max(inline["pages"].get(table, 1), 1)
+        after = store["rows"][table] / max(store["pages"].get(table, 1), 1)
+        print(f"{table + ' rows/page':<28} {before:>12.1f} {after:>12.1f} {after / before:>9.1f}x")
+    for name in SCANS:
+        before, after = inline["timings"][name], store["timings"][name]
+        print(f"{name + ' (ms)':<28} {before:>12.2f} {after:>12.2f} {before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
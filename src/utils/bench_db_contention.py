@@ -0,0 +1,125 @@
+"""
+SQLite read/write contention benchmark.
+
+One writer thread inserts and commits articles in small transactions (like
+the pipeline) while reader threads run dashboard-style queries, against a
+temporary database opened with the stock engine and then with the profile
+from src/database/engine.py. Prints throughput, read latency and lock
+errors for each.
+
+Usage: python -m src.utils.bench_db_contention [--seconds 5] [--readers 4] [--rows 2000]
+"""
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, RawNews, VerifiedNews
+from src.database.engine import make_engine
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _seed(Session, rows):
+    db = Session()
+    now = datetime.utcnow()
+    for i in range(rows):
+        raw = RawNews(title=f"Seed {i}", url=f"https://seed.example/{i}", content="x" * 400,
+                      published_at=now - timedelta(minutes=i), processed=True)
+        db.add(raw)
+        db.flush()
+        db.add(VerifiedNews(raw_news_id=raw.id, title=raw.title, content=raw.content, category="World News",
+                            published_at=raw.published_at, impact_score=i % 10, analyzed_at=now))
+    db.commit()
+    db.close()
+
+def run(engine, seconds, readers, rows):
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    _seed(Session, rows)
+
+    stop = threading.Event()
+    stats = {"writes": 0, "write_errors": 0, "reads": 0, "read_errors": 0, "read_ms": []}
+    lock = threading.Lock()
+
+    def writer():
+        db = Session()
+        i = 0
+        while not stop.is_set():
+            try:
+                db.add(RawNews(title=f"New {i}", url=f"https://new.example/{time.time_ns()}",
+                               content="y" * 400, published_at=datetime.utcnow()))
+                db.commit()
+                with lock:
+                    stats["writes"] += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    stats["write_errors"] += 1
+            i += 1
+        db.close()
+
+    def reader():
+        db = Session()
+        cutoff = datetime.utcnow() - timedelta(days=1)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                db.query(VerifiedNews).filter(VerifiedNews.published_at >= cutoff) \
+                    .order_by(VerifiedNews.impact_score.desc()).limit(20).all()
+                db.query(RawNews).filter(RawNews.processed == False).count()
+                db.commit()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats["reads"] += 1
+                    stats["read_ms"].append(elapsed)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    stats["read_errors"] += 1
+        db.close()
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    profiles = {
+        "stock": lambda path: create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}),
+        "tuned": lambda path: make_engine(f"sqlite:///{path}"),
+    }
+
+    print("=" * 78)
+    print(f"SQLITE CONTENTION  {args.seconds:.0f}s, 1 writer + {args.readers} readers, {args.rows} seeded rows")
+    print("=" * 78)
+    print(f"{'profile':<8} {'writes/s':>9} {'reads/s':>9} {'read p50':>9} {'read p95':>9} {'read p99':>9} {'lock errors':>12}")
+    for name, factory in profiles.items():
+        path = f"{tempfile.mkdtemp()}/contention.db"
+        stats = run(factory(path), args.seconds, args.readers, args.rows)
+        errors = stats["write_errors"] + stats["read_errors"]
+        print(f"{name:<8} {stats['writes'] / args.seconds:>9.0f} {stats['reads'] / args.seconds:>9.0f} "
+              f"{_percentile(stats['read_ms'], 50):>7.1f}ms {_percentile(stats['read_ms'], 95):>7.1f}ms "
+              f"{_percentile(stats['read_ms'], 99):>7.1f}ms {errors:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Size and encode/decode benchmark for digest payload formats.
+
+Generates a day of synthetic analyzed articles in a scratch SQLite database,
+builds the digest, then compares the legacy full JSON (format 1) with the
+normalized format 2 under each storage format.
+
+Usage: python -m src.utils.bench_digest_payload [--articles 300] [--rounds 200]
+"""
+import json
+import random
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, RawNews, VerifiedNews
+from src.digest.generator import DigestGenerator, MANDATORY_CATEGORIES
+from src.digest.payload import encode_digest, decode_digest, serialize, deserialize, STORAGE_FORMATS, _check_msgpack
+
+WORDS = ("market policy election climate study court league launch model vaccine budget "
+         "outage merger strike treaty satellite drought tariff chip startup").split()
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+def _full_digest(article_count: int):
+    rng = random.Random(3)
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    now = datetime.utcnow()
+    for i in range(article_count):
+        raw = RawNews(title=_sentence(rng, 8), url=f"https://news.example.com/{i}", source_name="Example Wire",
+                      url_to_image=f"https://img.example.com/{i}.jpg", published_at=now)
+        session.add(raw)
+        session.flush()
+        session.add(VerifiedNews(
+            raw_news_id=raw.id, title=raw.title, category=rng.choice(MANDATORY_CATEGORIES),
+            summary_bullets=[_sentence(rng, 14) for _ in range(3)], why_it_matters=_sentence(rng, 20),
+            who_is_affected=_sentence(rng, 6), short_term_impact=_sentence(rng, 12),
+            long_term_impact=_sentence(rng, 12), impact_tags=rng.sample(WORDS, 2), bias_rating="Neutral",
+            impact_score=rng.randint(1, 10), credibility_score=rng.random(), published_at=now, analyzed_at=now
+        ))
+    session.commit()
+    digest, _ = DigestGenerator().update_daily_digest(session)
+    session.close()
+    return digest
+
+def _time_ms(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) * 1000 / rounds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    digest = _full_digest(args.articles)
+    compact = encode_digest(digest)
+    if decode_digest(compact) != digest:
+        print("(!) format 2 does not round-trip to the full digest")
+
+    rows = []
+    legacy = json.dumps(digest).encode("utf-8")
+    rows.append(("format 1 json", len(legacy),
+                 _time_ms(lambda: json.dumps(digest), args.rounds),
+                 _time_ms(lambda: json.loads(legacy), args.rounds)))
+    for storage_format in STORAGE_FORMATS:
+        if storage_format.startswith("msgpack") and not _check_msgpack():
+            continue
+        data = serialize(compact, storage_format)
+        rows.append((
+            f"format 2 {storage_format}", len(data),
+            _time_ms(lambda: serialize(encode_digest(digest), storage_format), args.rounds),
+            _time_ms(lambda: decode_digest(deserialize(data, storage_format)), args.rounds)
+        ))
+
+    print("=" * 70)
+    print(f"DIGEST PAYLOAD BENCH  stories={len(digest['ranking'])}  rounds={args.rounds}")
+    print("=" * 70)
+    print(f"{'format':<26}{'bytes':>10}{'vs f1':>8}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_ms, decode_ms in rows:
+        print(f"{name:<26}{size:>10}{size / len(legacy):>8.0%}{encode_ms:>12.3f}{decode_ms:>12.3f}")
+    print("format 2 times include normalization; decode rebuilds the full dict.")
+
+if __name__ == "__main__":
+    main()
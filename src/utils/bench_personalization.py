@@ -0,0 +1,84 @@
+"""
+Benchmark for personalized digest selection.
+
+Builds a PersonalDigestIndex over synthetic candidates, subscriptions and
+read history in memory, then reports build time, per-user lookup latency
+and index size. Also checks a sample of users against a plain Python
+filter.
+
+Usage: python -m src.utils.bench_personalization [--users 100000] [--candidates 500]
+"""
+import random
+import argparse
+import time
+
+from src.digest.generator import MANDATORY_CATEGORIES
+from src.digest.personalization import PersonalDigestIndex, subscription_mask, category_bit
+
+def _synthetic(users: int, candidates: int, seed: int = 7):
+    rng = random.Random(seed)
+    categories = MANDATORY_CATEGORIES + ["General"]
+    article_ids = list(range(1, candidates + 1))
+    article_categories = [rng.choice(categories) for _ in article_ids]
+
+    user_ids, masks, reads = [], [], []
+    for user_id in range(1, users + 1):
+        follows = ["All"] if rng.random() < 0.2 else rng.sample(MANDATORY_CATEGORIES, rng.randint(1, 4))
+        user_ids.append(user_id)
+        masks.append(subscription_mask(follows))
+        # A third of users have read a few of today's stories
+        if rng.random() < 0.33:
+            reads.extend((user_id, a) for a in rng.sample(article_ids[:100], rng.randint(1, 5)))
+    return article_ids, article_categories, user_ids, masks, reads
+
+def _reference(article_ids, article_categories, mask, read_ids, limit):
+    selected = []
+    for article_id, cat in zip(article_ids, article_categories):
+        if len(selected) == limit:
+            break
+        if category_bit(cat) & mask and article_id not in read_ids:
+            selected.append(article_id)
+    return selected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    article_ids, article_categories, user_ids, masks, reads = _synthetic(args.users, args.candidates)
+
+    start = time.perf_counter()
+    index = PersonalDigestIndex(article_ids, article_categories, limit=args.limit)
+    index.build(user_ids, masks, reads)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        index.ids_for(user_id)
+    lookup_us = (time.perf_counter() - start) * 1e6 / len(user_ids)
+
+    reads_by_user = {}
+    for user_id, news_id in reads:
+        reads_by_user.setdefault(user_id, set()).add(news_id)
+    sample = random.Random(1).sample(range(len(user_ids)), min(2000, len(user_ids)))
+    mismatches = sum(
+        index.ids_for(user_ids[i]) != _reference(article_ids, article_categories, masks[i],
+                                                 reads_by_user.get(user_ids[i], set()), args.limit)
+        for i in sample
+    )
+
+    stats = index.stats()
+    print("=" * 66)
+    print(f"PERSONALIZATION BENCH  users={args.users}  candidates={args.candidates}  limit={args.limit}")
+    print("=" * 66)
+    print(f"Build (all users):     {build_ms:10.1f} ms")
+    print(f"Lookup per user:       {lookup_us:10.1f} us")
+    print(f"Subscription groups:   {stats['subscription_groups']:10d}")
+    print(f"Users with own row:    {stats['readers']:10d}")
+    print(f"Selection storage:     {stats['bytes'] / 1024:10.1f} KiB")
+    print(f"Mismatches vs Python:  {mismatches:10d} / {len(sample)}")
+
+if __name__ == "__main__":
+    main()
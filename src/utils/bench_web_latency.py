@@ -0,0 +1,61 @@
+"""
+Web latency probe.
+
+Sends concurrent GET requests to a running server and prints latency
+percentiles. Run it once while idle and once while `python main.py worker`
+(or an embedded scheduler) is in a news cycle to compare p95. With
+--conditional, requests carry the ETag of a first response in If-None-Match,
+like a browser revalidating a cached page (e.g. /dashboard).
+
+Usage: python -m src.utils.bench_web_latency [--url http://localhost:8000/health] [--requests 500] [--concurrency 10] [--conditional]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/health")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--conditional", action="store_true", help="revalidate with the first response's ETag")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    headers = {}
+    if args.conditional:
+        etag = session.get(args.url, timeout=30).headers.get("ETag")
+        if etag:
+            headers["If-None-Match"] = etag
+
+    def probe(_):
+        start = time.perf_counter()
+        response = session.get(args.url, headers=headers, timeout=30)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(probe, range(args.requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [ms for ms, _ in results]
+    errors = sum(1 for _, status in results if status >= 500)
+    print("=" * 60)
+    print(f"WEB LATENCY  {args.url}  n={args.requests}  concurrency={args.concurrency}")
+    print("=" * 60)
+    print(f"p50: {_percentile(latencies, 50):8.1f} ms")
+    print(f"p95: {_percentile(latencies, 95):8.1f} ms")
+    print(f"p99: {_percentile(latencies, 99):8.1f} ms")
+    print(f"throughput: {args.requests / wall:8.1f} req/s, 5xx: {errors}")
+    if args.conditional:
+        not_modified = sum(1 for _, status in results if status == 304)
+        print(f"304 Not Modified: {not_modified} of {args.requests}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Offline evaluation and latency benchmark for chat retrieval.
+
+Loads the labelled set in retrieval_eval.json into a scratch SQLite database,
+then reports recall@k, MRR and latency percentiles for the lexical, semantic
+and hybrid retrieval modes. Filler rows can be added to see how latency
+behaves as the table grows.
+
+Usage: python -m src.utils.eval_retrieval [--k 5] [--scales 0,1000,10000]
+"""
+import os
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+import json
+import random
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, VerifiedNews
+from src.database.fulltext import install_fulltext_index
+from src.analysis.embeddings import get_embedding_model
+from src.analysis.retrieval import HybridRetriever, SemanticIndex
+
+EVAL_SET_PATH = Path(__file__).with_name("retrieval_eval.json")
+MODES = ["lexical", "semantic", "hybrid"]
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _load_corpus(session, articles, filler_count):
+    now = datetime.utcnow()
+    key_to_id = {}
+    for a in articles:
+        news = VerifiedNews(title=a["title"], content=a["content"], category=a["category"],
+                            summary_bullets=[], published_at=now)
+        session.add(news)
+        session.flush()
+        key_to_id[a["key"]] = news.id
+
+    # Filler is built from the same vocabulary so it competes for matches
+    vocabulary = " ".join(a["title"] + " " + a["content"] for a in articles).split()
+    rng = random.Random(42)
+    for i in range(filler_count):
+        session.add(VerifiedNews(
+            title=" ".join(rng.sample(vocabulary, 8)),
+            content=" ".join(rng.sample(vocabulary, 40)),
+            category="Other",
+            summary_bullets=[],
+            published_at=now - timedelta(minutes=i % 1440)
+        ))
+    session.commit()
+    return key_to_id
+
+def evaluate(k: int, filler_count: int):
+    eval_set = json.loads(EVAL_SET_PATH.read_text())
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/eval.db")
+        Base.metadata.create_all(bind=engine)
+        install_fulltext_index(engine)
+        session = sessionmaker(bind=engine)()
+        key_to_id = _load_corpus(session, eval_set["articles"], filler_count)
+
+        # No latency budget here: every mode must run in full to be measured
+        retriever = HybridRetriever(index=SemanticIndex(), budget_ms=float("inf"))
+        retriever.index.refresh(session)
+
+        report = {}
+        for mode in MODES:
+            recalls, reciprocal_ranks, latencies = [], [], []
+            for item in eval_set["queries"]:
+                relevant = {key_to_id[key] for key in item["relevant"]}
+                start = time.perf_counter()
+                results = retriever.search(session, item["query"], k=k, mode=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                ids = [n.id for n, _ in results]
+                recalls.append(len(relevant & set(ids)) / len(relevant))
+                rank = next((i + 1 for i, news_id in enumerate(ids) if news_id in relevant), None)
+                reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+            report[mode] = {
+                "recall": sum(recalls) / len(recalls),
+                "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+                "p50_ms": _percentile(latencies, 50),
+                "p95_ms": _percentile(latencies, 95)
+            }
+        session.close()
+        engine.dispose()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--scales", default="0,1000", help="comma separated filler row counts")
+    args = parser.parse_args()
+
+    if get_embedding_model() is None:
+        print("(!) sentence-transformers unavailable: semantic mode returns nothing, hybrid equals lexical.")
+
+    for filler_count in [int(s) for s in args.scales.split(",")]:
+        report = evaluate(args.k, filler_count)
+        print("=" * 66)
+        print(f"RETRIEVAL EVAL  k={args.k}  filler rows={filler_count}")
+        print("=" * 66)
+        print(f"{'mode':<10}{'recall@k':>12}{'MRR':>10}{'p50 ms':>12}{'p95 ms':>12}")
+        for mode, m in report.items():
+            print(f"{mode:<10}{m['recall']:>12.3f}{m['mrr']:>10.3f}{m['p50_ms']:>12.2f}{m['p95_ms']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Index check for the hot queries.
+
+Runs EXPLAIN on each query the pipeline and endpoints issue on every cycle
+or request and fails (exit 1) if any of them does not use an index. By
+default it checks a fresh SQLite database built by the migrations; with
+--configured it checks DATABASE_URL instead (EXPLAIN only, nothing is
+written apart from pending migrations). On Postgres sequential scans are
+disabled for the check, so small tables still show whether an index can be
+used.
+
+The same check runs in tests/test_hot_query_indexes.py.
+
+Usage: python -m src.utils.explain_hot_queries [--configured]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+def hot_queries():
+    from sqlalchemy import select
+    from src.database.models import RawNews, VerifiedNews, DailyDigest, ReadHistory, SavedArticle, Job
+
+    cutoff = datetime.utcnow() - timedelta(hours=24)
+    return {
+        "verification backlog": (
+            "raw_news", select(RawNews.id).where(RawNews.processed == False)),
+        "analysis backlog": (
+            "verified_news", select(VerifiedNews.raw_news_id).where(VerifiedNews.impact_score == None)),
+        "digest window": (
+            "verified_news", select(VerifiedNews.id, VerifiedNews.impact_score).where(VerifiedNews.published_at >= cutoff)),
+        "latest digest": (
+            "daily_digests", select(DailyDigest.id).order_by(DailyDigest.date.desc()).limit(1)),
+        "read history": (
+            "read_history", select(ReadHistory.news_id).where(ReadHistory.user_id == 1)
+            .order_by(ReadHistory.read_at.desc())),
+        "saved lookup": (
+            "saved_articles", select(SavedArticle.id).where(SavedArticle.user_id == 1, SavedArticle.news_id == 1)),
+        "job claim": (
+            "jobs", select(Job.id).where(Job.kind == "news_cycle", Job.status == "queued").order_by(Job.id).limit(5)),
+    }
+
+def query_plan(connection, statement) -> List[str]:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+
+def uses_index(dialect: str, table: str, plan: List[str]) -> bool:
+    if dialect == "sqlite":
+        steps = [step for step in plan if f" {table} " in f" {step} "]
+        return bool(steps) and all("USING" in step for step in steps)
+    return any("Index" in step for step in plan)
+
+def check_plans(connection) -> Dict[str, Tuple[bool, List[str]]]:
+    """Plan of each hot query and whether it uses an index."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.exec_driver_sql("SET enable_seqscan = off")
+    results = {}
+    for name, (table, statement) in hot_queries().items():
+        plan = query_plan(connection, statement)
+        results[name] = (uses_index(dialect, table, plan), plan)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configured", action="store_true", help="check DATABASE_URL instead of a fresh database")
+    args = parser.parse_args()
+
+    if not args.configured:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/explain.db"
+    from src.database.models import engine, upgrade_schema
+    upgrade_schema()
+
+    with engine.connect() as connection:
+        results = check_plans(connection)
+    failures = sum(not ok for ok, _ in results.values())
+    print("=" * 78)
+    print(f"HOT QUERY PLANS  {engine.dialect.name}")
+    print("=" * 78)
+    for name, (ok, plan) in results.items():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        for step in plan:
+            print(f"       {step}")
+    print(f"\n{failures} of {len(results)} queries without an index")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Text helpers shared by search and summarization, free of database imports.
+"""
+
+# Words that carry no meaning for matching or salience
+STOPWORDS = {
+    "a", "about", "above", "after", "again", "against", "all", "am", "an", "and", "any", "are",
+    "as", "at", "be", "because", "been", "before", "being", "below", "between", "both", "but",
+    "by", "can", "could", "did", "do", "does", "doing", "down", "during", "each", "few", "for",
+    "from", "further", "had", "has", "have", "having", "he", "her", "here", "hers", "him", "his",
+    "how", "i", "if", "in", "into", "is", "it", "its", "itself", "just", "latest", "me", "more",
+    "most", "my", "news", "no", "nor", "not", "now", "of", "off", "on", "once", "only", "or",
+    "other", "our", "out", "over", "own", "please", "same", "she", "should", "so", "some",
+    "such", "tell", "than", "that", "the", "their", "them", "then", "there", "these", "they",
+    "this", "those", "through", "to", "today", "too", "under", "until", "up", "very", "was",
+    "we", "were", "what", "whats", "when", "where", "which", "while", "who", "whom", "why",
+    "will", "with", "would", "you", "your"
+}
@@ -2,7 +2,7 @@ import logging
 import time
 from typing import List, Set
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from sqlalchemy import or_
 
 from src.database.models import RawNews, VerifiedNews
@@ -47,15 +47,9 @@ class VerificationEngine:
         
         self.model = None
         if _check_sbert():
-            try:
-                from sentence_transformers import SentenceTransformer
-                # Load a lightweight model
-                logger.info("Initializing Intelligence Engine (SentenceTransformer)... this may take a moment.")
-                self.model = SentenceTransformer('all-MiniLM-L6-v2') 
-                logger.info("Intelligence Engine active.")
-            except Exception as e:
-                logger.error(f"Failed to load Intelligence Engine: {e}")
-                self.model = None
+            # Shared with chat retrieval so the model is loaded once per process
+            from src.analysis.embeddings import get_embedding_model
+            self.model = get_embedding_model()
 
     def verify_batch(self, session: Session, article_ids: List[int]) -> int:
         """
@@ -68,7 +62,11 @@ class VerificationEngine:
         # (For SBERT, we would ideally compute embeddings for all and do matrix search, 
         # but for this batch size, loop is okay or we can encode verified list once)
         cutoff = datetime.utcnow() - timedelta(days=2)
-        existing_news = session.query(VerifiedNews).filter(VerifiedNews.published_at >= cutoff).all()
+        existing_query = session.query(VerifiedNews).filter(VerifiedNews.published_at >= cutoff)
+        if self.model:
+            # Bodies are only read for the embeddings; load them with the rows
+            existing_query = existing_query.options(undefer_group("article_text"))
+        existing_news = existing_query.all()
         
         # Simple text cache for Jaccard/exact match as fallback
         existing_titles = [n.title for n in existing_news]
@@ -80,7 +78,7 @@ class VerificationEngine:
                 existing_embeddings = self.model.encode(existing_texts, convert_to_tensor=True)
 
         for art_id in article_ids:
-            article = session.query(RawNews).filter(RawNews.id == art_id).first()
+            article = session.query(RawNews).options(undefer_group("article_text")).filter(RawNews.id == art_id).first()
             if not article:
                 continue
             
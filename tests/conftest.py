@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+import pytest
+
+# models.py builds its engine from DATABASE_URL at import time, so point it at a scratch database first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from src.database.models import engine, init_db
+    init_db()
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from src.database.models import SessionLocal, Base
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
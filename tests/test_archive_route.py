@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.database import retention
+from src.database.models import DailyDigest
+from src.database.retention import apply_retention
+from src.delivery.web_dashboard import router
+from src.digest.payload import store_digest
+
+
+def _add_digest(db, edition_date, headline):
+    edition = DailyDigest(date=datetime.combine(edition_date, datetime.min.time()), edition_date=edition_date,
+                          version=2)
+    store_digest(edition, {
+        "date": edition_date.isoformat(),
+        "insight": f"Insight for {edition_date}",
+        "top_stories": [{"id": 1, "title": headline, "url": "https://news.example.com/1"}],
+        "brief": [],
+        "categories": {},
+    })
+    db.add(edition)
+    db.commit()
+
+
+def test_archive_lists_database_and_archived_editions(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    today = date.today()
+    old = today - timedelta(days=120)
+    _add_digest(db, today, "Fresh headline")
+    _add_digest(db, old, "Archived headline")
+    assert apply_retention(db, digest_days=90)["daily_digests"] == 1
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/archive")
+
+    assert response.status_code == 200
+    assert "Fresh headline" in response.text
+    assert "Archived headline" in response.text
+    assert "From the archive" in response.text
+    assert f"/api/digest/edition/{old.isoformat()}" in response.text
+
+
+def test_archive_without_digests_renders_empty_state(db):
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/archive")
+
+    assert response.status_code == 200
+    assert "No past editions yet." in response.text
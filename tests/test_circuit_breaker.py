@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.analysis import circuit_breaker
+from src.analysis.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def _open_breaker(monkeypatch, breaker):
+    # Zero cooldown: the next allow_request() moves straight to half-open
+    monkeypatch.setitem(circuit_breaker.COOLDOWNS, "rate_limit", 0.0)
+    breaker.record_failure(RateLimited("rate limit"))
+    assert breaker.state == OPEN
+
+
+def test_rate_limit_trips_immediately_and_blocks_while_open():
+    breaker = CircuitBreaker("test")
+    assert breaker.allow_request()
+    breaker.record_failure(RateLimited("rate limit"))
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.status()["short_circuited"] == 1
+
+
+def test_transient_errors_trip_after_threshold():
+    breaker = CircuitBreaker("test")
+    for _ in range(circuit_breaker.TRANSIENT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure(ServerError("unavailable"))
+        assert breaker.state == CLOSED
+    breaker.record_failure(ServerError("unavailable"))
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through_and_success_closes(monkeypatch):
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(monkeypatch):
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+
+    assert breaker.allow_request()
+    breaker.record_failure(ServerError("still down"))
+    assert breaker.state == OPEN
+    assert breaker.status()["trips"] == 2
+
+
+def test_released_probe_lets_the_next_caller_probe(monkeypatch):
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_abandoned_probe_stops_blocking_after_timeout(monkeypatch):
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+    monkeypatch.setattr(circuit_breaker, "PROBE_TIMEOUT", 0.0)
+
+    assert breaker.allow_request()
+    # Never released or recorded
+    assert breaker.allow_request()
+
+
+def test_analysis_releases_probe_when_prompt_building_fails(monkeypatch):
+    from src.analysis import llm_analyzer
+
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+    monkeypatch.setattr(llm_analyzer, "llm_breaker", breaker)
+    analyzer = llm_analyzer.LLMAnalyzer()
+    analyzer.client = object()
+
+    def broken(title, content):
+        raise ValueError("bad markup")
+
+    monkeypatch.setattr(analyzer, "_build_prompt", broken)
+    with pytest.raises(ValueError):
+        analyzer.analyze_article("Title", "<p>Body</p>")
+    assert breaker.allow_request()
+
+
+def test_chat_stream_releases_probe_on_client_disconnect(monkeypatch):
+    from src.analysis import chat_engine
+
+    breaker = CircuitBreaker("test")
+    _open_breaker(monkeypatch, breaker)
+    monkeypatch.setattr(chat_engine, "llm_breaker", breaker)
+
+    async def chunks():
+        for text in ("Markets", " rallied"):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    async def create(**kwargs):
+        return chunks()
+
+    engine = chat_engine.NewsChatEngine()
+    engine.api_key = "sk-test"
+    engine.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def disconnect_after_first_token():
+        stream = engine.stream_response({"query": "markets?", "results": [], "cached": None})
+        async for event in stream:
+            if event.startswith("event: token"):
+                break
+        await stream.aclose()
+
+    asyncio.run(disconnect_after_first_token())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from src.database.models import DailyDigest, RawNews, VerifiedNews
+from src.digest.generator import DigestGenerator
+from src.scheduler.pipeline import NewsPipeline
+
+
+def _add_news(db, title, age_hours):
+    published = datetime.utcnow() - timedelta(hours=age_hours)
+    raw = RawNews(title=title, url=f"https://news.example.com/{title}", source_name="Example Wire",
+                  content="Body", published_at=published, processed=True)
+    db.add(raw)
+    db.flush()
+    news = VerifiedNews(raw_news_id=raw.id, title=title, content="Body", category="World News",
+                        published_at=published, impact_score=6, credibility_score=0.8,
+                        summary_bullets=["a", "b", "c"], analyzed_at=datetime.utcnow())
+    db.add(news)
+    db.commit()
+    return news
+
+
+def test_reanalyzed_article_outside_window_leaves_digest_current(db):
+    generator = DigestGenerator()
+    _add_news(db, "today", 2)
+    old = _add_news(db, "last-week", 5 * 24)
+    digest, changed = generator.update_daily_digest(db)
+    assert changed
+
+    # e.g. requeue_fallback_analyses handed the old article back to the LLM
+    old.analyzed_at = datetime.utcnow() + timedelta(seconds=1)
+    db.commit()
+    assert NewsPipeline._digest_current(None, db) is None
+
+    _, changed = generator.update_daily_digest(db)
+    assert not changed
+    assert db.query(DailyDigest).one().version == 1
+    assert NewsPipeline._digest_current(None, db) is not None
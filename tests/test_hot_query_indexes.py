@@ -0,0 +1,24 @@
+import tempfile
+
+import pytest
+
+from src.database.engine import make_engine
+from src.database.models import upgrade_schema
+from src.utils.explain_hot_queries import check_plans, hot_queries
+
+
+@pytest.fixture(scope="module")
+def plans():
+    # A database built only by the migrations, so a missing index there fails here
+    engine = make_engine(f"sqlite:///{tempfile.mkdtemp()}/plans.db")
+    upgrade_schema(engine)
+    with engine.connect() as connection:
+        results = check_plans(connection)
+    engine.dispose()
+    return results
+
+
+@pytest.mark.parametrize("name", list(hot_queries()))
+def test_hot_query_uses_an_index(plans, name):
+    ok, plan = plans[name]
+    assert ok, f"{name} does not use an index: {plan}"
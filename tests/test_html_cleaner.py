@@ -0,0 +1,35 @@
+from src.collectors.html_cleaner import clean_html
+
+
+def test_continue_reading_mid_sentence_is_kept():
+    text = "The company said investors should continue reading filings. More text."
+    assert clean_html(text)["text"] == text
+
+
+def test_continue_reading_line_is_dropped():
+    markup = "<p>Markets rallied on Friday.</p><p>Continue reading…</p>"
+    assert clean_html(markup)["text"] == "Markets rallied on Friday."
+
+
+def test_trailing_continue_reading_teaser_is_dropped():
+    markup = "<p>Markets rallied on Friday. Continue reading the full story...</p>"
+    assert clean_html(markup)["text"] == "Markets rallied on Friday."
+
+
+def test_other_boilerplate_is_dropped():
+    markup = ("<p>Rates held steady.</p><p>The post Rates held appeared first on Example Wire.</p>"
+              "<p>Share this article</p>")
+    assert clean_html(markup)["text"] == "Rates held steady."
+
+
+def test_read_more_ending_a_sentence_is_kept():
+    assert clean_html("<p>Why kids should read more</p>")["text"] == "Why kids should read more"
+    assert clean_html("<p>Experts urge adults to read the full article</p>")["text"] == \
+        "Experts urge adults to read the full article"
+
+
+def test_read_more_line_or_marker_is_dropped():
+    assert clean_html("<p>Rates held steady.</p><p>Read more</p>")["text"] == "Rates held steady."
+    assert clean_html("<p>Rates held steady.</p><p>Read the full story »</p>")["text"] == "Rates held steady."
+    assert clean_html("<p>Rates held steady. Read more…</p>")["text"] == "Rates held steady."
+    assert clean_html("<p>Rates held steady. Read more →</p>")["text"] == "Rates held steady."
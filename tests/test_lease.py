@@ -0,0 +1,39 @@
+import time
+
+from src.scheduler import lease as lease_module
+from src.scheduler.lease import Lease
+
+
+class _FailingSession:
+    def execute(self, *args, **kwargs):
+        raise ConnectionError("database unreachable")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_second_holder_cannot_take_a_held_lease(engine):
+    first, second = Lease("test-exclusive", ttl=30), Lease("test-exclusive", ttl=30)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_database_error_keeps_lease_only_until_local_expiry(engine, monkeypatch):
+    lost = []
+    lease = Lease("test-expiry", ttl=0.3, on_lost=lambda: lost.append(True))
+    assert lease.try_acquire()
+
+    monkeypatch.setattr(lease_module, "SessionLocal", _FailingSession)
+    assert lease.try_acquire()
+    assert not lost
+
+    time.sleep(0.35)
+    assert not lease.try_acquire()
+    assert not lease.held
+    assert lost == [True]
@@ -0,0 +1,47 @@
+import threading
+
+from src.delivery.page_cache import STALE, RenderedPageCache, etag_matches
+
+
+def test_etag_matches_strong_weak_and_lists():
+    etag = RenderedPageCache.etag((1, 2, "t"))
+    assert etag == '"1-2-t"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{etag}', etag)
+    assert etag_matches(f'"0-1-t", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"1-1-t"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_pages_are_evicted_oldest_first():
+    cache = RenderedPageCache(max_entries=2)
+    for version in (1, 2, 3):
+        cache.put((1, version), b"page")
+    assert cache.get((1, 1)) is None
+    assert cache.get((1, 3)) == b"page"
+    assert cache.stats()["pages"] == 2
+
+
+def test_latest_goes_stale_on_invalidate():
+    cache = RenderedPageCache(check_seconds=60)
+    assert cache.latest() is STALE
+    cache.set_latest((1, 2))
+    assert cache.latest() == (1, 2)
+    cache.invalidate()
+    assert cache.latest() is STALE
+
+
+def test_not_modified_count_is_exact_under_concurrency():
+    cache = RenderedPageCache()
+
+    def count():
+        for _ in range(10000):
+            cache.record_not_modified()
+
+    threads = [threading.Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["not_modified"] == 80000
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from src.database.models import RawNews, VerifiedNews
+from src.scheduler.pipeline import REANALYZE_MAX_RETRIES, requeue_fallback_analyses
+
+
+def _add_news(db, title, reason, analyzed_at, retries=None):
+    raw = RawNews(title=title, url=f"https://news.example.com/{title}", source_name="Example Wire", content="Body")
+    db.add(raw)
+    db.flush()
+    analysis = {"mode": "fallback", "fallback_reason": reason}
+    if retries is not None:
+        analysis["retries"] = retries
+    news = VerifiedNews(raw_news_id=raw.id, title=title, content="Body", impact_score=7,
+                        analyzed_at=analyzed_at, analysis=analysis)
+    db.add(news)
+    db.commit()
+    return news
+
+
+def _requeued(db):
+    return sorted(title for (title,) in db.query(VerifiedNews.title).filter(VerifiedNews.impact_score == None))
+
+
+def test_only_outage_fallbacks_are_requeued(db):
+    now = datetime.utcnow()
+    for reason in ("quota", "rate_limit", "transient", "circuit open", "invalid_response", "no_api_key"):
+        _add_news(db, reason, reason, now)
+
+    assert requeue_fallback_analyses(db) == 4
+    assert _requeued(db) == ["circuit open", "quota", "rate_limit", "transient"]
+
+
+def test_retries_are_counted_and_capped(db):
+    news = _add_news(db, "story", "quota", datetime.utcnow())
+    for attempt in range(1, REANALYZE_MAX_RETRIES + 1):
+        assert requeue_fallback_analyses(db) == 1
+        db.refresh(news)
+        assert news.analysis["retries"] == attempt
+        news.impact_score = 7
+        db.commit()
+
+    assert requeue_fallback_analyses(db) == 0
+
+
+def test_least_retried_longest_waiting_go_first(db):
+    now = datetime.utcnow()
+    _add_news(db, "retried", "quota", now - timedelta(days=2), retries=1)
+    _add_news(db, "recent", "quota", now)
+    _add_news(db, "older", "quota", now - timedelta(hours=1))
+
+    assert requeue_fallback_analyses(db, limit=2) == 2
+    assert _requeued(db) == ["older", "recent"]
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from src.database import retention
+from src.database.models import ArticleContent, RawNews, SavedArticle, User, VerifiedNews
+from src.database.retention import apply_retention
+
+
+def _add_article(db, title, age_days, body):
+    published = datetime.utcnow() - timedelta(days=age_days)
+    raw = RawNews(title=title, url=f"https://news.example.com/{title}", source_name="Example Wire",
+                  content=body, description=body[:20], published_at=published, collected_at=published)
+    db.add(raw)
+    db.flush()
+    news = VerifiedNews(raw_news_id=raw.id, title=title, content=body, published_at=published, impact_score=5)
+    db.add(news)
+    db.commit()
+    return news
+
+
+def test_dry_run_counts_bodies_only_expiring_rows_reference(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+    _add_article(db, "expired", 60, "Expired body " * 10)
+    _add_article(db, "fresh", 1, "Fresh body " * 10)
+    # Saved articles stay hot, and so does their text
+    saved = _add_article(db, "saved", 60, "Saved body " * 10)
+    user = User(firebase_uid="reader")
+    db.add(user)
+    db.flush()
+    db.add(SavedArticle(user_id=user.id, news_id=saved.id))
+    # Shared with a row that is kept, so it must not be counted
+    _add_article(db, "shared-old", 60, "Shared body " * 10)
+    _add_article(db, "shared-new", 1, "Shared body " * 10)
+    db.commit()
+
+    planned = apply_retention(db, days=30, dry_run=True)
+    assert db.query(ArticleContent).count() == 8
+    done = apply_retention(db, days=30)
+
+    assert planned["verified_news"] == done["verified_news"] == 2
+    assert planned["raw_news"] == done["raw_news"] == 2
+    # The expired content and description bodies
+    assert planned["article_contents"] == done["article_contents"] == 2
@@ -0,0 +1,68 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.analysis import retrieval
+from src.analysis.retrieval import SemanticIndex
+from src.database.models import RawNews, VerifiedNews
+
+DIM = 8
+
+
+def _add_news(db, count):
+    for i in range(count):
+        raw = RawNews(title=f"Story {i}", url=f"https://news.example.com/{i}", source_name="Example Wire")
+        db.add(raw)
+        db.flush()
+        db.add(VerifiedNews(raw_news_id=raw.id, title=raw.title, content="Body", published_at=datetime.utcnow()))
+    db.commit()
+
+
+def _unit_vectors(texts):
+    vectors = np.ones((len(texts), DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_refresh_is_capped_and_continues(db, monkeypatch):
+    monkeypatch.setattr(retrieval, "encode_texts", _unit_vectors)
+    _add_news(db, 5)
+    index = SemanticIndex()
+
+    assert index.refresh(db, max_rows=2) == 2
+    assert index.refresh(db) == 3
+    assert len(index) == 5
+    assert index.refresh(db) == 0
+
+
+def test_search_and_request_refresh_do_not_wait_for_a_slow_refresh(db, engine, monkeypatch):
+    _add_news(db, 3)
+    index = SemanticIndex()
+    monkeypatch.setattr(retrieval, "encode_texts", _unit_vectors)
+    assert index.refresh(db, max_rows=1) == 1
+
+    encoding, release = threading.Event(), threading.Event()
+
+    def slow_encode(texts):
+        encoding.set()
+        release.wait(5)
+        return _unit_vectors(texts)
+
+    monkeypatch.setattr(retrieval, "encode_texts", slow_encode)
+    from src.database.models import SessionLocal
+    warm_session = SessionLocal()
+    warm = threading.Thread(target=index.refresh, args=(warm_session,))
+    warm.start()
+    try:
+        assert encoding.wait(5)
+        started = time.perf_counter()
+        query = _unit_vectors(["query"])[0]
+        assert [news_id for news_id, _ in index.search(query, 5)] == [index.ids[0]]
+        assert index.refresh(db, max_rows=32, blocking=False) == 0
+        assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+        warm.join()
+        warm_session.close()
+    assert len(index) == 3